@@ -0,0 +1,15 @@
+from ..util._lazy import attach_lazy_exports
+
+# Exports are imported from their submodule on first access, so importing the package stays cheap
+_LAZY_EXPORTS = {
+    "PhenotypingDaemon": "._daemon",
+    "serve": "._daemon",
+    "PhenotypingClient": "._client",
+    "PlateJob": "._jobs",
+    "PlateJobResult": "._jobs",
+    "DirectoryRunner": "._runner",
+    "parse_plate_fname": "._runner",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+__getattr__, __dir__ = attach_lazy_exports(__name__, _LAZY_EXPORTS)
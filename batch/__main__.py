@@ -0,0 +1,26 @@
+"""
+Starts a PhenotypingDaemon, e.g. python -m <package>.batch --n-workers 4
+"""
+import argparse
+import logging
+
+from ._daemon import serve, get_authkey, DEFAULT_ADDRESS, DEFAULT_AUTHKEY_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve plate profiling jobs from warm worker processes")
+    parser.add_argument("--host", default=DEFAULT_ADDRESS[0])
+    parser.add_argument("--port", type=int, default=DEFAULT_ADDRESS[1])
+    parser.add_argument("--n-workers", type=int, default=1)
+    parser.add_argument("--authkey-path", default=DEFAULT_AUTHKEY_PATH)
+    parser.add_argument("--no-cellprofiler", action="store_true",
+                        help="Don't warm up CellProfiler, for jobs that only use the numpy backend")
+    args = parser.parse_args()
+
+    logging.getLogger(__package__).setLevel(logging.INFO)
+    serve(address=(args.host, args.port), authkey=get_authkey(args.authkey_path, create=True),
+          n_workers=args.n_workers, warm_cellprofiler=not args.no_cellprofiler)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+from multiprocessing.connection import Client
+from typing import List
+
+import numpy as np
+
+# ----- Pkg Relative Import -----
+from ._jobs import PlateJob
+from ._daemon import DEFAULT_ADDRESS, get_authkey, PING, PONG, PROFILE, RESULT, DONE, SHUTDOWN, ERROR
+
+
+# ----- Main Class Definition -----
+class PhenotypingClient:
+    """
+    Client of a PhenotypingDaemon. The client keeps one connection open, so it can send several batches without
+    connecting again.
+    :param address: Address of the daemon
+    :param authkey: Key of the daemon, read from DEFAULT_AUTHKEY_PATH by default
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey: bytes = None):
+        self.address = address
+        self._connection = Client(address, authkey=authkey if authkey is not None else get_authkey())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def ping(self):
+        """
+        :return: Status of the daemon, with its pid, number of workers, number of finished jobs and uptime
+        """
+        return self._request((PING,), PONG)[1]
+
+    def profile_plates(self, jobs: List[PlateJob]):
+        """
+        Sends a batch of plates to the daemon and yields their results as the daemon finishes them, which is not
+        necessarily in the order of the jobs when the daemon has several workers
+        :param jobs: PlateJobs, or (img_path, sample_name, sampling_day, params) tuples
+        :return: Generator of PlateJobResults. A failed plate has no results and the traceback of the error
+        """
+        self._connection.send((PROFILE, [PlateJob(*job) for job in jobs]))
+        error = None
+        while True:
+            message = self._connection.recv()
+            if message[0] == DONE:
+                if error is not None:
+                    self._raise_unexpected(error)
+                return
+            elif message[0] == RESULT:
+                result = message[1]
+                if result.error is not None:
+                    log.warning(f"Daemon could not profile plate {result.img_path}")
+                yield result
+            elif message[0] == ERROR:
+                # Raised once the daemon is done with the request, so the next request doesn't read its DONE
+                error = message
+            else:
+                self._raise_unexpected(message)
+
+    def profile_plate(self, img_path: str, sample_name: str = None, sampling_day=np.nan, **params):
+        """
+        Profiles a single plate with the daemon
+        :param params: PlateProfile kwargs, e.g. n_rows, n_cols, measurement_backend or segmentation_method
+        :return: PlateProfileResults of the plate
+        """
+        result = list(self.profile_plates([PlateJob(img_path, sample_name, sampling_day, params)]))[0]
+        if result.error is not None:
+            raise RuntimeError(f"Could not profile plate {img_path}:\n{result.error}")
+        return result.results
+
+    def shutdown(self):
+        """
+        Asks the daemon to stop. It finishes the plates that are already running first
+        """
+        self._request((SHUTDOWN,), SHUTDOWN)
+        self.close()
+
+    def _request(self, message, reply_type):
+        self._connection.send(message)
+        reply = self._connection.recv()
+        if reply[0] != reply_type:
+            self._raise_unexpected(reply)
+        return reply
+
+    @staticmethod
+    def _raise_unexpected(message):
+        if message[0] == ERROR:
+            raise RuntimeError(f"Daemon error: {message[1]}")
+        raise RuntimeError(f"Unexpected message from the daemon: {message[0]}")
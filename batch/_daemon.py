@@ -0,0 +1,190 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import os
+import secrets
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing.connection import Listener, Client
+
+# ----- Pkg Relative Import -----
+from ._jobs import PlateJob, PlateJobResult, warm_up, profile_plate_job
+
+# ----- Global Constants -----
+DEFAULT_ADDRESS = ("127.0.0.1", 47653)
+DEFAULT_AUTHKEY_PATH = os.path.join(os.path.expanduser("~"), ".phenomics", "daemon_authkey")
+
+# Messages of the protocol. Every message is a tuple that starts with its type
+PING = "ping"
+PONG = "pong"
+PROFILE = "profile"
+RESULT = "result"
+DONE = "done"
+SHUTDOWN = "shutdown"
+ERROR = "error"
+
+
+def get_authkey(authkey_path: str = DEFAULT_AUTHKEY_PATH, create: bool = False):
+    """
+    The daemon unpickles the messages of its clients, so only clients that know the key of the daemon may connect.
+    The key is kept in a file that only the user can read.
+    :param create: Whether to create a new random key when the file doesn't exist
+    :return: The key as bytes
+    """
+    if not os.path.exists(authkey_path):
+        if not create:
+            raise FileNotFoundError(f"No daemon key at {authkey_path}. Start a PhenotypingDaemon first")
+        os.makedirs(os.path.dirname(authkey_path), mode=0o700, exist_ok=True)
+        fd = os.open(authkey_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as authkey_file:
+            authkey_file.write(secrets.token_hex(32))
+    with open(authkey_path, "r") as authkey_file:
+        return authkey_file.read().strip().encode()
+
+
+def _init_daemon_worker(warm_cellprofiler):
+    warm_up(warm_cellprofiler=warm_cellprofiler)
+
+
+# ----- Main Class Definition -----
+class PhenotypingDaemon:
+    """
+    Long lived local service that profiles plates for clients. The workers import the package, start CellProfiler and
+    boost a small image once when the daemon starts, so each plate job only pays for its own compute instead of the
+    start-up of a new Python process.
+
+    With n_workers=1 the plates are profiled one at a time in the daemon process itself. With more workers, every
+    worker process is warmed up once and the jobs of all clients are spread over them. Each client connection is
+    served by its own thread, and its results are streamed back as soon as each plate is done.
+    :param address: (host, port) to listen on, or the path of a Unix socket or Windows named pipe
+    :param authkey: Key the clients must know, read from DEFAULT_AUTHKEY_PATH by default
+    :param warm_cellprofiler: Whether to warm up CellProfiler, which is only needed by the CellProfiler backends
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey: bytes = None, n_workers: int = 1,
+                 warm_cellprofiler: bool = True):
+        self.address = address
+        self.authkey = authkey if authkey is not None else get_authkey(create=True)
+        self.n_workers = n_workers
+        self.warm_cellprofiler = warm_cellprofiler
+
+        self.n_jobs_done = 0
+        self.start_time = None
+        self._executor = None
+        self._listener = None
+        self._shutdown = threading.Event()
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        """
+        Warms up the workers and serves clients until a client asks the daemon to shut down
+        """
+        self.start_time = time.time()
+        if self.n_workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_daemon_worker,
+                                                 initargs=(self.warm_cellprofiler,))
+            # Start every worker now instead of on the first job
+            for future in [self._executor.submit(os.getpid) for _ in range(self.n_workers)]:
+                future.result()
+        else:
+            warm_up(warm_cellprofiler=self.warm_cellprofiler)
+            # A single thread keeps the CellProfiler workspace of this process to one plate at a time
+            self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self._listener = Listener(self.address, authkey=self.authkey)
+        log.info(f"Phenotyping daemon listening on {self._listener.address} with {self.n_workers} workers")
+        try:
+            while not self._shutdown.is_set():
+                try:
+                    connection = self._listener.accept()
+                except Exception:
+                    if self._shutdown.is_set():
+                        break
+                    log.warning("Rejected a client connection", exc_info=True)
+                    continue
+                threading.Thread(target=self._serve_client, args=(connection,), daemon=True).start()
+        finally:
+            self._listener.close()
+            self._executor.shutdown(wait=True)
+            log.info(f"Phenotyping daemon stopped after {self.n_jobs_done} jobs")
+
+    def _serve_client(self, connection):
+        with connection:
+            while not self._shutdown.is_set():
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                if message[0] == PING:
+                    connection.send((PONG, self.get_status()))
+                elif message[0] == PROFILE:
+                    self._profile_jobs(connection, message[1])
+                elif message[0] == SHUTDOWN:
+                    connection.send((SHUTDOWN,))
+                    self.shutdown()
+                    return
+                else:
+                    connection.send((ERROR, f"Unknown message type {message[0]}"))
+
+    def _profile_jobs(self, connection, jobs):
+        # The client reads results until DONE, so DONE is sent even when the jobs couldn't all be run
+        try:
+            jobs = [job if isinstance(job, PlateJob) else PlateJob(*job) for job in jobs]
+            start = time.perf_counter()
+            futures = {self._executor.submit(profile_plate_job, job_idx, job): (job_idx, job)
+                       for job_idx, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                job_idx, job = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    # e.g. a worker that died and broke the pool. The plate fails instead of the whole request
+                    log.warning(f"Could not profile plate {job.img_path}", exc_info=True)
+                    result = PlateJobResult(job_idx, job.img_path, None, traceback.format_exc(),
+                                            time.perf_counter() - start)
+                with self._lock:
+                    self.n_jobs_done += 1
+                connection.send((RESULT, result))
+        except (EOFError, OSError):
+            raise
+        except Exception:
+            log.warning("Could not profile the jobs of a client", exc_info=True)
+            connection.send((ERROR, traceback.format_exc()))
+        finally:
+            connection.send((DONE, len(jobs)))
+
+    def get_status(self):
+        return {
+            "pid": os.getpid(),
+            "n_workers": self.n_workers,
+            "n_jobs_done": self.n_jobs_done,
+            "uptime": time.time() - self.start_time,
+        }
+
+    def shutdown(self):
+        """
+        Stops accepting clients. Jobs that are already running finish first
+        """
+        self._shutdown.set()
+        # accept() only returns on a new connection, so the daemon connects to itself to wake it up
+        try:
+            Client(self._listener.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+
+
+def serve(address=DEFAULT_ADDRESS, authkey: bytes = None, n_workers: int = 1, warm_cellprofiler: bool = True):
+    """
+    Starts a PhenotypingDaemon and serves until it is shut down
+    """
+    PhenotypingDaemon(address=address, authkey=authkey, n_workers=n_workers,
+                      warm_cellprofiler=warm_cellprofiler).serve_forever()
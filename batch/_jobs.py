@@ -0,0 +1,103 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import os
+import time
+import traceback
+from collections import namedtuple
+
+import numpy as np
+
+# ----- Global Constants -----
+# A plate to profile: the path of its image, and the name, sampling day and PlateProfile kwargs of the plate
+PlateJob = namedtuple("PlateJob", ["img_path", "sample_name", "sampling_day", "params"],
+                      defaults=[None, np.nan, None])
+
+# Result of a PlateJob: PlateProfileResults, or None with the traceback of the error when the plate failed
+PlateJobResult = namedtuple("PlateJobResult", ["job_idx", "img_path", "results", "error", "duration"])
+
+# ClaheBoost settings of the plate boost and of the colony segmentation, see PlateBoost and ColonySegmentation
+WARM_UP_BOOSTS = [
+    {"footprint_shape": "disk", "footprint_radius": 8, "kernel_size": 150},
+    {"footprint_shape": "disk", "footprint_radius": 5, "kernel_size": None},
+]
+WARM_UP_IMG_SIZE = 64
+
+
+def warm_up(warm_cellprofiler: bool = True):
+    """
+    Imports the profiling modules and runs the ClaheBoost and CellProfiler modules once on a small synthetic well, so
+    the first plate of a worker only pays for its own compute
+    :param warm_cellprofiler: Whether to also start CellProfiler, which is only needed by the CellProfiler backends
+    """
+    start = time.perf_counter()
+    from ..detection import ClaheBoost
+    from ..phenotyping import PlateProfile
+
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, size=(WARM_UP_IMG_SIZE, WARM_UP_IMG_SIZE, 3), dtype=np.uint8)
+    for boost_kwargs in WARM_UP_BOOSTS:
+        ClaheBoost(**boost_kwargs).boost(img)
+
+    if warm_cellprofiler:
+        from ..phenotyping._colony_profile_cell_profiler_integration import get_cp_connection
+        cp_connection = get_cp_connection()
+        mask = np.zeros(img.shape[:2], dtype=bool)
+        mask[WARM_UP_IMG_SIZE // 4:-WARM_UP_IMG_SIZE // 4, WARM_UP_IMG_SIZE // 4:-WARM_UP_IMG_SIZE // 4] = True
+        with cp_connection.workspace_scope("warm_up"):
+            cp_connection.add_img(img, "warm_up")
+            cp_connection.add_object(mask, "warm_up_Colony", "warm_up")
+            cp_connection.measure_areashape("warm_up_Colony")
+            cp_connection.measure_intensity(object_name="warm_up_Colony", image_name="warm_up")
+            cp_connection.measure_texture(object_name="warm_up_Colony", image_name="warm_up")
+            cp_connection.pipeline.end_run()
+    log.info(f"Warmed up worker {os.getpid()} in {time.perf_counter() - start:.1f}s")
+
+
+def get_sample_name(job: PlateJob):
+    """
+    :return: Sample name of the job, which defaults to the file name of its image without the extension
+    """
+    if job.sample_name is not None:
+        return job.sample_name
+    return os.path.splitext(os.path.basename(job.img_path))[0]
+
+
+def profile_plate_job(job_idx: int, job: PlateJob, checkpoint_dirpath: str = None):
+    """
+    Profiles the plate of a job in the calling process
+    :param checkpoint_dirpath: Directory to save the checkpoint of the whole plate to, see PlateCheckpoint
+    :return: PlateJobResult of the job. Errors are returned in the result instead of raised, so one bad plate doesn't
+        end a batch
+    """
+    import skimage.io as io
+    from ..phenotyping import PlateProfile
+    from ..phenotyping._plate_profile_results import PlateProfileResults
+    from ..phenotyping._img_source import hash_source
+
+    start = time.perf_counter()
+    try:
+        plate = PlateProfile(
+                img=io.imread(job.img_path),
+                sample_name=get_sample_name(job),
+                sampling_day=job.sampling_day,
+                auto_analyze=True,
+                **(job.params or {})
+        )
+        if checkpoint_dirpath is not None:
+            plate.save_checkpoint(checkpoint_dirpath, img_hash=hash_source(job.img_path))
+        results = PlateProfileResults.from_plate(plate)
+        error = None
+    except KeyboardInterrupt:
+        raise KeyboardInterrupt
+    except:
+        log.warning(f"Could not profile plate {job.img_path}", exc_info=True)
+        results = None
+        error = traceback.format_exc()
+    return PlateJobResult(job_idx, job.img_path, results, error, time.perf_counter() - start)
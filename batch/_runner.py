@@ -0,0 +1,308 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import json
+import os
+import re
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+# ----- Pkg Relative Import -----
+from ._jobs import PlateJob, PlateJobResult, warm_up, profile_plate_job
+from ..util._cache import hash_file
+
+# ----- Global Constants -----
+# Scans are named {day}_{condition}_{replicate}, e.g. 3_1Y_7.jpg is day 3 of replicate 7 of strain 1Y
+PLATE_FNAME_PATTERN = re.compile(r"^(?P<day>\d+)_(?P<condition>[^_]+)_(?P<replicate>[^_]+)\.(?:jpe?g|png|tiff?)$",
+                                 re.IGNORECASE)
+LEDGER_FNAME = "processed.jsonl"
+
+# A scan found in the input directory. The series groups the days of one replicate of one condition
+PlateFile = namedtuple("PlateFile", ["path", "series", "day", "condition", "replicate", "content_hash"])
+
+
+def parse_plate_fname(fname: str, fname_pattern=PLATE_FNAME_PATTERN):
+    """
+    :param fname_pattern: Regex with the named groups day, condition and replicate
+    :return: (series, day, condition, replicate), or None if the name doesn't follow the pattern
+    """
+    match = re.match(fname_pattern, fname)
+    if match is None:
+        return None
+    condition, replicate = match.group("condition"), match.group("replicate")
+    return f"{condition}_{replicate}", int(match.group("day")), condition, replicate
+
+
+def _init_runner_worker(warm_cellprofiler):
+    # An initializer that raises breaks the whole pool. A worker that couldn't warm up still profiles its plates, it
+    # just pays for the start-up on its first one
+    try:
+        warm_up(warm_cellprofiler=warm_cellprofiler)
+    except Exception:
+        log.warning(f"Could not warm up worker {os.getpid()}", exc_info=True)
+
+
+# ----- Main Class Definition -----
+class DirectoryRunner:
+    """
+    Profiles the plate scans of a directory, grouped into series by their {day}_{condition}_{replicate} names. New
+    scans are scheduled on a pool of warm worker processes as they are found, and each plate is checkpointed to
+    output_dirpath/<series>/ as soon as it is done, so PlateSeries.load() can read a series at any time.
+
+    Scans are identified by the hash of their content, which is recorded in a ledger in output_dirpath. Content that
+    was already profiled is skipped, including after a restart or when a scan is copied under another name. Plates
+    that fail are logged, recorded as failed in the ledger and tried again the next time the runner starts. When a
+    worker dies and breaks the pool, its plates fail and the runner continues with a new pool.
+    :param params: PlateProfile kwargs of every plate, e.g. n_rows, n_cols or measurement_backend
+    :param n_workers: Number of worker processes
+    :param settle_time: Seconds a file must go unmodified before it is profiled when watching, so scans that are still
+        being written are left alone
+    :param poll_interval: Seconds between scans of the directory when watching
+    :param warm_cellprofiler: Whether the workers warm up CellProfiler, which is only needed by its backends
+    :param results_dirpath: Directory of a ResultsDataset the results of every plate are appended to as soon as the
+        plate is done, partitioned by series, day and plate
+    """
+
+    def __init__(self, input_dirpath: str, output_dirpath: str, params: dict = None, n_workers: int = 1,
+                 fname_pattern=PLATE_FNAME_PATTERN, settle_time: float = 2.0, poll_interval: float = 5.0,
+                 warm_cellprofiler: bool = True, results_dirpath: str = None):
+        self.input_dirpath = input_dirpath
+        self.output_dirpath = output_dirpath
+        self.params = dict(params or {})
+        self.n_workers = n_workers
+        self.fname_pattern = fname_pattern
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.warm_cellprofiler = warm_cellprofiler
+        self.results_dirpath = results_dirpath
+
+        self.n_done = 0
+        self.failed_paths = []
+
+        os.makedirs(self.output_dirpath, exist_ok=True)
+        self._ledger_path = os.path.join(self.output_dirpath, LEDGER_FNAME)
+        self._processed_hashes = set()
+        self._series_days = {}
+        self._load_ledger()
+
+        self._scheduled_hashes = set()
+        self._failed_hashes = set()
+        self._n_submitted = 0
+        # path -> (mtime, size, hash), so every scan is only hashed once
+        self._file_hashes = {}
+        self._ignored_fnames = set()
+        self._stop = threading.Event()
+
+    def _load_ledger(self):
+        if not os.path.exists(self._ledger_path):
+            return
+        with open(self._ledger_path, "r") as ledger_file:
+            for line in ledger_file:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("status") == "failed":
+                        continue
+                    self._processed_hashes.add(entry["content_hash"])
+                    self._series_days.setdefault(entry["series"], set()).add(entry["day"])
+
+    def scan(self, settle_time: float = 0.0):
+        """
+        :param settle_time: Seconds a file must go unmodified to be returned
+        :return: PlateFiles of the scans that are neither profiled nor scheduled yet, in (series, day) order
+        """
+        plate_files = []
+        found_hashes = set()
+        now = time.time()
+        with os.scandir(self.input_dirpath) as dir_entries:
+            for dir_entry in dir_entries:
+                if not dir_entry.is_file() or dir_entry.name in self._ignored_fnames:
+                    continue
+                parsed = parse_plate_fname(dir_entry.name, self.fname_pattern)
+                if parsed is None:
+                    log.debug(f"Ignoring {dir_entry.name}, which doesn't follow the plate naming scheme")
+                    self._ignored_fnames.add(dir_entry.name)
+                    continue
+                stat = dir_entry.stat()
+                if now - stat.st_mtime < settle_time:
+                    continue
+
+                cached = self._file_hashes.get(dir_entry.path)
+                if cached is None or cached[:2] != (stat.st_mtime, stat.st_size):
+                    cached = (stat.st_mtime, stat.st_size, hash_file(dir_entry.path))
+                    self._file_hashes[dir_entry.path] = cached
+                content_hash = cached[2]
+                if content_hash in found_hashes or content_hash in self._processed_hashes \
+                        or content_hash in self._scheduled_hashes or content_hash in self._failed_hashes:
+                    continue
+                found_hashes.add(content_hash)
+                plate_files.append(PlateFile(dir_entry.path, *parsed, content_hash))
+        return sorted(plate_files, key=lambda plate_file: (plate_file.series, plate_file.day))
+
+    def run(self, watch: bool = False):
+        """
+        Profiles every new scan of the input directory
+        :param watch: Whether to keep watching the directory for new scans until stop() is called, instead of
+            returning once the scans found are done
+        :return: Number of plates profiled successfully by this call
+        """
+        n_done = self.n_done
+        settle_time = self.settle_time if watch else 0.0
+        # future -> (plate_file, executor the plate was submitted to)
+        pending = {}
+        log.info(f"Profiling the plates of {self.input_dirpath} with {self.n_workers} workers")
+        executor = self._get_executor()
+        try:
+            while not self._stop.is_set():
+                for plate_file in self.scan(settle_time=settle_time):
+                    try:
+                        future = self._submit(executor, plate_file)
+                    except BrokenProcessPool:
+                        executor = self._restart_executor(executor)
+                        future = self._submit(executor, plate_file)
+                    pending[future] = (plate_file, executor)
+                    self._scheduled_hashes.add(plate_file.content_hash)
+                if not pending:
+                    if not watch:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                done, _ = wait(pending, timeout=self.poll_interval if watch else None, return_when=FIRST_COMPLETED)
+                if self._collect(done, pending, executor):
+                    # Every plate of a broken pool fails, so its other plates are recorded before it is replaced
+                    self._collect(wait([future for future, (_, owner) in pending.items() if owner is executor])[0],
+                                  pending, executor)
+                    executor = self._restart_executor(executor)
+
+            # Plates that haven't started are left for the next run. The running ones are recorded once they finish
+            for future, (plate_file, _) in list(pending.items()):
+                if future.cancel():
+                    pending.pop(future)
+                    self._scheduled_hashes.discard(plate_file.content_hash)
+            self._collect(wait(pending)[0], pending, executor)
+        finally:
+            executor.shutdown(wait=True)
+        return self.n_done - n_done
+
+    def stop(self):
+        """
+        Stops scheduling new scans. Plates that are already running finish and are recorded first
+        """
+        self._stop.set()
+
+    def _get_executor(self):
+        return ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_runner_worker,
+                                   initargs=(self.warm_cellprofiler,))
+
+    def _restart_executor(self, executor):
+        log.warning("A worker died and broke the worker pool. Starting a new pool")
+        executor.shutdown(wait=False)
+        return self._get_executor()
+
+    def _submit(self, executor, plate_file: PlateFile):
+        future = executor.submit(profile_plate_job, self._n_submitted, self._get_job(plate_file),
+                                 self._get_checkpoint_dirpath(plate_file))
+        self._n_submitted += 1
+        return future
+
+    def _collect(self, futures, pending, executor):
+        """
+        Records the plates of finished futures and removes them from pending
+        :return: Whether a plate failed because the worker pool executor is broken
+        """
+        broken = False
+        for future in futures:
+            plate_file, owner = pending.pop(future)
+            self._scheduled_hashes.discard(plate_file.content_hash)
+            try:
+                result = future.result()
+            except Exception as error:
+                log.warning(f"Could not profile {plate_file.path}", exc_info=True)
+                broken |= isinstance(error, BrokenProcessPool) and owner is executor
+                result = PlateJobResult(None, plate_file.path, None, traceback.format_exc(), None)
+            self._record(plate_file, result)
+        return broken
+
+    def _get_job(self, plate_file: PlateFile):
+        return PlateJob(plate_file.path, sample_name=self._get_plate_name(plate_file), sampling_day=plate_file.day,
+                        params=self.params)
+
+    @staticmethod
+    def _get_plate_name(plate_file: PlateFile):
+        # Same name PlateSeries gives its plates, so the checkpoints can be loaded as a series
+        return f"day({plate_file.day})_{plate_file.series}"
+
+    def _get_checkpoint_dirpath(self, plate_file: PlateFile):
+        return os.path.join(self.output_dirpath, plate_file.series, self._get_plate_name(plate_file))
+
+    def _record(self, plate_file: PlateFile, result):
+        if result.error is not None:
+            # The worker already logged the traceback
+            log.warning(f"Could not profile {plate_file.path}")
+            self._record_failed(plate_file, result)
+            return
+
+        try:
+            self._save_outputs(plate_file, result)
+        except Exception:
+            # e.g. a full disk. The runner goes on with the other plates, and the plate is tried again next time
+            log.warning(f"Could not save the results of {plate_file.path}", exc_info=True)
+            self._record_failed(plate_file, result)
+            return
+
+        self._write_ledger(plate_file, result, status="done")
+        self._processed_hashes.add(plate_file.content_hash)
+        self.n_done += 1
+        log.info(f"Profiled {os.path.basename(plate_file.path)} in {result.duration:.1f}s")
+
+    def _record_failed(self, plate_file: PlateFile, result):
+        self.failed_paths.append(plate_file.path)
+        self._failed_hashes.add(plate_file.content_hash)
+        self._write_ledger(plate_file, result, status="failed")
+
+    def _save_outputs(self, plate_file: PlateFile, result):
+        """
+        Appends the results of a profiled plate to the results dataset and adds its day to the manifest of its series
+        """
+        from ..phenotyping._plate_series_base import save_series_manifest, PlateSeriesBase
+        if self.results_dirpath is not None:
+            from ..phenotyping._results_dataset import ResultsDataset
+            # Colonies are named without their day, as in PlateSeries results
+            ResultsDataset(self.results_dirpath).append(
+                    result.results, series=plate_file.series,
+                    colony_names=[PlateSeriesBase._remove_day_from_name(name)
+                                  for name in result.results.results_table.colony_names])
+
+        days = self._series_days.get(plate_file.series, set()) | {plate_file.day}
+        series_params = {"n_rows": 8, "n_cols": 12, "align": True, "fit": True}
+        series_params.update({key: self.params[key] for key in series_params if key in self.params})
+        profile_kwargs = {key: value for key, value in self.params.items() if key not in series_params}
+        save_series_manifest(os.path.join(self.output_dirpath, plate_file.series), plate_file.series, sorted(days),
+                             profile_kwargs=profile_kwargs, **series_params)
+        self._series_days[plate_file.series] = days
+
+    def _write_ledger(self, plate_file: PlateFile, result, status: str):
+        # Failed plates are only recorded for the record, they are profiled again the next time the runner starts
+        try:
+            with open(self._ledger_path, "a") as ledger_file:
+                ledger_file.write(json.dumps({
+                    "content_hash": plate_file.content_hash,
+                    "path": plate_file.path,
+                    "series": plate_file.series,
+                    "day": plate_file.day,
+                    "duration": result.duration,
+                    "status": status,
+                }) + "\n")
+        except OSError:
+            # The plate is profiled again the next time the runner starts
+            log.warning(f"Could not write {plate_file.path} to the ledger", exc_info=True)
@@ -0,0 +1,40 @@
+"""
+Profiles the plate scans of a directory with a DirectoryRunner, e.g.
+python -m <package>.batch.run_directory sample_imgs/PlateSeries results --n-workers 4 --watch
+"""
+import argparse
+import json
+import logging
+
+from ._runner import DirectoryRunner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile {day}_{condition}_{replicate} plate scans into series")
+    parser.add_argument("input_dirpath")
+    parser.add_argument("output_dirpath")
+    parser.add_argument("--n-workers", type=int, default=1)
+    parser.add_argument("--watch", action="store_true", help="Keep watching the directory for new scans")
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    parser.add_argument("--settle-time", type=float, default=2.0)
+    parser.add_argument("--params", type=json.loads, default=None,
+                        help='PlateProfile kwargs as json, e.g. \'{"measurement_backend": "numpy"}\'')
+    parser.add_argument("--no-cellprofiler", action="store_true",
+                        help="Don't warm up CellProfiler, for runs that only use the numpy backend")
+    parser.add_argument("--results-dirpath", default=None,
+                        help="Parquet dataset to append the results of every plate to, see ResultsDataset")
+    args = parser.parse_args()
+
+    logging.getLogger(__package__).setLevel(logging.INFO)
+    runner = DirectoryRunner(args.input_dirpath, args.output_dirpath, params=args.params, n_workers=args.n_workers,
+                             settle_time=args.settle_time, poll_interval=args.poll_interval,
+                             warm_cellprofiler=not args.no_cellprofiler, results_dirpath=args.results_dirpath)
+    try:
+        runner.run(watch=args.watch)
+    except KeyboardInterrupt:
+        runner.stop()
+    print(f"Profiled {runner.n_done} plates, {len(runner.failed_paths)} failed")
+
+
+if __name__ == "__main__":
+    main()
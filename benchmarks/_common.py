@@ -0,0 +1,31 @@
+"""
+Shared helpers for the benchmark scripts. The repository root is itself the package, so the scripts add its parent
+directory to sys.path and import the package by its directory name.
+"""
+import importlib
+import os
+import sys
+import time
+
+PKG_DIRPATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PKG_NAME = os.path.basename(PKG_DIRPATH)
+
+
+def import_pkg_module(module_name: str):
+    parent_dirpath = os.path.dirname(PKG_DIRPATH)
+    if parent_dirpath not in sys.path:
+        sys.path.insert(0, parent_dirpath)
+    return importlib.import_module(f"{PKG_NAME}.{module_name}")
+
+
+def time_call(func, repeats: int = 3):
+    """
+    Returns the best wall time in seconds of func over the number of repeats, and the result of the last call
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
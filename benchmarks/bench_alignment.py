@@ -0,0 +1,77 @@
+"""
+Benchmarks the rotation estimators of the plate alignment on synthetic blob tables. The 'row' estimator fits a line
+through the row with the lowest mean MSE, 'robust' is BlobFinderTable.estimate_rotation(). Reports the mean and worst
+absolute angle error over a set of random plates, with a growing fraction of misplaced blobs.
+
+Usage: python benchmarks/bench_alignment.py
+"""
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from _common import import_pkg_module, time_call
+
+N_PLATES = 50
+OUTLIER_FRACS = [0.0, 0.05, 0.1, 0.2]
+PLATE_FORMATS = {
+    96: (8, 12),
+    384: (16, 24),
+}
+
+
+def make_blob_finder(n_rows, n_cols, degree_of_rotation, outlier_frac, rng):
+    pitch = 100.0
+    rows, cols = np.meshgrid(np.arange(n_rows), np.arange(n_cols), indexing="ij")
+    u = cols.ravel() * pitch + pitch
+    v = rows.ravel() * pitch + pitch
+    rad = math.radians(degree_of_rotation)
+    x = u * math.cos(rad) - v * math.sin(rad) + rng.normal(0, 1.5, len(u))
+    y = u * math.sin(rad) + v * math.cos(rad) + rng.normal(0, 1.5, len(u))
+    outliers = rng.random(len(x)) < outlier_frac
+    x[outliers] += rng.normal(0, pitch / 5, np.count_nonzero(outliers))
+    y[outliers] += rng.normal(0, pitch / 5, np.count_nonzero(outliers))
+
+    finder = import_pkg_module("detection.blob_finder").BlobFinder(n_rows=n_rows, n_cols=n_cols)
+    finder._table = pd.DataFrame({"y": y + 200, "x": x + 200, "sigma": np.full(len(x), 20.0)})
+    finder.generate_table()
+    finder._calculate_bin_mse()
+    return finder
+
+
+def row_estimate(finder):
+    """
+    The single-row estimate of PlateAlignment with alignment_method='row'
+    """
+    max_row = finder.table.groupby("row_num", observed=True)["mse"].mean()
+    max_row = finder.rows[max_row.idxmin()]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        m, _ = np.polyfit(max_row.x, max_row.y, 1)
+    return math.degrees(math.atan(m))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'wells':>6} {'outliers':>9} {'row err (deg)':>16} {'robust err (deg)':>19} {'confidence':>11} "
+          f"{'robust (ms)':>12}")
+    for n_wells, (n_rows, n_cols) in PLATE_FORMATS.items():
+        for outlier_frac in OUTLIER_FRACS:
+            row_err, robust_err, confidence, times = [], [], [], []
+            for _ in range(N_PLATES):
+                degree_of_rotation = rng.uniform(-3, 3)
+                finder = make_blob_finder(n_rows, n_cols, degree_of_rotation, outlier_frac, rng)
+                row_err.append(abs(row_estimate(finder) - degree_of_rotation))
+                robust_time, (estimate, score) = time_call(finder.estimate_rotation, repeats=1)
+                robust_err.append(abs(estimate - degree_of_rotation))
+                confidence.append(score)
+                times.append(robust_time)
+            print(f"{n_wells:>6} {outlier_frac:>9.2f} "
+                  f"{np.mean(row_err):>7.3f} / {np.max(row_err):<6.3f} "
+                  f"{np.mean(robust_err):>9.3f} / {np.max(robust_err):<7.3f} "
+                  f"{np.mean(confidence):>11.2f} {np.mean(times) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmarks the grouped bin-MSE scoring of BlobFinderBinMSEFilter against the per-blob np.polyfit loop it replaced.
+
+Usage: python benchmarks/bench_bin_mse.py
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from _common import import_pkg_module, time_call
+
+PLATE_FORMATS = {
+    96: (8, 12),
+    384: (16, 24),
+    1536: (32, 48)
+}
+
+
+def make_blob_table(n_rows, n_cols, extra_frac=0.25, seed=0):
+    """
+    Synthetic blob table for a slightly rotated plate, with a fraction of the bins holding a second, noisier candidate
+    """
+    rng = np.random.default_rng(seed)
+    pitch = 100.0
+    rows, cols = np.meshgrid(np.arange(n_rows), np.arange(n_cols), indexing="ij")
+    x = cols.ravel() * pitch + pitch
+    y = rows.ravel() * pitch + pitch + x * 0.01
+    n_extra = int(len(x) * extra_frac)
+    extra_idx = rng.choice(len(x), size=n_extra, replace=False)
+    x = np.concatenate([x, x[extra_idx] + rng.normal(0, pitch / 8, n_extra)])
+    y = np.concatenate([y, y[extra_idx] + rng.normal(0, pitch / 8, n_extra)])
+    x = x + rng.normal(0, 2, len(x))
+    y = y + rng.normal(0, 2, len(y))
+    sigma = np.full(len(x), 20.0)
+
+    finder = import_pkg_module("detection.blob_finder").BlobFinder(n_rows=n_rows, n_cols=n_cols)
+    finder._table = pd.DataFrame({"y": y, "x": x, "sigma": sigma})
+    finder.generate_table()
+    return finder._table
+
+
+def legacy_bin_mse(table):
+    """
+    The per-blob loop formerly used by BlobFinderBinMSEFilter._calculate_bin_mse
+    """
+
+    def linreg_residuals(x, y):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            m, b = np.polyfit(x, y, 1)
+        return y - (m * x + b)
+
+    row_mse, col_mse, mse = {}, {}, {}
+    for idx in range(table.shape[0]):
+        blob = table.iloc[idx, :]
+        other_row_members = table[table.loc[:, "row_num"] == blob["row_num"]]
+        other_row_members = other_row_members[other_row_members["bin_set"] != blob["bin_set"]]
+        row_x = np.array([blob["x"]] + other_row_members["x"].to_list())
+        row_y = np.array([blob["y"]] + other_row_members["y"].to_list())
+        row_residuals = linreg_residuals(row_x, row_y)
+        row_mse[blob.name] = np.sum(row_residuals ** 2) / len(row_y)
+
+        other_col_members = table[table.loc[:, "col_num"] == blob["col_num"]]
+        other_col_members = other_col_members[other_col_members["bin_set"] != blob["bin_set"]]
+        col_x = np.array([blob["x"]] + other_col_members["x"].to_list())
+        col_y = np.array([blob["y"]] + other_col_members["y"].to_list())
+        col_residuals = linreg_residuals(col_y, col_x)
+        col_mse[blob.name] = np.sum(col_residuals ** 2) / len(col_x)
+
+        residuals = np.concatenate([row_residuals, col_residuals])
+        mse[blob.name] = np.sum(residuals ** 2) / len(residuals)
+    return pd.Series(row_mse), pd.Series(col_mse), pd.Series(mse)
+
+
+def main():
+    bin_mse_filter = import_pkg_module("detection._blob_finder_bin_mse_filter").BlobFinderBinMSEFilter
+    print(f"{'wells':>6} {'blobs':>6} {'loop (s)':>10} {'grouped (s)':>12} {'speedup':>8} {'max abs err':>12}")
+    for n_wells, (n_rows, n_cols) in PLATE_FORMATS.items():
+        table = make_blob_table(n_rows, n_cols)
+        loop_time, expected = time_call(lambda: legacy_bin_mse(table), repeats=1)
+        grouped_time, result = time_call(lambda: bin_mse_filter._get_bin_mse(table), repeats=5)
+        err = max(
+            np.max(np.abs(result[i].to_numpy() - expected[i].loc[table.index].to_numpy()))
+            for i in range(3)
+        )
+        print(f"{n_wells:>6} {len(table):>6} {loop_time:>10.4f} {grouped_time:>12.4f} "
+              f"{loop_time / grouped_time:>7.1f}x {err:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmarks the plate-level ColonySegmentation against running ColonyProfileObject.find_colony on each well, and
+checks that both give the same colony masks.
+
+Usage: python benchmarks/bench_colony_segmentation.py [image_path]
+"""
+import os
+import sys
+import warnings
+
+import numpy as np
+import skimage.io as io
+
+from _common import PKG_DIRPATH, import_pkg_module, time_call
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+
+
+def main():
+    warnings.simplefilter("ignore")
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    img = io.imread(img_path)
+
+    plate = import_pkg_module("normalization").PlateNormalization(img, blobs_pyramid_downsample=4)
+    plate_img = plate.img
+    well_bounds = plate.get_well_bounds()
+    well_imgs = plate.get_well_imgs()
+
+    colony_profile_object = import_pkg_module("phenotyping._colony_profile_object").ColonyProfileObject
+    colony_segmentation = import_pkg_module("phenotyping._colony_segmentation").ColonySegmentation
+
+    def per_well():
+        wells = [colony_profile_object(well_img, f"well({idx:03d})", auto_run=False)
+                 for idx, well_img in enumerate(well_imgs)]
+        for well in wells:
+            well.find_colony()
+        return wells
+
+    per_well_time, wells = time_call(per_well, repeats=1)
+    plate_time, segmentations = time_call(
+            lambda: colony_segmentation().segment_plate(plate_img, well_bounds), repeats=3
+    )
+
+    mismatches = 0
+    for well, segmentation in zip(wells, segmentations):
+        if well.status_validity is False or segmentation is None:
+            mismatches += (well.status_validity is False) != (segmentation is None)
+        elif not np.array_equal(well.colony_mask, segmentation["colony_mask"]):
+            mismatches += 1
+
+    print(f"{'wells':>5} {'per well (s)':>13} {'plate (s)':>10} {'speedup':>8} {'mask mismatches':>16}")
+    print(f"{len(well_imgs):>5} {per_well_time:>13.3f} {plate_time:>10.3f} "
+          f"{per_well_time / plate_time:>7.1f}x {mismatches:>16d}")
+
+
+if __name__ == "__main__":
+    main()
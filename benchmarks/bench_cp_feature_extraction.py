@@ -0,0 +1,89 @@
+"""
+Benchmarks reading the results of the CellProfiler modules, which resolves the feature keys from the registry and reads
+all features of an object in one pass, against resolving the keys from the module and reading each feature from the
+HDF5 backed Measurements.
+
+Usage: python benchmarks/bench_cp_feature_extraction.py [image_path] [n_wells]
+"""
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import skimage.io as io
+from skimage.color import rgb2gray
+
+from _common import PKG_DIRPATH, import_pkg_module, time_call
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+DEFAULT_N_WELLS = 12
+
+
+def get_results_per_key(cp_api, object_name, module):
+    columns = pd.DataFrame(module.get_measurement_columns(cp_api.pipeline), columns=["source", "keys", "dtype"])
+    keys = columns[columns["source"] == object_name].loc[:, "keys"]
+    return pd.Series([cp_api.cpc_measurements.get_measurement(object_name, key)[0] for key in keys], index=keys)
+
+
+def get_results_bulk(cp_api, object_name, module, image_name):
+    return cp_api._get_results(object_name, cp_api._get_feature_keys(object_name, module, image_name))
+
+
+def measure_colonies(cp_api, well_imgs, colony_masks):
+    """
+    Measures the Texture of the colony of each well and returns the object name, a module with the same settings
+    and the image name of every measured colony
+    """
+    from cellprofiler.modules.measuretexture import MeasureTexture
+
+    measured = []
+    for idx, (well_img, colony_mask) in enumerate(zip(well_imgs, colony_masks)):
+        if colony_mask is None:
+            continue
+        img_name = f"well({idx:03d})"
+        cp_api.add_img(rgb2gray(well_img), img_name)
+        cp_api.add_object(colony_mask, f"{img_name}_Colony", img_name)
+        cp_api.measure_texture(object_name=f"{img_name}_Colony", image_name=img_name)
+        module = MeasureTexture()
+        module.images_or_objects.value = "Objects"
+        module.images_list.value = img_name
+        module.objects_list.value = f"{img_name}_Colony"
+        module.add_scale(5)
+        measured.append((f"{img_name}_Colony", module, img_name))
+    return measured
+
+
+def main():
+    warnings.simplefilter("ignore")
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    n_wells = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_N_WELLS
+    img = io.imread(img_path)
+
+    plate = import_pkg_module("normalization").PlateNormalization(img, blobs_pyramid_downsample=4)
+    well_imgs = plate.get_well_imgs()[:n_wells]
+    segmentations = import_pkg_module("phenotyping._colony_segmentation").ColonySegmentation().segment_plate(
+            plate.img, plate.get_well_bounds()[:n_wells]
+    )
+    colony_masks = [None if segmentation is None else segmentation["colony_mask"] for segmentation in segmentations]
+
+    cp_api = import_pkg_module("cellprofiler_api").CellProfilerApi()
+    measured = measure_colonies(cp_api, well_imgs, colony_masks)
+
+    per_key_time, per_key_results = time_call(
+            lambda: [get_results_per_key(cp_api, object_name, module) for object_name, module, _ in measured]
+    )
+    bulk_time, bulk_results = time_call(
+            lambda: [get_results_bulk(cp_api, *well) for well in measured]
+    )
+    identical = all(np.array_equal(per_key.values, bulk.values, equal_nan=True) for per_key, bulk in zip(per_key_results,
+                                                                                        bulk_results))
+
+    print(f"{'wells':>5} {'features':>8} {'per key (ms)':>13} {'bulk (ms)':>10} {'speedup':>8}")
+    print(f"{len(measured):>5} {len(bulk_results[0]):>8} {per_key_time * 1e3:>13.1f} {bulk_time * 1e3:>10.1f} "
+          f"{per_key_time / bulk_time:>7.1f}x")
+    print(f"\nIdentical results: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmarks the latency of profiling a plate in a new Python process, which imports the package and starts
+CellProfiler first, against sending the plate to a warm PhenotypingDaemon.
+
+Usage: python benchmarks/bench_daemon.py [image_path] [n_plates] [measurement_backend]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import PKG_DIRPATH, PKG_NAME, import_pkg_module
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+DEFAULT_N_PLATES = 3
+DEFAULT_BACKEND = "cellprofiler"
+DAEMON_ADDRESS = ("127.0.0.1", 47654)
+DAEMON_START_TIMEOUT = 300
+
+COLD_SCRIPT = """
+import time
+start = time.perf_counter()
+from {pkg}.batch._jobs import PlateJob, profile_plate_job
+result = profile_plate_job(0, PlateJob({img_path!r}, params={params!r}))
+assert result.error is None, result.error
+print(time.perf_counter() - start)
+"""
+
+
+def profile_cold(img_path, params):
+    script = COLD_SCRIPT.format(pkg=PKG_NAME, img_path=img_path, params=params)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(PKG_DIRPATH), check=True,
+                   capture_output=True)
+    return time.perf_counter() - start
+
+
+def start_daemon(authkey_path, warm_cellprofiler):
+    command = [sys.executable, "-m", f"{PKG_NAME}.batch", "--host", DAEMON_ADDRESS[0],
+               "--port", str(DAEMON_ADDRESS[1]), "--authkey-path", authkey_path]
+    if not warm_cellprofiler:
+        command.append("--no-cellprofiler")
+    process = subprocess.Popen(command, cwd=os.path.dirname(PKG_DIRPATH), stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    batch = import_pkg_module("batch")
+    get_authkey = import_pkg_module("batch._daemon").get_authkey
+    deadline = time.time() + DAEMON_START_TIMEOUT
+    while True:
+        try:
+            return process, batch.PhenotypingClient(DAEMON_ADDRESS, authkey=get_authkey(authkey_path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.time() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("The daemon did not start")
+            time.sleep(0.5)
+
+
+def main():
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    n_plates = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_N_PLATES
+    backend = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_BACKEND
+    params = {"measurement_backend": backend, "segmentation_method": "plate"}
+
+    cold_times = [profile_cold(img_path, params) for _ in range(n_plates)]
+
+    with tempfile.TemporaryDirectory() as tmp_dirpath:
+        process, client = start_daemon(os.path.join(tmp_dirpath, "authkey"), backend.startswith("cellprofiler"))
+        try:
+            warm_times = []
+            for _ in range(n_plates):
+                start = time.perf_counter()
+                client.profile_plate(img_path, **params)
+                warm_times.append(time.perf_counter() - start)
+            status = client.ping()
+            client.shutdown()
+        finally:
+            process.wait(timeout=DAEMON_START_TIMEOUT)
+
+    print(f"{'plate':>5} {'new process (s)':>16} {'warm daemon (s)':>16}")
+    for idx, (cold_time, warm_time) in enumerate(zip(cold_times, warm_times)):
+        print(f"{idx:>5} {cold_time:>16.2f} {warm_time:>16.2f}")
+    print(f"\nDaemon status: {json.dumps(status)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmarks the import time of the subpackages, each in a fresh interpreter, and lists which heavy dependencies they
+load. "import" only imports the subpackage, while "first use" also accesses its main export, which imports its
+submodules.
+
+Usage: python benchmarks/bench_import.py [n_repeats]
+"""
+import json
+import os
+import subprocess
+import sys
+
+from _common import PKG_DIRPATH, PKG_NAME
+
+DEFAULT_N_REPEATS = 5
+
+SUBPACKAGE_EXPORTS = {
+    "detection": "BlobFinder",
+    "normalization": "PlateNormalization",
+    "phenotyping": "PlateSeries",
+}
+
+HEAVY_MODULES = ["matplotlib", "seaborn", "skimage.io", "cellprofiler_core", "cellprofiler"]
+
+TIMING_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {pkg}.{subpackage} as subpackage
+import_time = time.perf_counter() - start
+getattr(subpackage, "{export}")
+use_time = time.perf_counter() - start
+print(json.dumps([import_time, use_time, [name for name in {heavy_modules} if name in sys.modules]]))
+"""
+
+
+def time_import(subpackage: str, export: str):
+    """
+    :return: Import time and first use time in seconds, and the heavy modules loaded by the first use
+    """
+    script = TIMING_SCRIPT.format(pkg=PKG_NAME, subpackage=subpackage, export=export, heavy_modules=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(PKG_DIRPATH),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_N_REPEATS
+    print(f"{'subpackage':>13} {'import (ms)':>12} {'first use (ms)':>15}  loaded")
+    for subpackage, export in SUBPACKAGE_EXPORTS.items():
+        timings = [time_import(subpackage, export) for _ in range(n_repeats)]
+        import_time = min(timing[0] for timing in timings)
+        use_time = min(timing[1] for timing in timings)
+        loaded = ", ".join(timings[-1][2]) or "-"
+        print(f"{subpackage:>13} {import_time * 1e3:>12.1f} {use_time * 1e3:>15.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
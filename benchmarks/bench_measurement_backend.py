@@ -0,0 +1,104 @@
+"""
+Benchmarks the batched measurement backends, which measure every well of a plate in one pass, against measuring each
+well with the CellProfiler modules, and checks that they give the same AreaShape, Intensity, Location and Texture
+features. "cellprofiler_plate" runs the CellProfiler modules once on a plate image, "numpy" measures natively.
+
+CellProfiler breaks ties between pixels of the maximum intensity by the order of an unstable sort, so a
+Location_MaxIntensity mismatch is only reported as an error when CellProfiler's pixel isn't a maximum of the object.
+
+Usage: python benchmarks/bench_measurement_backend.py [image_path]
+"""
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import skimage.io as io
+from skimage.color import rgb2gray
+
+from _common import PKG_DIRPATH, import_pkg_module, time_call
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+MAX_LOCATION_FEATURES = ["Location_MaxIntensity_X", "Location_MaxIntensity_Y"]
+
+
+def measure_cellprofiler(cp_api, well_imgs, colony_masks):
+    results = []
+    for idx, (well_img, colony_mask) in enumerate(zip(well_imgs, colony_masks)):
+        if colony_mask is None:
+            results.append(None)
+            continue
+        img_name = f"well({idx:03d})"
+        cp_api.add_img(rgb2gray(well_img), img_name)
+        well_results = []
+        for object_name, mask in ((f"{img_name}_Colony", colony_mask), (f"{img_name}_Background", ~colony_mask)):
+            cp_api.add_object(mask, object_name, img_name)
+            object_results = [
+                cp_api.measure_areashape(object_name),
+                cp_api.measure_intensity(object_name=object_name, image_name=img_name).iloc[:, 0]
+            ]
+            if mask is colony_mask:
+                object_results.append(
+                        cp_api.measure_texture(object_name=object_name, image_name=img_name).iloc[:, 0]
+                )
+            well_results.append(pd.concat(object_results))
+        cp_api.pipeline.end_run()
+        results.append(tuple(well_results))
+    return results
+
+
+def compare(well_imgs, colony_masks, batched_results, cp_results):
+    worst = {}
+    max_location_errors = 0
+    for well_img, colony_mask, batched, cp in zip(well_imgs, colony_masks, batched_results, cp_results):
+        if batched is None or cp is None:
+            continue
+        gray_img = rgb2gray(well_img).astype(np.float32)
+        for mask, batched_object, cp_object in ((colony_mask, batched[0], cp[0]), (~colony_mask, batched[1], cp[1])):
+            for feature, value in batched_object.items():
+                expected = cp_object[feature]
+                if feature in MAX_LOCATION_FEATURES or np.isnan(expected):
+                    continue
+                error = abs(value - expected) / max(abs(expected), 1e-12)
+                worst[feature] = max(worst.get(feature, 0), error)
+            for location in (cp_object, batched_object):
+                x, y = int(location[MAX_LOCATION_FEATURES[0]]), int(location[MAX_LOCATION_FEATURES[1]])
+                if not (mask[y, x] and gray_img[y, x] == gray_img[mask].max()):
+                    max_location_errors += 1
+    return pd.Series(worst).sort_values(ascending=False), max_location_errors
+
+
+def main():
+    warnings.simplefilter("ignore")
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    img = io.imread(img_path)
+
+    plate = import_pkg_module("normalization").PlateNormalization(img, blobs_pyramid_downsample=4)
+    well_imgs = plate.get_well_imgs()
+    segmentations = import_pkg_module("phenotyping._colony_segmentation").ColonySegmentation().segment_plate(
+            plate.img, plate.get_well_bounds()
+    )
+    colony_masks = [None if segmentation is None else segmentation["colony_mask"] for segmentation in segmentations]
+
+    measure_segmented_wells = import_pkg_module("phenotyping._well_profiling").measure_segmented_wells
+    cp_api = import_pkg_module("cellprofiler_api").CellProfilerApi()
+
+    cp_time, cp_results = time_call(lambda: measure_cellprofiler(cp_api, well_imgs, colony_masks), repeats=1)
+    print(f"{'backend':>18} {'wells':>5} {'time (s)':>9} {'speedup':>8}")
+    print(f"{'cellprofiler':>18} {len(well_imgs):>5} {cp_time:>9.3f} {1:>7.1f}x")
+    comparisons = {}
+    for backend, repeats in (("cellprofiler_plate", 1), ("numpy", 3)):
+        batched_time, batched_results = time_call(
+                lambda: measure_segmented_wells(well_imgs, segmentations, backend), repeats=repeats
+        )
+        comparisons[backend] = compare(well_imgs, colony_masks, batched_results, cp_results)
+        print(f"{backend:>18} {len(well_imgs):>5} {batched_time:>9.3f} {cp_time / batched_time:>7.1f}x")
+
+    for backend, (worst, max_location_errors) in comparisons.items():
+        print(f"\n{backend} largest relative differences to CellProfiler:\n{worst.head(10).to_string()}")
+        print(f"Maximum intensity locations that aren't a maximum: {max_location_errors}")
+
+
+if __name__ == "__main__":
+    main()
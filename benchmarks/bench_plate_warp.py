@@ -0,0 +1,67 @@
+"""
+Benchmarks the composed rotate+crop warp of the plate normalization against the former pad, float64 rotate, and slice
+passes. Reports wall time and peak traced memory for producing the final image from the input scan.
+
+Usage: python benchmarks/bench_plate_warp.py [image_path]
+"""
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+import skimage as ski
+import skimage.io as io
+
+from _common import PKG_DIRPATH, import_pkg_module, time_call
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+BORDER_PADDING = 50
+DEGREE_OF_ROTATION = -1.6576
+CROP_MARGIN = 120
+
+
+def legacy_normalize(img):
+    padded_img = np.concatenate([
+        np.expand_dims(np.pad(img[:, :, channel], BORDER_PADDING, mode='edge'), axis=2) for channel in range(3)
+    ], axis=2)
+    rotated_img = ski.util.img_as_ubyte(ski.transform.rotate(padded_img, DEGREE_OF_ROTATION, mode='edge'))
+    return ski.util.img_as_ubyte(rotated_img[CROP_MARGIN:-CROP_MARGIN, CROP_MARGIN:-CROP_MARGIN])
+
+
+def composed_normalize(plate_base, img):
+    plate = plate_base(img)
+    plate._set_img(np.pad(plate.img, ((BORDER_PADDING, BORDER_PADDING),) * 2 + ((0, 0),), mode='edge'))
+    plate._transform_img(plate._get_rotation_matrix(DEGREE_OF_ROTATION, plate.img_shape), plate.img_shape)
+    shape = plate.img_shape
+    plate._transform_img(plate._get_translation_matrix(-CROP_MARGIN, -CROP_MARGIN),
+                         (shape[0] - 2 * CROP_MARGIN, shape[1] - 2 * CROP_MARGIN))
+    return plate.img
+
+
+def traced_peak(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    img = io.imread(img_path)
+    plate_base = import_pkg_module("normalization._plate_base").PlateBase
+
+    legacy_time, expected = time_call(lambda: legacy_normalize(img))
+    composed_time, result = time_call(lambda: composed_normalize(plate_base, img))
+    legacy_peak = traced_peak(lambda: legacy_normalize(img))
+    composed_peak = traced_peak(lambda: composed_normalize(plate_base, img))
+    err = np.max(np.abs(result.astype(int) - expected.astype(int)))
+
+    print(f"{'':>9} {'time (s)':>9} {'peak (MB)':>10}")
+    print(f"{'legacy':>9} {legacy_time:>9.3f} {legacy_peak / 2 ** 20:>10.1f}")
+    print(f"{'composed':>9} {composed_time:>9.3f} {composed_peak / 2 ** 20:>10.1f}")
+    print(f"output {result.shape}, max abs err {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmarks the coarse-to-fine pyramid blob search of BlobFinderBase against the full resolution search on a sample
+plate scan. Reports wall time, peak traced memory, and how far the filtered blob centers moved from the full
+resolution result.
+
+Usage: python benchmarks/bench_pyramid_search.py [image_path]
+"""
+import os
+import sys
+import tracemalloc
+import warnings
+
+import numpy as np
+import skimage.io as io
+
+from _common import PKG_DIRPATH, import_pkg_module, time_call
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+FACTORS = [1, 2, 4]
+
+
+def run_search(boosted_img, factor):
+    finder = import_pkg_module("detection.blob_finder").BlobFinder(pyramid_downsample=factor)
+    finder.find_blobs(boosted_img)
+    return finder.table
+
+
+def traced_peak(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    warnings.simplefilter("ignore")
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    clahe_boost = import_pkg_module("detection").ClaheBoost
+    boosted_img = clahe_boost(img=io.imread(img_path)).get_boosted_img()
+
+    print(f"{'factor':>6} {'time (s)':>9} {'peak (MB)':>10} {'blobs':>6} {'max shift (px)':>15}")
+    reference = None
+    for factor in FACTORS:
+        search_time, table = time_call(lambda: run_search(boosted_img, factor), repeats=1)
+        peak = traced_peak(lambda: run_search(boosted_img, factor))
+        table = table.set_index("bin_set").sort_index()
+        if reference is None:
+            reference = table
+        shared = reference.index.intersection(table.index)
+        shift = np.hypot(
+                reference.loc[shared, "x"] - table.loc[shared, "x"],
+                reference.loc[shared, "y"] - table.loc[shared, "y"]
+        )
+        print(f"{factor:>6} {search_time:>9.2f} {peak / 2 ** 20:>10.1f} {len(table):>6} {shift.max():>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmarks profiling a plate without a result cache, with an empty cache, with every stage cached, and after a change
+of the segmentation method, which reuses the cached normalization. Checks that the cached results match the
+uncached ones.
+
+Usage: python benchmarks/bench_result_cache.py [image_path] [measurement_backend] [n_rows] [n_cols]
+"""
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+import skimage.io as io
+
+from _common import PKG_DIRPATH, import_pkg_module
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+DEFAULT_BACKEND = "numpy"
+
+
+def profile_plate(img, **kwargs):
+    PlateProfile = import_pkg_module("phenotyping").PlateProfile
+    start = time.perf_counter()
+    plate = PlateProfile(img, "bench_plate", auto_analyze=True, **kwargs)
+    return time.perf_counter() - start, plate.get_results()
+
+
+def main():
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    backend = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BACKEND
+    kwargs = {"measurement_backend": backend}
+    if len(sys.argv) > 4:
+        kwargs.update(n_rows=int(sys.argv[3]), n_cols=int(sys.argv[4]))
+    img = io.imread(img_path)
+    ResultCache = import_pkg_module("util").ResultCache
+
+    warnings.simplefilter("ignore")
+    with tempfile.TemporaryDirectory() as cache_dirpath:
+        cache = ResultCache(cache_dirpath)
+        timings = {}
+        timings["no cache"], uncached = profile_plate(img, segmentation_method="plate", **kwargs)
+        timings["empty cache"], cold = profile_plate(img, segmentation_method="plate", cache=cache, **kwargs)
+        timings["cached"], warm = profile_plate(img, segmentation_method="plate", cache=cache, **kwargs)
+        timings["new segmentation method"], _ = profile_plate(img, segmentation_method="well", cache=cache, **kwargs)
+        n_entries, n_bytes = len(cache), cache.n_bytes
+
+    pd.testing.assert_frame_equal(cold, uncached)
+    pd.testing.assert_frame_equal(warm, uncached)
+
+    print(f"{'run':>24} {'time (s)':>10}")
+    for name, timing in timings.items():
+        print(f"{name:>24} {timing:>10.2f}")
+    print(f"\nCache: {n_entries} entries, {n_bytes / 1024 ** 2:.1f} MiB. Cached results match the uncached results")
+
+
+if __name__ == "__main__":
+    main()
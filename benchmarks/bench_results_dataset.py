@@ -0,0 +1,85 @@
+"""
+Benchmarks exporting series results to a ResultsDataset, one Parquet file appended per plate, against writing them as
+one wide CSV like PlateSeriesIO.save_results2csv, and reading a few features of a few plates back from each. The plate
+results are synthetic, with the feature labels of the CellProfiler measurements.
+
+Usage: python benchmarks/bench_results_dataset.py [n_plates] [n_wells]
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from _common import import_pkg_module, time_call
+
+DEFAULT_N_PLATES = 100
+DEFAULT_N_WELLS = 96
+N_SERIES = 10
+READ_FEATURES = ["AreaShape_Feature0", "Intensity_Feature0"]
+N_READ_PLATES = 5
+
+
+def make_plates(n_plates, n_wells, seed=0):
+    PlateProfileResults = import_pkg_module("phenotyping._plate_profile_results").PlateProfileResults
+    features = ["status_valid_analysis"]
+    features += [f"AreaShape_Feature{idx}" for idx in range(60)]
+    features += [f"Intensity_Feature{idx}" for idx in range(80)]
+    features += [f"Location_Feature{idx}" for idx in range(10)]
+    features += [f"Texture_Feature{idx}" for idx in range(150)]
+
+    rng = np.random.default_rng(seed)
+    plates = []
+    for plate_idx in range(n_plates):
+        series, day = f"series{plate_idx % N_SERIES}", plate_idx // N_SERIES + 1
+        sample_name = f"day({day})_{series}"
+        measurement_results = pd.DataFrame(rng.random((len(features), n_wells)), index=features,
+                                           columns=[f"{sample_name}_well({idx:03d})_Colony" for idx in range(n_wells)])
+        measurement_results.loc["status_valid_analysis"] = 1.0
+        plates.append((series, PlateProfileResults(sample_name, day, None, measurement_results)))
+    return plates
+
+
+def get_dirsize(dirpath):
+    return sum(os.path.getsize(os.path.join(root, fname)) for root, _, fnames in os.walk(dirpath) for fname in fnames)
+
+
+def main():
+    n_plates = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_N_PLATES
+    n_wells = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_N_WELLS
+    ResultsDataset = import_pkg_module("phenotyping").ResultsDataset
+    plates = make_plates(n_plates, n_wells)
+    read_plates = [plate.sample_name for _, plate in plates[:N_READ_PLATES]]
+
+    with tempfile.TemporaryDirectory() as tmp_dirpath:
+        csv_path = os.path.join(tmp_dirpath, "results.csv")
+
+        def write_csv():
+            pd.concat([plate.get_results() for _, plate in plates], axis=0).to_csv(csv_path, header=False)
+
+        def write_dataset():
+            results_dataset = ResultsDataset(os.path.join(tmp_dirpath, "dataset"))
+            for series, plate in plates:
+                results_dataset.append(plate, series=series)
+            return results_dataset
+
+        csv_write_time, _ = time_call(write_csv, repeats=1)
+        dataset_write_time, results_dataset = time_call(write_dataset, repeats=1)
+
+        # The whole CSV has to be parsed to get any of its columns
+        csv_read_time, _ = time_call(lambda: pd.read_csv(csv_path, header=None, index_col=0), repeats=1)
+        dataset_read_time, dataset_results = time_call(
+                lambda: results_dataset.read(features=READ_FEATURES, plates=read_plates))
+        assert len(dataset_results) == N_READ_PLATES * n_wells
+
+        print(f"{'format':>8} {'write (s)':>10} {'size (MiB)':>11} {'read (s)':>9}")
+        print(f"{'csv':>8} {csv_write_time:>10.2f} {os.path.getsize(csv_path) / 1024 ** 2:>11.1f} "
+              f"{csv_read_time:>9.3f}")
+        print(f"{'parquet':>8} {dataset_write_time:>10.2f} {get_dirsize(results_dataset.dirpath) / 1024 ** 2:>11.1f} "
+              f"{dataset_read_time:>9.3f}")
+    print(f"\n{n_plates} plates of {n_wells} wells. Reading {len(READ_FEATURES)} features of {N_READ_PLATES} plates")
+
+
+if __name__ == "__main__":
+    main()
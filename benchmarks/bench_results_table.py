@@ -0,0 +1,116 @@
+"""
+Benchmarks building and formatting plate and series results with ResultsTable against the per-well concat, per-label
+str.contains filtering and transpose they replaced. The well results are synthetic, with the feature labels of the
+CellProfiler measurements.
+
+Usage: python benchmarks/bench_results_table.py [n_plates]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from _common import import_pkg_module, time_call
+
+PLATE_FORMATS = {
+    96: (8, 12),
+    384: (16, 24),
+}
+DEFAULT_N_PLATES = 10
+
+
+def make_features():
+    features = ["status_valid_analysis"]
+    features += [f"AreaShape_Feature{idx}" for idx in range(50)]
+    features += [f"Intensity_Feature{idx}" for idx in range(60)]
+    features += [f"Location_Feature{idx}" for idx in range(10)]
+    features += [f"Texture_Feature{idx}" for idx in range(84)]
+    return features
+
+
+def make_well_results(plate_name, n_wells, features, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.Index(features)
+    return [pd.DataFrame({f"{plate_name}_well({idx:03d})_Colony": rng.random(len(features))}, index=index)
+            for idx in range(n_wells)]
+
+
+def legacy_plate_results(well_results, sample_name, sampling_day):
+    """
+    The concat and formatting formerly done by PlateProfileBase.generate_well_profiles and _format_results
+    """
+    labels = import_pkg_module("phenotyping._results_table")
+    measurement_results = pd.concat(well_results, axis=1)
+    measurement_results = measurement_results.loc[:, ~measurement_results.columns.duplicated()]
+    col_idx = measurement_results.columns
+    metadata = pd.concat([
+        pd.DataFrame({labels.SAMPLING_DAY_LABEL: np.full(len(col_idx), sampling_day)}, index=col_idx).transpose(),
+        pd.DataFrame({labels.ORIGIN_PLATE_ID_LABEL: np.full(len(col_idx), sample_name)}, index=col_idx).transpose(),
+    ], axis=0)
+    results = pd.concat([metadata, measurement_results], axis=0)
+
+    measurement_table = results.loc[labels.METADATA_LABELS + labels.NUMERIC_METADATA_LABELS, :]
+    basic_table = [results.loc[results.index.to_series().str.contains(metric), :]
+                   for metric in labels.BASIC_CP_API_MEASUREMENT_LABELS]
+    formatted_results = pd.concat([measurement_table, *basic_table], axis=0).transpose()
+    formatted_results.loc[:, labels.STATUS_VALIDITY_LABEL] = \
+        formatted_results.loc[:, labels.STATUS_VALIDITY_LABEL].astype(bool)
+    return formatted_results
+
+
+def legacy_series_results(plate_results):
+    """
+    The concat formerly done by every access of PlateSeriesBase.results
+    """
+    results = []
+    for formatted_results in plate_results:
+        formatted_results = formatted_results.copy()
+        formatted_results.index = formatted_results.index.map(lambda name: "_".join(name.split("_")[1:]))
+        formatted_results.index.name = "colony_name"
+        results.append(formatted_results.reset_index(drop=False))
+    return pd.concat(results, axis=0, ignore_index=True).set_index(["colony_name", "sampling_day"])
+
+
+def build_series_table(plate_tables):
+    ResultsTable = import_pkg_module("phenotyping._results_table").ResultsTable
+    table = ResultsTable(plate_tables[0].schema, capacity=sum(plate_table.n_rows for plate_table in plate_tables))
+    for plate_table in plate_tables:
+        table.append(plate_table.matrix, ["_".join(name.split("_")[1:]) for name in plate_table.colony_names],
+                     plate_table.plate_ids[0], plate_table.sampling_days[0])
+    return table
+
+
+def main():
+    n_plates = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_N_PLATES
+    ResultsTable = import_pkg_module("phenotyping._results_table").ResultsTable
+    features = make_features()
+
+    print(f"{'wells':>6} {'stage':>20} {'concat (s)':>11} {'table (s)':>10} {'speedup':>8}")
+    for n_wells in PLATE_FORMATS:
+        plates = [(f"day({day})_bench", day, make_well_results(f"day({day})_bench", n_wells, features, seed=day))
+                  for day in range(1, n_plates + 1)]
+
+        legacy_time, legacy_plates = time_call(
+                lambda: [legacy_plate_results(well_results, name, day) for name, day, well_results in plates])
+        table_time, plate_tables = time_call(
+                lambda: [ResultsTable.from_well_results(well_results, name, day) for name, day, well_results in plates])
+        format_time, formatted = time_call(lambda: [plate_table.get_frame() for plate_table in plate_tables])
+        print(f"{n_wells:>6} {'plate results':>20} {legacy_time:>11.4f} {table_time + format_time:>10.4f} "
+              f"{legacy_time / (table_time + format_time):>7.1f}x")
+
+        legacy_time, expected = time_call(lambda: legacy_series_results(legacy_plates))
+        series_table = build_series_table(plate_tables)
+        access_time, result = time_call(lambda: series_table.get_frame(day_index=True))
+        print(f"{n_wells:>6} {'series.results':>20} {legacy_time:>11.4f} {access_time:>10.4f} "
+              f"{legacy_time / access_time:>7.1f}x")
+
+        numeric_labels = [label for label in expected.columns if label in result.columns[2:]]
+        err = np.max(np.abs(expected[numeric_labels].to_numpy(dtype=np.float64)
+                            - result[numeric_labels].to_numpy(dtype=np.float64)))
+        assert np.array_equal(expected.columns, result.columns) and err < 1e-6, err
+
+    print(f"\n{n_plates} plates of {len(features)} features. The float32 results match the legacy results")
+
+
+if __name__ == "__main__":
+    main()
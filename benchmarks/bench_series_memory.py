@@ -0,0 +1,61 @@
+"""
+Benchmarks the peak memory of profiling a PlateSeries from decoded images held in a list, against profiling it from
+the image paths with keep_plates=False, which decodes each plate only when it is profiled and only keeps its results.
+The peak is the largest amount of memory allocated through Python and numpy while the series runs.
+
+Usage: python benchmarks/bench_series_memory.py [image_path] [n_plates] [n_rows] [n_cols]
+"""
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+import skimage.io as io
+
+from _common import PKG_DIRPATH, import_pkg_module
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+DEFAULT_N_PLATES = 3
+
+
+def run_series(imgs, **kwargs):
+    """
+    :param imgs: Images or image paths of the series. Decoding the images is part of the measured run
+    :return: Peak traced memory in bytes, run time in seconds, and the results of the series
+    """
+    PlateSeries = import_pkg_module("phenotyping").PlateSeries
+    tracemalloc.start()
+    start = time.perf_counter()
+    if not isinstance(imgs, list):
+        imgs = imgs()
+    series = PlateSeries(imgs, "bench_series", **kwargs)
+    results = series.get_results()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, duration, results
+
+
+def main():
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    n_plates = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_N_PLATES
+    kwargs = {}
+    if len(sys.argv) > 4:
+        kwargs.update(n_rows=int(sys.argv[3]), n_cols=int(sys.argv[4]))
+    img_paths = [img_path] * n_plates
+
+    warnings.simplefilter("ignore")
+    array_peak, array_time, array_results = run_series(lambda: [io.imread(path) for path in img_paths], **kwargs)
+    path_peak, path_time, path_results = run_series(img_paths, keep_plates=False, **kwargs)
+    pd.testing.assert_frame_equal(path_results, array_results)
+
+    print(f"{'input':>18} {'peak (MiB)':>11} {'time (s)':>9}")
+    print(f"{'decoded images':>18} {array_peak / 1024 ** 2:>11.1f} {array_time:>9.2f}")
+    print(f"{'paths':>18} {path_peak / 1024 ** 2:>11.1f} {path_time:>9.2f}")
+    print(f"\n{n_plates} plates of {os.path.basename(img_path)}. The results of both inputs match")
+
+
+if __name__ == "__main__":
+    main()
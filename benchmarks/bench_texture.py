@@ -0,0 +1,102 @@
+"""
+Benchmarks the native Texture features, which count the co-occurrence matrices of every colony of a plate in one
+pass, against measuring each well with CellProfiler's MeasureTexture, and checks that both give the same Haralick
+features.
+
+Usage: python benchmarks/bench_texture.py [image_path]
+"""
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import skimage.io as io
+from skimage.color import rgb2gray
+
+from _common import PKG_DIRPATH, import_pkg_module, time_call
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+
+
+def measure_plate(measure_texture, well_imgs, colony_masks):
+    """
+    Lays the wells side by side in one label image with the colony of each well as its own object
+    """
+    valid_idxs = [idx for idx, colony_mask in enumerate(colony_masks) if colony_mask is not None]
+    height = max(colony_masks[idx].shape[0] for idx in valid_idxs)
+    width = sum(colony_masks[idx].shape[1] for idx in valid_idxs)
+    labels = np.zeros((height, width), dtype=np.int32)
+    gray_img = np.zeros((height, width), dtype=np.float64)
+    x_start = 0
+    for well_num, idx in enumerate(valid_idxs):
+        well_height, well_width = colony_masks[idx].shape
+        labels[:well_height, x_start:x_start + well_width] = np.where(colony_masks[idx], well_num + 1, 0)
+        gray_img[:well_height, x_start:x_start + well_width] = rgb2gray(well_imgs[idx])
+        x_start += well_width
+
+    texture = measure_texture(labels, gray_img)
+    results = [None] * len(well_imgs)
+    for well_num, idx in enumerate(valid_idxs):
+        results[idx] = texture.loc[well_num + 1]
+    return results
+
+
+def measure_cellprofiler(cp_api, well_imgs, colony_masks):
+    results = []
+    for idx, (well_img, colony_mask) in enumerate(zip(well_imgs, colony_masks)):
+        if colony_mask is None:
+            results.append(None)
+            continue
+        img_name = f"well({idx:03d})"
+        cp_api.add_img(rgb2gray(well_img), img_name)
+        cp_api.add_object(colony_mask, f"{img_name}_Colony", img_name)
+        results.append(cp_api.measure_texture(object_name=f"{img_name}_Colony", image_name=img_name).iloc[:, 0])
+        cp_api.pipeline.end_run()
+    return results
+
+
+def compare(native_results, cp_results):
+    worst = {}
+    nan_mismatches = 0
+    for native, cp in zip(native_results, cp_results):
+        if native is None or cp is None:
+            continue
+        for feature, value in native.items():
+            expected = cp[feature]
+            if np.isnan(value) or np.isnan(expected):
+                nan_mismatches += int(np.isnan(value) != np.isnan(expected))
+                continue
+            error = abs(value - expected) / max(abs(expected), 1e-12)
+            worst[feature] = max(worst.get(feature, 0), error)
+    return pd.Series(worst).sort_values(ascending=False), nan_mismatches
+
+
+def main():
+    warnings.simplefilter("ignore")
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    img = io.imread(img_path)
+
+    plate = import_pkg_module("normalization").PlateNormalization(img, blobs_pyramid_downsample=4)
+    well_imgs = plate.get_well_imgs()
+    segmentations = import_pkg_module("phenotyping._colony_segmentation").ColonySegmentation().segment_plate(
+            plate.img, plate.get_well_bounds()
+    )
+    colony_masks = [None if segmentation is None else segmentation["colony_mask"] for segmentation in segmentations]
+
+    measure_texture = import_pkg_module("measurement").measure_texture
+    cp_api = import_pkg_module("cellprofiler_api").CellProfilerApi()
+
+    native_time, native_results = time_call(lambda: measure_plate(measure_texture, well_imgs, colony_masks),
+                                            repeats=3)
+    cp_time, cp_results = time_call(lambda: measure_cellprofiler(cp_api, well_imgs, colony_masks), repeats=1)
+    worst, nan_mismatches = compare(native_results, cp_results)
+
+    print(f"{'wells':>5} {'cellprofiler (s)':>17} {'numpy (s)':>10} {'speedup':>8}")
+    print(f"{len(well_imgs):>5} {cp_time:>17.3f} {native_time:>10.3f} {cp_time / native_time:>7.1f}x")
+    print(f"\nLargest relative differences to CellProfiler:\n{worst.head(10).to_string()}")
+    print(f"\nFeatures that are NaN in only one of them: {nan_mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmarks the memory of measuring wells with CellProfiler when the workspace is released by a scope after each well,
+against keeping every well in one workspace, and reports the peak RSS of the scopes.
+
+Usage: python benchmarks/bench_workspace_memory.py [image_path] [n_repeats]
+"""
+import os
+import sys
+import warnings
+
+import numpy as np
+import skimage.io as io
+from skimage.color import rgb2gray
+
+from _common import PKG_DIRPATH, import_pkg_module, time_call
+
+DEFAULT_IMG = os.path.join(PKG_DIRPATH, "sample_imgs", "StandardDay6.jpg")
+DEFAULT_N_REPEATS = 3
+
+
+def measure_well(cp_api, well_img, colony_mask, img_name):
+    cp_api.add_img(rgb2gray(well_img), img_name)
+    cp_api.add_object(colony_mask, f"{img_name}_Colony", img_name)
+    cp_api.add_object(~colony_mask, f"{img_name}_Background", img_name)
+    cp_api.measure_areashape(f"{img_name}_Colony")
+    cp_api.measure_intensity(object_name=f"{img_name}_Colony", image_name=img_name)
+    cp_api.measure_texture(object_name=f"{img_name}_Colony", image_name=img_name)
+    cp_api.measure_areashape(f"{img_name}_Background")
+    cp_api.measure_intensity(object_name=f"{img_name}_Background", image_name=img_name)
+    cp_api.pipeline.end_run()
+
+
+def measure_series(cp_api, well_imgs, colony_masks, n_repeats, use_scope):
+    """
+    Measures the wells n_repeats times like a series of plates
+    :return: RSS after each repeat and the peak RSS of every scope in bytes
+    """
+    get_memory_usage = import_pkg_module("cellprofiler_api._cp_api_base").get_memory_usage
+    rss = []
+    peak_rss = []
+    for repeat in range(n_repeats):
+        for idx, (well_img, colony_mask) in enumerate(zip(well_imgs, colony_masks)):
+            if colony_mask is None:
+                continue
+            img_name = f"plate({repeat:03d})_well({idx:03d})"
+            if use_scope:
+                with cp_api.workspace_scope(img_name):
+                    measure_well(cp_api, well_img, colony_mask, img_name)
+                peak_rss.append(cp_api.scope_report.peak_rss)
+            else:
+                measure_well(cp_api, well_img, colony_mask, img_name)
+        rss.append(get_memory_usage()[0])
+    return rss, peak_rss
+
+
+def to_mib(values):
+    return " ".join(f"{value / 2 ** 20:.0f}" for value in values if value is not None)
+
+
+def main():
+    warnings.simplefilter("ignore")
+    img_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_IMG
+    n_repeats = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_N_REPEATS
+    img = io.imread(img_path)
+
+    plate = import_pkg_module("normalization").PlateNormalization(img, blobs_pyramid_downsample=4)
+    well_imgs = plate.get_well_imgs()
+    segmentations = import_pkg_module("phenotyping._colony_segmentation").ColonySegmentation().segment_plate(
+            plate.img, plate.get_well_bounds()
+    )
+    colony_masks = [None if segmentation is None else segmentation["colony_mask"] for segmentation in segmentations]
+
+    cp_api = import_pkg_module("cellprofiler_api").CellProfilerApi()
+    scoped_time, (scoped_rss, peak_rss) = time_call(
+            lambda: measure_series(cp_api, well_imgs, colony_masks, n_repeats, use_scope=True), repeats=1
+    )
+    cp_api.refresh()
+    unscoped_time, (unscoped_rss, _) = time_call(
+            lambda: measure_series(cp_api, well_imgs, colony_masks, n_repeats, use_scope=False), repeats=1
+    )
+
+    print(f"{'workspace':>9} {'time (s)':>9}  RSS after each plate (MiB)")
+    print(f"{'scoped':>9} {scoped_time:>9.1f}  {to_mib(scoped_rss)}")
+    print(f"{'shared':>9} {unscoped_time:>9.1f}  {to_mib(unscoped_rss)}")
+    if len(peak_rss) > 0 and peak_rss[0] is not None:
+        print(f"\nPeak RSS of the well scopes: median {np.median(peak_rss) / 2 ** 20:.0f} MiB, "
+              f"max {np.max(peak_rss) / 2 ** 20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
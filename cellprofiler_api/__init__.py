@@ -1 +1,9 @@
-from .cell_profiler_api import CellProfilerApi
+from ..util._lazy import attach_lazy_exports
+
+# CellProfiler and its modules are only imported on the first access to the CellProfilerApi
+_LAZY_EXPORTS = {
+    "CellProfilerApi": ".cell_profiler_api",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+__getattr__, __dir__ = attach_lazy_exports(__name__, _LAZY_EXPORTS)
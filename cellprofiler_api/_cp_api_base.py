@@ -1,16 +1,22 @@
 # ----- Imports -----
 from skimage.color import rgb2gray
 import pandas as pd
+import numpy as np
 
 from cellprofiler_core.preferences import set_headless
 from cellprofiler_core.image import ImageSetList, Image
 from cellprofiler_core.object import ObjectSet
 from cellprofiler_core.measurement import Measurements
+from cellprofiler_core.constants.measurement import IMAGE, EXPERIMENT
 from cellprofiler_core.pipeline import Pipeline
 from cellprofiler_core.workspace import Workspace
 from cellprofiler_core.module import Module
 
+from collections import namedtuple
+from contextlib import contextmanager
+import re
 import os
+import sys
 import logging
 
 logger_name = "phenomics-cellprofiler_api"
@@ -19,11 +25,90 @@ logging.basicConfig(format=f'[%(asctime)s|%(levelname)s|{os.path.basename(__file
 
 # ----- Pkg Relative Import -----
 
+# ----- Global Constants -----
+OBJECT_NUMBER_LABEL = "ObjectNumber"
+
+# Stand-ins for the object and image names in the feature key registry
+OBJECT_NAME_PLACEHOLDER = "\0object\0"
+IMAGE_NAME_PLACEHOLDER = "\0image\0"
+
+DEFAULT_SCOPE_NAME = "workspace"
+
+# Memory usage of a workspace scope in bytes, None where the platform doesn't report it
+ScopeReport = namedtuple("ScopeReport", ["name", "peak_rss", "rss"])
+
+
+def get_memory_usage():
+    """
+    :return: (rss, peak_rss) of this process in bytes. The peak is the high water mark since the last
+        reset_peak_rss, or since the process started on platforms where it can't be reset
+    """
+    try:
+        with open("/proc/self/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+        return int(fields["VmRSS"].split()[0]) * 1024, int(fields["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return None, peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def reset_peak_rss():
+    """
+    Resets the peak RSS of this process to its current RSS, which is only supported on Linux
+    :return: True if the peak was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class ObjectMeasurements(Measurements):
+    """
+    Measurements that also keep the numeric object measurements of the current image set in memory as the modules add
+    them, so the results can be read in bulk instead of looking up an HDF5 dataset per feature
+    """
+    def __init__(self, *args, **kwargs):
+        self.object_measurements = {}
+        super().__init__(*args, **kwargs)
+
+    def add_measurement(self, object_name, feature_name, data, image_set_number=None, data_type=None):
+        super().add_measurement(object_name, feature_name, data, image_set_number=image_set_number,
+                                data_type=data_type)
+        if object_name in (IMAGE, EXPERIMENT) or image_set_number not in (None, self.image_set_number):
+            return
+        data = np.asarray(data)
+        if data.dtype.kind in "biuf":
+            self.object_measurements[object_name, feature_name] = data.astype(np.float64).ravel()
+        else:
+            self.object_measurements.pop((object_name, feature_name), None)
+
+    def get_object_measurement(self, object_name, feature_name):
+        """
+        :return: The measurement of every object of the current image set
+        """
+        measurement = self.object_measurements.get((object_name, feature_name))
+        if measurement is None:
+            return self.get_measurement(object_name, feature_name)
+        return measurement
+
+
 # ----- Main Class Definition -----
 set_headless()
 
 
 class CellProfilerApiBase:
+    # Feature keys of each module configuration, resolved once with the object and image names as placeholders
+    _feature_key_registry = {}
+
     def __init__(self):
         self.input_img = None
         self.image_name = None
@@ -38,11 +123,10 @@ class CellProfilerApiBase:
         self.status_validity = True
         self.keys = {}
         self.results = {}
-        self.img_set_list = ImageSetList()
-        self.img_set_list_idx = self.img_set_list.count()
-        self.img_set = self.img_set_list.get_image_set(
-            self.img_set_list_idx
-        )
+        self.img_set_list = None
+        self.img_set_list_idx = None
+        self.img_set = None
+        self.scope_report = None
         self._init_workspace()
 
     @property
@@ -63,12 +147,45 @@ class CellProfilerApiBase:
         self._set_img(img)
 
     def refresh(self):
+        """
+        Releases the images, objects, measurements and results of the workspace and starts a new one
+        """
+        if self.cpc_measurements is not None:
+            self.cpc_measurements.close()
+        self.input_img = None
+        self.cp_img = None
+        self.keys = {}
+        self.results = {}
         self._init_workspace()
 
-    def add_img(self, gray_img, name):
+    @contextmanager
+    def workspace_scope(self, name: str = DEFAULT_SCOPE_NAME):
+        """
+        Scope for measuring a well or a chunk of wells. The workspace is released when the scope exits, so the memory
+        of a long series stays bounded by its largest scope instead of growing with every well. Scopes release the
+        whole workspace, so they should not be nested.
+
+        The peak RSS of the process within the scope is logged and kept in scope_report. The peak can only be reset
+        on Linux, elsewhere it is the peak since the process started.
+        :param name: Name of the scope in its report
+        """
+        reset_peak_rss()
+        try:
+            yield self
+        finally:
+            self.refresh()
+            rss, peak_rss = get_memory_usage()
+            self.scope_report = ScopeReport(name, peak_rss, rss)
+            if peak_rss is not None:
+                log.info(f"Released workspace of {name} with a peak RSS of {peak_rss / 2 ** 20:.1f} MiB")
+
+    def add_img(self, gray_img, name, mask=None):
+        """
+        :param mask: Optional boolean mask of the pixels the modules may measure
+        """
         if len(gray_img.shape)==3:
             gray_img = rgb2gray(gray_img)
-        cp_img = Image(gray_img)
+        cp_img = Image(gray_img, mask=mask)
         self.img_set.add(name, cp_img)
 
     def _set_name(self, image_name):
@@ -86,10 +203,15 @@ class CellProfilerApiBase:
         ----- Objective -----
         Initialize CellProfiler Workspace and Identifies Primary Object in Images. This has to be done first before running other modules
         '''
+        self.img_set_list = ImageSetList()
+        self.img_set_list_idx = self.img_set_list.count()
+        self.img_set = self.img_set_list.get_image_set(
+            self.img_set_list_idx
+        )
 
         self.obj_set = ObjectSet(can_overwrite=True)  # Results work when true, mask segmentation does not
 
-        self.cpc_measurements = Measurements(
+        self.cpc_measurements = ObjectMeasurements(
             mode="memory",
             multithread=True
         )
@@ -107,29 +229,77 @@ class CellProfilerApiBase:
             self.img_set_list
         )
 
-    def _get_feature_keys(self, obj_name, module):
-        cpc_metric_cols = pd.DataFrame(
-            module.get_measurement_columns(self.pipeline),
-            columns=["source", "keys", "dtype"]
+    def _get_feature_keys(self, obj_name, module, image_name=None):
+        """
+        The feature keys only depend on the module settings, so they are looked up in a registry keyed by the module
+        and its settings with the object and image names replaced by placeholders
+        :param image_name: Name of the image the module measures, which is part of the keys of image measurements
+        :return: Series of the feature keys the module measures for the object
+        """
+        names = {obj_name: OBJECT_NAME_PLACEHOLDER}
+        if image_name is not None:
+            names[image_name] = IMAGE_NAME_PLACEHOLDER
+        configuration = (type(module).__name__,) + tuple(
+            names.get(setting.value_text, setting.value_text) for setting in module.settings()
         )
-        keys = cpc_metric_cols[cpc_metric_cols["source"]==obj_name]
-        return keys.loc[:, "keys"]
+        key_templates = self._feature_key_registry.get(configuration)
+        if key_templates is None:
+            cpc_metric_cols = pd.DataFrame(
+                module.get_measurement_columns(self.pipeline),
+                columns=["source", "keys", "dtype"]
+            )
+            keys = cpc_metric_cols[cpc_metric_cols["source"]==obj_name].loc[:, "keys"]
+            key_templates = self._get_key_templates(keys, image_name)
+            if key_templates is None:
+                return keys.reset_index(drop=True)
+            self._feature_key_registry[configuration] = key_templates
+
+        if image_name is not None:
+            return pd.Series([key.replace(IMAGE_NAME_PLACEHOLDER, image_name) for key in key_templates], name="keys")
+        return pd.Series(key_templates, name="keys")
+
+    @staticmethod
+    def _get_key_templates(keys, image_name):
+        """
+        :return: The keys with the image name replaced by a placeholder, or None when the image name can't be told
+            apart from the rest of a key
+        """
+        if image_name is None:
+            return list(keys)
+        image_pattern = re.compile(f"(?<=_){re.escape(image_name)}(?=_|$)")
+        key_templates = []
+        for key in keys:
+            key_template, n_names = image_pattern.subn(IMAGE_NAME_PLACEHOLDER, key)
+            if n_names > 1:
+                return None
+            key_templates.append(key_template)
+        return key_templates
 
     def _get_results(self, obj_name, feature_keys):
-        results = []
-        for key in feature_keys:
-            curr_result = self.cpc_measurements.get_measurement(
-                obj_name,
-                key
+        """
+        Reads all features of the object set into one array in a single pass
+        :return: Series of the measurements of a single object, or a DataFrame with a column per object number when
+            the object set holds several objects
+        """
+        feature_keys = list(feature_keys)
+        object_results = None
+        for key_idx, key in enumerate(feature_keys):
+            curr_result = self.cpc_measurements.get_object_measurement(obj_name, key)
+            if object_results is None:
+                object_results = np.empty((len(feature_keys), len(curr_result)), dtype=np.float64)
+            object_results[key_idx] = curr_result
+
+        if object_results is not None and object_results.shape[1] != 1:
+            results = pd.DataFrame(
+                    object_results,
+                    index=pd.Index(feature_keys, name="Metric"),
+                    columns=pd.RangeIndex(1, object_results.shape[1] + 1, name=OBJECT_NUMBER_LABEL)
             )
-            assert (len(curr_result)==1), "Too many objects"
-            results.append(curr_result[0])
-        # results = pd.DataFrame(
-        #     list(zip(feature_keys, results)),
-        #     columns=["Metric", obj_name]
-        # ).set_index("Metric").copy(deep=True)
+            log.debug(f"Got results for {results.shape[1]} objects of {obj_name}")
+            return results
+
         results = pd.Series(
-                data=results,
+                data=np.empty(0) if object_results is None else object_results[:, 0],
                 index=feature_keys,
                 name=obj_name
         )
@@ -58,9 +58,8 @@ class CellProfilerApiMeasureIntensity(CellProfilerApiMeasureAreaShape):
 		mod = MeasureObjectIntensity()
 		mod.images_list.value = image_name
 		mod.objects_list.value = object_name
-		self.pipeline.add_module(mod)
-		mod.run(self.workspace)
-		keys = self._get_feature_keys(object_name,mod)
+		self.pipeline.run_module(mod, self.workspace)
+		keys = self._get_feature_keys(object_name, mod, image_name)
 		self.keys[f"{MEASUREMENT_CLASS_LABEL}"] = keys
 		results = self._get_results(
 			object_name, keys
@@ -74,7 +74,7 @@ class CellProfilerApiMeasureTexture(CellProfilerApiMeasureIntensity):
 
         self.pipeline.run_module(mod, self.workspace)
 
-        keys = self._get_feature_keys(object_name, mod)
+        keys = self._get_feature_keys(object_name, mod, image_name)
         self.keys[f"{MEASUREMENT_CLASS_LABEL}"] = keys
 
         results = self._get_results(
@@ -0,0 +1,133 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import pandas as pd
+import numpy as np
+from skimage.color import rgb2gray
+from skimage.util import img_as_float
+
+from typing import List
+
+# ----- Pkg Relative Import -----
+from ._cp_api_analysis import CellProfilerApiAnalysis
+from ._cp_api_base import OBJECT_NUMBER_LABEL
+
+# ----- Global Constants -----
+PLATE_IMAGE_NAME = "plate"
+
+# Measurements in the coordinates of the image, which are moved to the coordinates of each well
+X_COORDINATE_METRICS = [
+    "AreaShape_Center_X",
+    "AreaShape_BoundingBoxMinimum_X",
+    "AreaShape_BoundingBoxMaximum_X",
+    "Location_CenterMassIntensity_X",
+    "Location_MaxIntensity_X",
+]
+Y_COORDINATE_METRICS = [metric[:-1] + "Y" for metric in X_COORDINATE_METRICS]
+
+
+# ----- Main Class Definition -----
+class CellProfilerApiPlate(CellProfilerApiAnalysis):
+    def measure_wells(self, well_imgs: List[np.ndarray], colony_masks: List[np.ndarray],
+                      image_name: str = PLATE_IMAGE_NAME):
+        """
+        Measures the colony and background of many wells in a single CellProfiler run. The wells are laid side by side
+        in one image with all colonies as one object set and all backgrounds as another, so each module runs once
+        instead of once per well and object.
+
+        MeasureObjectIntensity finds the edges of the objects in the whole image, where the reflected border of a
+        single well is replaced by the next well. It therefore measures a copy of the object sets where each well is
+        padded by a pixel of its own labels, and the padding is masked out of the image.
+        :param well_imgs: RGB or grayscale well images
+        :param colony_masks: Colony mask of each well, or None for a well without a colony
+        :param image_name: Name of the plate image in the workspace
+        :return: List with a (colony, background) tuple of Series per well, or None for a well without a colony. All
+            wells are None when a module failed
+        """
+        valid_idxs = [idx for idx, colony_mask in enumerate(colony_masks) if colony_mask is not None]
+        results = [None] * len(well_imgs)
+        if len(valid_idxs) == 0:
+            return results
+
+        height = max(colony_masks[idx].shape[0] for idx in valid_idxs) + 2
+        width = sum(colony_masks[idx].shape[1] + 2 for idx in valid_idxs)
+        plate_img = np.zeros((height, width), dtype=np.float64)
+        plate_mask = np.zeros((height, width), dtype=bool)
+        colony_labels = np.zeros((height, width), dtype=np.int32)
+        background_labels = np.zeros((height, width), dtype=np.int32)
+        padded_colony_labels = np.zeros((height, width), dtype=np.int32)
+        padded_background_labels = np.zeros((height, width), dtype=np.int32)
+        origins = np.zeros((len(valid_idxs), 2), dtype=np.intp)
+
+        x_start = 0
+        for well_num, idx in enumerate(valid_idxs):
+            well_height, well_width = colony_masks[idx].shape
+            well = (slice(1, well_height + 1), slice(x_start + 1, x_start + well_width + 1))
+            padded_well = (slice(0, well_height + 2), slice(x_start, x_start + well_width + 2))
+            colony = np.where(colony_masks[idx], well_num + 1, 0)
+            background = np.where(colony_masks[idx], 0, well_num + 1)
+
+            well_img = well_imgs[idx]
+            plate_img[well] = rgb2gray(well_img) if well_img.ndim == 3 else img_as_float(well_img)
+            plate_mask[well] = True
+            colony_labels[well] = colony
+            background_labels[well] = background
+            padded_colony_labels[padded_well] = np.pad(colony, 1, mode="edge")
+            padded_background_labels[padded_well] = np.pad(background, 1, mode="edge")
+            origins[well_num] = (1, x_start + 1)
+            x_start += well_width + 2
+
+        self.status_validity = True
+        colony_name = f"{image_name}_Colony"
+        background_name = f"{image_name}_Background"
+        self.add_img(plate_img, image_name, mask=plate_mask)
+        self.add_object(colony_labels, colony_name, image_name)
+        self.add_object(background_labels, background_name, image_name)
+        self.add_object(padded_colony_labels, f"{colony_name}Padded", image_name)
+        self.add_object(padded_background_labels, f"{background_name}Padded", image_name)
+
+        colony_results = [
+            self.measure_areashape(colony_name),
+            self.measure_intensity(object_name=f"{colony_name}Padded", image_name=image_name),
+            self.measure_texture(object_name=colony_name, image_name=image_name),
+        ]
+        background_results = [
+            self.measure_areashape(background_name),
+            self.measure_intensity(object_name=f"{background_name}Padded", image_name=image_name),
+        ]
+        self.pipeline.end_run()
+        if self.status_validity is False:
+            log.warning(f"Could not measure the wells of {image_name}")
+            return results
+
+        colony_results = self._get_well_results(colony_results, origins)
+        background_results = self._get_well_results(background_results, origins)
+        for well_num, idx in enumerate(valid_idxs):
+            results[idx] = (colony_results[well_num + 1], background_results[well_num + 1])
+        return results
+
+    @staticmethod
+    def _get_well_results(module_results, origins):
+        """
+        Unpacks the per object measurements of the modules into a table with a column per well, in the coordinates
+        of each well
+        """
+        well_results = []
+        for results in module_results:
+            if isinstance(results, pd.Series):
+                results = results.to_frame()
+            results = results.copy()
+            results.columns = pd.RangeIndex(1, results.shape[1] + 1, name=OBJECT_NUMBER_LABEL)
+            well_results.append(results)
+        well_results = pd.concat(well_results, axis=0)
+
+        for metrics, origin in ((X_COORDINATE_METRICS, origins[:, 1]), (Y_COORDINATE_METRICS, origins[:, 0])):
+            metrics = well_results.index.intersection(metrics)
+            well_results.loc[metrics, :] = well_results.loc[metrics, :] - origin[np.newaxis, :]
+        return well_results
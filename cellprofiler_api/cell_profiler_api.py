@@ -1,4 +1,4 @@
-from ._cp_api_analysis import CellProfilerApiAnalysis
+from ._cp_api_plate import CellProfilerApiPlate
 
-class CellProfilerApi(CellProfilerApiAnalysis):
+class CellProfilerApi(CellProfilerApiPlate):
     pass
\ No newline at end of file
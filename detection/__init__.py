@@ -1,2 +1,10 @@
-from .blob_finder import BlobFinder
-from .clahe_boost import ClaheBoost
\ No newline at end of file
+from ..util._lazy import attach_lazy_exports
+
+# Exports are imported from their submodule on first access, so importing the package stays cheap
+_LAZY_EXPORTS = {
+    "BlobFinder": ".blob_finder",
+    "ClaheBoost": ".clahe_boost",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+__getattr__, __dir__ = attach_lazy_exports(__name__, _LAZY_EXPORTS)
@@ -1,6 +1,10 @@
 # ----- Imports -----
+import math
+import numpy as np
 import pandas as pd
 from skimage.feature import blob_dog, blob_log, blob_doh
+from skimage.transform import downscale_local_mean
+from skimage.util import img_as_float
 import os
 import logging
 
@@ -11,16 +15,27 @@ logging.basicConfig(format=f'[%(asctime)s|%(levelname)s|{os.path.basename(__file
 # ----- Pkg Relative Import -----
 from ..util import check_grayscale
 
+# ----- Global Constants -----
+BLOB_SEARCH_METHODS = ["log", "dog", "doh"]
+# Fits the plate lattice, so it is only available to finders that know the number of rows and columns of the plate
+LATTICE_SEARCH_METHOD = "lattice"
+
 
 # ------ Main Class Definition -----
 class BlobFinderBase:
     def __init__(self,
                  blob_search_method: str = "log",
                  min_sigma: int = 2, max_sigma: int = 40, num_sigma: int = 30,
-                 search_threshold: float = 0.01, max_overlap: float = 0.1
+                 search_threshold: float = 0.01, max_overlap: float = 0.1,
+                 pyramid_downsample: int = 1
                  ):
+        self._cache = {}
+        self._cache_version = 0
         self._table = pd.DataFrame({"Blank": []})
 
+        if blob_search_method == LATTICE_SEARCH_METHOD and LATTICE_SEARCH_METHOD not in self.blob_search_methods:
+            raise ValueError(f"The '{LATTICE_SEARCH_METHOD}' search requires the number of rows and columns of the "
+                             f"plate. {type(self).__name__} supports {self.blob_search_methods}")
         self.blob_search_method = blob_search_method
         self.min_sigma = min_sigma
         self.max_sigma = max_sigma
@@ -29,17 +44,59 @@ class BlobFinderBase:
         self.search_threshold = search_threshold
         self.max_overlap = max_overlap
 
+        # Factor the image is downsampled by for the coarse search. A factor of 1 searches the full resolution image
+        self.pyramid_downsample = pyramid_downsample
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Results derived from the table go stale when the table is replaced or a search parameter changes
+        if name == "_table" or not (name.startswith("_") or name.startswith("status")):
+            self._invalidate_cache()
+
+    @property
+    def blob_search_methods(self):
+        """
+        Blob search methods the finder supports
+        """
+        if hasattr(self, "_search_blobs_lattice"):
+            return BLOB_SEARCH_METHODS + [LATTICE_SEARCH_METHOD]
+        return list(BLOB_SEARCH_METHODS)
+
     @property
     def table(self):
         assert (self._table.empty is True) or len(self._table) != 0, "No blobs found in Image"
         return self._table.copy()
 
+    @property
+    def table_version(self):
+        """
+        Incremented every time the blob table or a search parameter changes. Results handed out by the class are
+        valid for a single version.
+        """
+        return self._cache_version
+
     def find_blobs(self, img):
         img = check_grayscale(img)
         self._search_blobs(img, method=self.blob_search_method)
 
+    def _invalidate_cache(self):
+        self._cache = {}
+        self._cache_version = getattr(self, "_cache_version", 0) + 1
+
+    def _get_cached(self, key, func):
+        """
+        Returns the result of func for the current table version, computing it only on the first call
+        """
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
     def _search_blobs(self, gray_img, method):
-        if method == "log":
+        if method == LATTICE_SEARCH_METHOD:
+            self._search_blobs_lattice(gray_img)
+        elif self.pyramid_downsample is not None and int(self.pyramid_downsample) > 1:
+            self._search_blobs_pyramid(gray_img, method)
+        elif method == "log":
             self._search_blobs_LoG(gray_img)
         elif method == "dog":
             self._search_blobs_DoG(gray_img)
@@ -48,6 +105,110 @@ class BlobFinderBase:
         else:
             self._search_blobs_LoG(gray_img)
 
+    def _get_blob_array(self, gray_img, method, min_sigma, max_sigma, num_sigma):
+        """
+        Runs the blob search of the given method and returns the raw (y, x, sigma) array
+        """
+        if method == "dog":
+            return blob_dog(
+                    image=gray_img,
+                    min_sigma=min_sigma,
+                    max_sigma=max_sigma,
+                    threshold=self.search_threshold,
+                    overlap=self.max_overlap
+            )
+        elif method == "doh":
+            return blob_doh(
+                    gray_img,
+                    min_sigma=min_sigma,
+                    max_sigma=max_sigma,
+                    num_sigma=num_sigma,
+                    threshold=self.search_threshold,
+                    overlap=self.max_overlap
+            )
+        else:
+            return blob_log(
+                    image=gray_img,
+                    min_sigma=min_sigma,
+                    max_sigma=max_sigma,
+                    num_sigma=num_sigma,
+                    threshold=self.search_threshold,
+                    overlap=self.max_overlap
+            )
+
+    def _refine_blobs_on_patches(self, gray_img, table, search_radius, num_sigma=5):
+        """
+        Re-runs the blob search on a small window around each blob of the table, keeping the candidate closest to the
+        original center. Blobs without a candidate within search_radius keep their original position.
+        :param gray_img: Image the blob search is run on
+        :param table: Table with the 'y', 'x', and 'sigma' columns of the blobs to refine
+        :param search_radius: Distance in pixels the window extends past three blob sigmas, the support of the
+                              blob response
+        :param num_sigma: Number of sigmas searched between half and one and a half times the blob sigma
+        :return: pd.DataFrame with the refined 'y', 'x', and 'sigma' columns, indexed like the table
+        """
+        refined = table.loc[:, ["y", "x", "sigma"]].to_numpy(dtype=float, copy=True)
+        for idx, (y, x, sigma) in enumerate(table.loc[:, ["y", "x", "sigma"]].to_numpy(dtype=float)):
+            half_width = int(math.ceil(sigma * 3 + search_radius))
+            y0 = max(int(round(y)) - half_width, 0)
+            y1 = min(int(round(y)) + half_width + 1, gray_img.shape[0])
+            x0 = max(int(round(x)) - half_width, 0)
+            x1 = min(int(round(x)) + half_width + 1, gray_img.shape[1])
+            if y1 <= y0 or x1 <= x0:
+                continue
+
+            candidates = self._get_blob_array(
+                    gray_img[y0:y1, x0:x1],
+                    method=self.blob_search_method,
+                    min_sigma=max(sigma * 0.5, 1),
+                    max_sigma=sigma * 1.5,
+                    num_sigma=num_sigma
+            )
+            if len(candidates) == 0:
+                continue
+            candidates[:, 0] += y0
+            candidates[:, 1] += x0
+            distance = np.hypot(candidates[:, 0] - y, candidates[:, 1] - x)
+            if distance.min() <= search_radius:
+                refined[idx] = candidates[np.argmin(distance)]
+
+        return pd.DataFrame(refined, columns=["y", "x", "sigma"], index=table.index)
+
+    def _search_blobs_pyramid(self, gray_img, method):
+        """
+        Coarse-to-fine blob search. Blobs are searched on an image downsampled by pyramid_downsample with a sigma range
+        scaled down by the same factor, then each candidate is re-centered on a full resolution patch.
+        """
+        log.debug(f"Starting pyramid blob search with a downsample factor of {self.pyramid_downsample}")
+        factor = int(self.pyramid_downsample)
+        # Scaled to [0, 1] like the full resolution search does, so the search_threshold means the same for both
+        small_img = downscale_local_mean(img_as_float(gray_img), (factor, factor))
+
+        min_sigma = max(self.min_sigma / factor, 1)
+        max_sigma = max(self.max_sigma / factor, min_sigma)
+        num_sigma = max(int(math.ceil(self.num_sigma / factor)), 3)
+        blobs = self._get_blob_array(
+                small_img,
+                method=method,
+                min_sigma=min_sigma,
+                max_sigma=max_sigma,
+                num_sigma=num_sigma
+        )
+        if len(blobs) == 0:
+            raise RuntimeError(
+                    f"No blobs found in image using the pyramid search with method '{method}'"
+            )
+
+        # Map the block centers back onto the full resolution image
+        coarse = pd.DataFrame(blobs, columns=['y', 'x', 'sigma'])
+        coarse.loc[:, ['y', 'x']] = coarse.loc[:, ['y', 'x']] * factor + (factor - 1) / 2
+        coarse.loc[:, 'sigma'] = coarse.loc[:, 'sigma'] * factor
+
+        refined = self._refine_blobs_on_patches(gray_img, coarse, search_radius=2 * factor, num_sigma=3)
+        # Neighbouring candidates can converge onto the same blob during refinement
+        refined = refined.loc[~refined.round(0).duplicated(subset=['y', 'x']), :]
+        self._table = refined.reset_index(drop=True)
+
     def _search_blobs_LoG(self, gray_img):
         log.debug("Starting blob search using 'Laplacian of Gaussian'")
 
@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import warnings
 
 from ._blob_finder_particle_filter import BlobFinderParticleFilter
 from ..util import check_grayscale
@@ -27,18 +26,20 @@ class BlobFinderBinMSEFilter(BlobFinderParticleFilter):
                 max_sigma=kwargs.get("max_sigma", 40),
                 num_sigma=kwargs.get("num_sigma", 45),
                 search_threshold=kwargs.get("search_threshold", 0.01),
+                max_overlap=kwargs.get("max_overlap", 0.1),
+                pyramid_downsample=kwargs.get("pyramid_downsample", 1),
 
         )
         self.bin_filter_method = bin_filter_method
-        self.__status_initial_mse = False
-        self.__status_update_mse = False
         self._calculate_bin_mse()
 
     @property
     def table(self):
-        self._calculate_bin_mse()
-        min_mse_bin_idx = self._table.groupby("bin_set", as_index=True)[f"{self.bin_filter_method}"].idxmin()
-        return self._table.loc[min_mse_bin_idx, :]
+        """
+        Blob table filtered down to the blob with the lowest error in each bin. The table is computed once per
+        detection and handed out as a copy, so changes to the returned table never reach the cache.
+        """
+        return self._get_cached("table", self._get_filtered_table).copy(deep=True)
 
     @property
     def mse(self):
@@ -47,93 +48,76 @@ class BlobFinderBinMSEFilter(BlobFinderParticleFilter):
         return err
 
     def find_blobs(self, img):
-        self.__status_initial_mse = False
-        self.__status_update_mse = False
         img = check_grayscale(img)
         super().find_blobs(img)
         self._calculate_bin_mse()
 
-    def _calculate_bin_mse(self):
-        if (
-                self.__status_initial_mse is False
-                or
-                self.__status_update_mse is False
-        ):
+    def _get_filtered_table(self):
+        if "mse" not in self._table.columns:
+            self._calculate_bin_mse()
+        min_mse_bin_idx = self._table.groupby("bin_set", as_index=True)[f"{self.bin_filter_method}"].idxmin()
+        return self._table.loc[min_mse_bin_idx, :]
 
-            row_mse = {}
-            col_mse = {}
-            mse = {}
-            for idx in range(self._table.shape[0]):
-                blob = self._table.iloc[idx, :]
-                other_row_members = self._table[
-                    self._table.loc[:, "row_num"] == blob["row_num"]
-                    ]
-                other_row_members = other_row_members[
-                    other_row_members["bin_set"] != blob["bin_set"]
-                    ]
-                row_x = np.array(
-                        [blob["x"]] + other_row_members["x"].to_list()
-                )
-                row_y = np.array(
-                        [blob["y"]] + other_row_members["y"].to_list()
-                )
-                row_mse[blob.name] = self._get_linreg_mse(row_x, row_y)
-                row_residuals = self._get_linreg_residuals(row_x, row_y)
+    def _calculate_bin_mse(self):
+        row_mse, col_mse, mse = self._get_bin_mse(self._table)
+        self._table = pd.concat(
+                [self._table.drop(columns=["row_mse", "col_mse", "mse"], errors="ignore"), row_mse, col_mse, mse],
+                axis=1
+        )
 
-                other_col_members = self._table[
-                    self._table.loc[:, "col_num"] == blob["col_num"]
-                    ]
-                other_col_members = other_col_members[
-                    other_col_members["bin_set"] != blob["bin_set"]
-                    ]
-                col_x = np.array(
-                        [blob["x"]] + other_col_members["x"].to_list()
-                )
-                col_y = np.array(
-                        [blob["y"]] + other_col_members["y"].to_list()
-                )
-                col_mse[blob.name] = self._get_linreg_mse(col_y, col_x)
-                col_residuals = self._get_linreg_residuals(col_y, col_x)
+    @classmethod
+    def _get_bin_mse(cls, table):
+        """
+        Scores every blob against the other bins of its row and column. For each blob, a line is fit through the blob
+        and the members of its row (or column) that are not in the blob's own bin. The fits for all blobs are solved at
+        once from grouped sums of x, y, xy, x^2 and y^2, instead of refitting each blob with np.polyfit.
+        :param table: Blob table containing the x, y, row_num, col_num, and bin_set columns
+        :return: (row_mse, col_mse, mse) as pd.Series indexed like the table
+        """
+        if table.empty or not {"x", "y", "row_num", "col_num", "bin_set"}.issubset(table.columns):
+            return (
+                pd.Series(dtype=float, name="row_mse"),
+                pd.Series(dtype=float, name="col_mse"),
+                pd.Series(dtype=float, name="mse")
+            )
+        row_sse, row_n = cls._get_leave_bin_out_sse(table, group_label="row_num", x_label="x", y_label="y")
+        col_sse, col_n = cls._get_leave_bin_out_sse(table, group_label="col_num", x_label="y", y_label="x")
 
-                residuals = np.concatenate(
-                        [row_residuals, col_residuals]
-                )
-                mse[blob.name] = np.sum(residuals ** 2) / len(residuals)
-            row_mse = pd.Series(row_mse, name="row_mse")
-            col_mse = pd.Series(col_mse, name="col_mse")
-            mse = pd.Series(mse, name="mse")
-            if (
-                    all(
-                            label in self._table.columns
-                            for label in
-                            ["row_mse", "col_mse", "mse"]
-                    )
-                    and
-                    self.__status_initial_mse is True
-            ):
-                self._table.loc[:, "row_mse"] = row_mse
-                self._table.loc[:, "col_mse"] = col_mse
-                self._table.loc[:, "mse"] = mse
-                self.__status_update_mse = True
-            else:
-                self._table = pd.concat(
-                        [self._table, row_mse, col_mse, mse],
-                        axis=1
-                )
-                self.__status_initial_mse = True
+        row_mse = pd.Series(row_sse / row_n, index=table.index, name="row_mse")
+        col_mse = pd.Series(col_sse / col_n, index=table.index, name="col_mse")
+        mse = pd.Series((row_sse + col_sse) / (row_n + col_n), index=table.index, name="mse")
+        return row_mse, col_mse, mse
 
     @staticmethod
-    def _get_linreg_residuals(x, y):
-        warnings.simplefilter('ignore', np.RankWarning)
-        m, b = np.polyfit(x, y, 1)
-        y_pred = m * x + b
-        error = y - y_pred
-        return error
+    def _get_leave_bin_out_sse(table, group_label, x_label, y_label):
+        """
+        Sum of squared residuals of the least-squares line y = m*x + b fit through each blob and the members of its group
+        outside of the blob's bin.
+        :return: (sse, n) as np.ndarrays aligned with the table rows
+        """
+        x = table[x_label].to_numpy(dtype=float)
+        y = table[y_label].to_numpy(dtype=float)
+        stats = pd.DataFrame({
+            "n": np.ones_like(x),
+            "x": x,
+            "y": y,
+            "xx": x * x,
+            "xy": x * y,
+            "yy": y * y
+        }, index=table.index)
 
-    @staticmethod
-    def _get_linreg_mse(x, y):
-        warnings.simplefilter('ignore', np.RankWarning)
-        m, b = np.polyfit(x, y, 1)
-        y_pred = m * x + b
-        error = np.sum((y - y_pred) ** 2) / len(y)
-        return error
+        group_sums = stats.groupby(table[group_label], observed=True).transform("sum")
+        bin_sums = stats.groupby([table[group_label], table["bin_set"]], observed=True).transform("sum")
+        # Group members outside of the blob's bin, plus the blob itself
+        sums = (group_sums - bin_sums + stats).to_numpy()
+        n, sum_x, sum_y, sum_xx, sum_xy, sum_yy = sums.T
+
+        ss_xx = sum_xx - sum_x ** 2 / n
+        ss_xy = sum_xy - sum_x * sum_y / n
+        ss_yy = sum_yy - sum_y ** 2 / n
+
+        # When all x are equal the fit is rank deficient and np.polyfit returns the horizontal line through mean(y)
+        degenerate = ss_xx <= 1e-12 * np.maximum(sum_xx, 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sse = np.where(degenerate, ss_yy, ss_yy - ss_xy ** 2 / ss_xx)
+        return np.clip(sse, 0, None), n
@@ -20,6 +20,7 @@ class BlobFinderParticleFilter(BlobFinderTable):
                  blob_search_method: str = "log",
                  min_sigma: int = 4, max_sigma: int = 40, num_sigma: int = 45,
                  search_threshold: float = 0.01, max_overlap: float = 0.1,
+                 pyramid_downsample: int = 1
                  ):
         self.min_area = min_area if min_area > 0 else 0
         self.border_filter = border_filter
@@ -34,7 +35,8 @@ class BlobFinderParticleFilter(BlobFinderTable):
                          max_sigma=max_sigma,
                          num_sigma=num_sigma,
                          search_threshold=search_threshold,
-                         max_overlap=max_overlap
+                         max_overlap=max_overlap,
+                         pyramid_downsample=pyramid_downsample
                          )
 
     def find_blobs(self, img):
@@ -46,14 +48,19 @@ class BlobFinderParticleFilter(BlobFinderTable):
         self.generate_table()
 
     def _search_blobs(self, gray_img, method):
-        if self.filter_threshold_method is None:
-            pass
-        else:
-            gray_img = self._filter_by_threshold(gray_img, self.filter_threshold_method)
-            gray_img = self._filter_by_white_tophat(gray_img, shape=self.tophat_shape, radius=self.tophat_radius)
-
+        gray_img = self._preprocess_img(gray_img)
         super()._search_blobs(gray_img=gray_img, method=method)
 
+    def _preprocess_img(self, gray_img):
+        """
+        Applies the threshold and white tophat filters the blob search is run on
+        """
+        if self.filter_threshold_method is None:
+            return gray_img
+        gray_img = self._filter_by_threshold(gray_img, self.filter_threshold_method)
+        gray_img = self._filter_by_white_tophat(gray_img, shape=self.tophat_shape, radius=self.tophat_radius)
+        return gray_img
+
     def _find_circle_info(self):
         self._table['radius'] = self._table['sigma'] * math.sqrt(2)
         self._table.drop(columns='sigma')
@@ -64,7 +71,8 @@ class BlobFinderParticleFilter(BlobFinderTable):
             self._table = self._table.reset_index(drop=False).rename(columns={
                 "index": "id"
             })
-        self._table = self._table.loc[:, ["id", 'x', 'y', 'sigma', 'radius', 'area']].reset_index(drop=True)
+        self._table = self._table.loc[:, ["id", 'x', 'y', 'sigma', 'radius', 'area'] + self._lattice_columns]\
+            .reset_index(drop=True)
 
     @staticmethod
     def _filter_by_threshold(gray_img, threshold_method):
@@ -1,6 +1,15 @@
 # ----- Imports -----
+import numpy as np
 import pandas as pd
 import math
+from scipy.ndimage import gaussian_filter1d
+from skimage.filters import threshold_otsu
+import os
+import logging
+
+logger_name = "phenomics-normalization"
+log = logging.getLogger(logger_name)
+logging.basicConfig(format=f'[%(asctime)s|%(levelname)s|{os.path.basename(__file__)}] %(message)s')
 
 # ----- Pkg Relative Imports -----
 from ._blob_finder_base import BlobFinderBase
@@ -11,14 +20,20 @@ class BlobFinderTable(BlobFinderBase):
     def __init__(self, n_rows: int = 8, n_cols: int = 12,
                  blob_search_method: str = "log",
                  min_sigma: int = 2, max_sigma: int = 35, num_sigma: int = 45,
-                 search_threshold: float = 0.01, max_overlap: float = 0.1
+                 search_threshold: float = 0.01, max_overlap: float = 0.1,
+                 pyramid_downsample: int = 1
                  ):
         self.n_rows = n_rows
         self.n_cols = n_cols
 
+        # Set by the 'lattice' search. Rotation is the angle of the plate rows in degrees, pitch the (row, col) spacing
+        self.lattice_rotation = None
+        self.lattice_pitch = None
+
         super().__init__(blob_search_method=blob_search_method,
                          min_sigma=min_sigma, max_sigma=max_sigma, num_sigma=num_sigma,
-                         search_threshold=search_threshold, max_overlap=max_overlap)
+                         search_threshold=search_threshold, max_overlap=max_overlap,
+                         pyramid_downsample=pyramid_downsample)
 
     @property
     def row_idx(self):
@@ -30,36 +45,224 @@ class BlobFinderTable(BlobFinderBase):
 
     @property
     def rows(self):
-        rows = []
-        for i in self.row_idx:
-            rows.append(
-                    self.table.loc[
-                    lambda row: row["row_num"] == i, :
-                    ]
-            )
-        return rows
+        """
+        Blobs of the table split by row. The partition is computed once per table version and handed out as copies, so
+        changes to the returned frames never reach the cache.
+        :return: List of pd.DataFrame ordered by row_num
+        """
+        rows = self._get_cached("rows", lambda: self._partition_table("row_num", self.row_idx))
+        return [row.copy(deep=True) for row in rows]
 
     @property
     def cols(self):
-        cols = []
-        for i in self.col_idx:
-            cols.append(
-                    self.table.loc[
-                    lambda row: row["col_num"] == i, :
-                    ]
-            )
-        return cols
+        """
+        Blobs of the table split by column. The partition is computed once per table version and handed out as copies,
+        so changes to the returned frames never reach the cache.
+        :return: List of pd.DataFrame ordered by col_num
+        """
+        cols = self._get_cached("cols", lambda: self._partition_table("col_num", self.col_idx))
+        return [col.copy(deep=True) for col in cols]
 
     def find_blobs(self, img):
         super().find_blobs(img)
         self.generate_table()
         return self.table
 
+    def estimate_rotation(self, inlier_tolerance=None):
+        """
+        Robust estimate of the plate rotation from all rows and columns of the blob table at once. Every pair of blobs
+        in the same row votes for the angle of the rows, and so does every pair in the same column after turning it by
+        90 degrees. The estimate is the median of the votes weighted by the distance between the blobs (a weighted
+        Theil-Sen estimator), so a few misplaced blobs can't tilt it.
+        :param inlier_tolerance: See get_rotation_confidence()
+        :return: (degree_of_rotation, confidence). The sign follows the slope of the rows in image coordinates.
+        """
+        table = self.table
+        x = table["x"].to_numpy(dtype=float)
+        y = table["y"].to_numpy(dtype=float)
+        row_num = table["row_num"].astype(int).to_numpy()
+        col_num = table["col_num"].astype(int).to_numpy()
+
+        first, second = np.triu_indices(len(table), k=1)
+        dx = x[second] - x[first]
+        dy = y[second] - y[first]
+        same_row = (row_num[first] == row_num[second]) & (dx != 0)
+        same_col = (col_num[first] == col_num[second]) & (dy != 0)
+        if np.count_nonzero(same_row) + np.count_nonzero(same_col) == 0:
+            raise RuntimeError("Not enough blobs sharing a row or column to estimate the plate rotation")
+
+        angles = np.concatenate([
+            np.arctan(dy[same_row] / dx[same_row]),
+            np.arctan(-dx[same_col] / dy[same_col])
+        ])
+        weights = np.concatenate([np.hypot(dx[same_row], dy[same_row]), np.hypot(dx[same_col], dy[same_col])])
+        order = np.argsort(angles)
+        cumulative_weights = np.cumsum(weights[order])
+        median_idx = np.searchsorted(cumulative_weights, cumulative_weights[-1] / 2)
+        degree_of_rotation = math.degrees(angles[order][median_idx])
+        return degree_of_rotation, self.get_rotation_confidence(degree_of_rotation, inlier_tolerance)
+
+    def get_rotation_confidence(self, degree_of_rotation, inlier_tolerance=None):
+        """
+        Fraction of the blobs lying on the lattice lines of the given rotation. Each row and column line goes through
+        the median offset of its blobs, and a blob is an inlier if it is within inlier_tolerance of both of its lines.
+        :param degree_of_rotation: Angle of the plate rows in degrees
+        :param inlier_tolerance: Distance in pixels. Defaults to a quarter of the median blob radius.
+        :return: float between 0 and 1
+        """
+        table = self.table
+        if len(table) == 0:
+            return 0.0
+        if inlier_tolerance is None:
+            inlier_tolerance = 0.25 * table["radius"].median()
+        slope = math.tan(math.radians(degree_of_rotation))
+        row_offset = table["y"] - slope * table["x"]
+        col_offset = table["x"] + slope * table["y"]
+        # The offsets are measured along the axes, so they are scaled back to distances from the lines
+        scale = math.cos(math.radians(degree_of_rotation))
+        row_residual = (row_offset - row_offset.groupby(table["row_num"], observed=True).transform("median")).abs()
+        col_residual = (col_offset - col_offset.groupby(table["col_num"], observed=True).transform("median")).abs()
+        inliers = (row_residual * scale <= inlier_tolerance) & (col_residual * scale <= inlier_tolerance)
+        return float(inliers.mean())
+
     def generate_table(self):
         assert self._table is not None or len(self._table) != 0, "No blobs found in Image"
         self._find_circle_info()
         self._cell_bounds_search()
         self._generate_bins()
+        self._invalidate_cache()
+
+    def _search_blobs_lattice(self, gray_img, max_rotation=10):
+        """
+        Fits the rotation, pitch, and offset of the n_rows x n_cols plate lattice to the foreground of the image and
+        places one blob on each grid position. Each blob is centered on the foreground of its grid cell and its sigma is
+        taken from the foreground area, so empty positions keep the grid point and get a sigma of zero.
+        :param gray_img: Image the blob search is run on. Non-boolean images are thresholded with Otsu's method
+        :param max_rotation: Largest plate rotation in degrees that is searched for
+        """
+        log.debug("Starting blob search using the plate lattice")
+        if gray_img.dtype == bool:
+            mask = gray_img
+        else:
+            mask = gray_img > threshold_otsu(gray_img)
+        ys, xs = np.nonzero(mask)
+        if len(ys) == 0:
+            raise RuntimeError(
+                    "No blobs found in image using 'lattice'"
+            )
+
+        # The angle only depends on the sharpness of the projections, so a subsample of the foreground is enough
+        step = max(len(ys) // 200000, 1)
+        self.lattice_rotation = self._fit_lattice_rotation(xs[::step], ys[::step], max_rotation)
+        rad = math.radians(self.lattice_rotation)
+        col_coords = xs * math.cos(rad) + ys * math.sin(rad)
+        row_coords = ys * math.cos(rad) - xs * math.sin(rad)
+
+        row_pitch, row_offset = self._fit_lattice_axis(row_coords, self.n_rows)
+        col_pitch, col_offset = self._fit_lattice_axis(col_coords, self.n_cols)
+        self.lattice_pitch = (row_pitch, col_pitch)
+
+        # Foreground area and centroid of each grid cell
+        row_num = np.rint((row_coords - row_offset) / row_pitch).astype(int)
+        col_num = np.rint((col_coords - col_offset) / col_pitch).astype(int)
+        in_grid = (row_num >= 0) & (row_num < self.n_rows) & (col_num >= 0) & (col_num < self.n_cols)
+        cell = row_num[in_grid] * self.n_cols + col_num[in_grid]
+        n_cells = self.n_rows * self.n_cols
+        area = np.bincount(cell, minlength=n_cells).astype(float)
+        sum_y = np.bincount(cell, weights=ys[in_grid], minlength=n_cells)
+        sum_x = np.bincount(cell, weights=xs[in_grid], minlength=n_cells)
+
+        # Empty cells keep the position of the grid point
+        grid_rows, grid_cols = np.meshgrid(self.row_idx, self.col_idx, indexing="ij")
+        v = row_offset + grid_rows.ravel() * row_pitch
+        u = col_offset + grid_cols.ravel() * col_pitch
+        grid_y = u * math.sin(rad) + v * math.cos(rad)
+        grid_x = u * math.cos(rad) - v * math.sin(rad)
+        filled = area > 0
+        self._table = pd.DataFrame({
+            'y': np.where(filled, sum_y / np.maximum(area, 1), grid_y),
+            'x': np.where(filled, sum_x / np.maximum(area, 1), grid_x),
+            'sigma': np.sqrt(area / math.pi) / math.sqrt(2),
+            'lattice_row': grid_rows.ravel(),
+            'lattice_col': grid_cols.ravel()
+        })
+
+    @staticmethod
+    def _fit_lattice_rotation(xs, ys, max_rotation, coarse_step=0.25, fine_step=0.01):
+        """
+        Finds the rotation in degrees that makes the row and column projections of the foreground the sharpest. The
+        sign follows the slope of the rows in image coordinates, matching PlateAlignment.degree_of_rotation.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+
+        def projection_sharpness(degree):
+            rad = math.radians(degree)
+            sharpness = 0.0
+            for coords in (ys * math.cos(rad) - xs * math.sin(rad), xs * math.cos(rad) + ys * math.sin(rad)):
+                counts = np.bincount((coords - coords.min()).astype(int)).astype(float)
+                sharpness += np.sum(counts ** 2)
+            return sharpness
+
+        degrees = np.arange(-max_rotation, max_rotation + coarse_step / 2, coarse_step)
+        best = degrees[np.argmax([projection_sharpness(d) for d in degrees])]
+        degrees = np.arange(best - coarse_step, best + coarse_step + fine_step / 2, fine_step)
+        return float(degrees[np.argmax([projection_sharpness(d) for d in degrees])])
+
+    @staticmethod
+    def _fit_lattice_axis(coords, n, n_pitches=201):
+        """
+        Fits the pitch and offset of n evenly spaced foreground peaks along one axis. The pitch is estimated from the
+        autocorrelation of the projection profile, then pitch and offset are refined together by maximizing the
+        profile under a comb of n teeth.
+        :return: (pitch, offset) where offset is the coordinate of the first peak
+        """
+        origin = math.floor(coords.min())
+        profile = np.bincount((coords - origin).astype(int)).astype(float)
+        cumulative = np.cumsum(profile) / profile.sum()
+        start = int(np.searchsorted(cumulative, 0.005))
+        end = int(np.searchsorted(cumulative, 0.995))
+        extent = end - start + 1
+        if n == 1:
+            return float(extent), float(np.average(np.arange(len(profile)) + 0.5, weights=profile) + origin)
+
+        centered = profile - profile.mean()
+        spectrum = np.fft.rfft(centered, 2 * len(centered))
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:len(centered)]
+        min_lag = max(int(0.5 * extent / n), 1)
+        max_lag = max(min(int(1.1 * extent / (n - 1)) + 1, len(centered) - 1), min_lag + 1)
+        pitch = min_lag + int(np.argmax(autocorr[min_lag:max_lag + 1]))
+
+        smooth = gaussian_filter1d(profile, sigma=max(pitch / 6, 1))
+        positions = np.arange(len(smooth))
+        offsets = np.arange(len(smooth), dtype=float)
+        teeth = np.arange(n)
+        best_score, best_pitch, best_offset = -np.inf, float(pitch), 0.0
+        for candidate in np.linspace(0.9 * pitch, 1.1 * pitch, n_pitches):
+            score = np.interp(offsets[:, None] + candidate * teeth, positions, smooth, left=0, right=0).sum(axis=1)
+            idx = int(np.argmax(score))
+            if score[idx] > best_score:
+                # Parabolic interpolation of the offset between neighbouring pixels
+                shift = 0.0
+                if 0 < idx < len(score) - 1:
+                    denom = score[idx - 1] - 2 * score[idx] + score[idx + 1]
+                    if denom < 0:
+                        shift = 0.5 * (score[idx - 1] - score[idx + 1]) / denom
+                best_score, best_pitch, best_offset = score[idx], float(candidate), offsets[idx] + shift
+        # Bins start at origin, so their centers are half a pixel further
+        return best_pitch, best_offset + origin + 0.5
+
+    @property
+    def _lattice_columns(self):
+        """
+        Grid position columns set by the 'lattice' search, kept through the table updates
+        """
+        return [col for col in ["lattice_row", "lattice_col"] if col in self._table.columns]
+
+    def _partition_table(self, bin_label, bin_idx):
+        table = self.table
+        partitions = dict(tuple(table.groupby(bin_label, observed=True)))
+        return [partitions.get(i, table.iloc[0:0]) for i in bin_idx]
 
     def _find_circle_info(self):
         self._table['radius'] = self._table['sigma'] * math.sqrt(2)
@@ -69,7 +272,8 @@ class BlobFinderTable(BlobFinderBase):
             self._table = self._table.reset_index(drop=False).rename(columns={
                 "index": "id"
             })
-        self._table = self._table[["id", 'x', 'y', 'sigma', 'radius', 'area']].reset_index(drop=True)
+        self._table = self._table[["id", 'x', 'y', 'sigma', 'radius', 'area'] + self._lattice_columns]\
+            .reset_index(drop=True)
 
     def _cell_bounds_search(self):
         self._table['x_minus'] = self._table.x - self._table.radius
@@ -78,6 +282,17 @@ class BlobFinderTable(BlobFinderBase):
         self._table['y_plus'] = self._table.y + self._table.radius
 
     def _generate_bins(self):
+        if len(self._lattice_columns) == 2:
+            # Blobs from the lattice search already know their grid position
+            self._table.loc[:, 'row_num'] = pd.Categorical(self._table['lattice_row'], categories=self.row_idx)
+            self._table.loc[:, 'col_num'] = pd.Categorical(self._table['lattice_col'], categories=self.col_idx)
+        else:
+            self._generate_cut_bins()
+        self._table['bin_set'] = "row" + self._table["row_num"].astype(str) \
+                                 + "_" \
+                                 + "col" + self._table["col_num"].astype(str)
+
+    def _generate_cut_bins(self):
         self._table.loc[:, 'row_num'] = pd.cut(
                 self._table['y'],
                 bins=self.n_rows,
@@ -88,6 +303,3 @@ class BlobFinderTable(BlobFinderBase):
                 bins=self.n_cols,
                 labels=self.col_idx
         )
-        self._table['bin_set'] = "row" + self._table["row_num"].astype(str) \
-                                 + "_" \
-                                 + "col" + self._table["col_num"].astype(str)
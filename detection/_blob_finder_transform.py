@@ -0,0 +1,59 @@
+# ----- Imports -----
+import math
+import numpy as np
+
+# ----- Pkg Relative Import -----
+from ._blob_finder_bin_mse_filter import BlobFinderBinMSEFilter
+from ..util import check_grayscale
+
+
+# ----- Main Class Definition -----
+class BlobFinderTransform(BlobFinderBinMSEFilter):
+    def transform_blobs(self, matrix, img_shape, border_filter=None):
+        """
+        Carries the blobs of the last search through an affine transform of the searched image (e.g. a rotation or a
+        crop) instead of searching the transformed image again.
+        :param matrix: 3x3 affine matrix mapping (x, y, 1) coordinates of the searched image onto the transformed image
+        :param img_shape: Shape of the transformed image
+        :param border_filter: Blobs closer than this to the edge of the transformed image are dropped.
+            Defaults to the border_filter of the blob search.
+        :return: self.table
+        """
+        if border_filter is None:
+            border_filter = self.border_filter
+        matrix = np.asarray(matrix, dtype=float)
+
+        coords = self._table.loc[:, ["x", "y"]].to_numpy(dtype=float)
+        coords = coords @ matrix[:2, :2].T + matrix[:2, 2]
+        self._table = self._table.assign(
+                x=coords[:, 0],
+                y=coords[:, 1],
+                sigma=self._table["sigma"] * math.sqrt(abs(np.linalg.det(matrix[:2, :2])))
+        )
+
+        self.generate_table()
+        self._filter_by_border(img_shape, border_filter)
+        self.generate_table()
+        self._calculate_bin_mse()
+        return self.table
+
+    def refine_blobs(self, img, search_radius=None):
+        """
+        Re-centers each blob with a blob search restricted to a small window around it. This is a cheap replacement
+        for searching the whole image again after transform_blobs().
+        :param img: Image the predicted blobs lie in
+        :param search_radius: Distance in pixels a blob can move. Defaults to the tophat radius.
+        :return: self.table
+        """
+        if search_radius is None:
+            search_radius = self.tophat_radius
+        gray_img = self._preprocess_img(check_grayscale(img))
+
+        refined = self._refine_blobs_on_patches(gray_img, self._table, search_radius)
+        self._table = self._table.assign(y=refined["y"], x=refined["x"], sigma=refined["sigma"])
+
+        self.generate_table()
+        self._filter_by_size(self.min_area)
+        self.generate_table()
+        self._calculate_bin_mse()
+        return self.table
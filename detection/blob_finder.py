@@ -1,5 +1,5 @@
-from ._blob_finder_bin_mse_filter import BlobFinderBinMSEFilter
+from ._blob_finder_transform import BlobFinderTransform
 
 
-class BlobFinder(BlobFinderBinMSEFilter):
+class BlobFinder(BlobFinderTransform):
     pass
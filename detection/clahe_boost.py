@@ -1,24 +1,76 @@
+import weakref
+from functools import lru_cache
+
+import numpy as np
+from scipy.ndimage import minimum_filter, maximum_filter
 from skimage.color import rgb2gray
 from skimage.exposure import equalize_adapthist
 from skimage.morphology import white_tophat, disk, square
-from skimage.util import img_as_ubyte
+from skimage.util import img_as_ubyte, img_as_uint
 
 from ..util import check_grayscale
 
+# rgb2gray luminance weights in 16.16 fixed point, scaled so that white maps to 65535
+_GRAY_WEIGHTS = (3579085, 12049305, 1214362)
+
+
+@lru_cache(maxsize=None)
+def _get_footprint(footprint_shape, footprint_radius):
+    if footprint_shape == "square":
+        footprint = square(footprint_radius * 2)
+    else:
+        footprint = disk(footprint_radius)
+    # Shared between instances, so it must not be modified
+    footprint.setflags(write=False)
+    return footprint
+
+
+@lru_cache(maxsize=None)
+def _get_footprint_rectangles(footprint_shape, footprint_radius):
+    """
+    Decomposes the footprint into the union of the centered rectangles spanned by its corners. An erosion (dilation)
+    by the footprint equals the minimum (maximum) of the separable erosions (dilations) by each rectangle.
+    :return: Tuple of (height, width) rectangle sizes, or None if the footprint can't be decomposed this way
+    """
+    footprint = _get_footprint(footprint_shape, footprint_radius)
+    if footprint.all() or footprint.shape[0] % 2 == 0 or footprint.shape[1] % 2 == 0:
+        return None
+    if not (np.array_equal(footprint, footprint[::-1, :]) and np.array_equal(footprint, footprint[:, ::-1])):
+        return None
+
+    center_y, center_x = footprint.shape[0] // 2, footprint.shape[1] // 2
+    half_widths = [int(np.count_nonzero(footprint[center_y + dy, center_x:])) - 1
+                   for dy in range(footprint.shape[0] - center_y)]
+    rectangles = []
+    for dy, half_width in enumerate(half_widths):
+        # Only rectangles whose corner is not covered by the next row are needed
+        if half_width >= 0 and (dy == len(half_widths) - 1 or half_widths[dy + 1] < half_width):
+            rectangles.append((2 * dy + 1, 2 * half_width + 1))
+
+    # The union of the rectangles must reproduce the footprint exactly
+    union = np.zeros_like(footprint, dtype=bool)
+    for height, width in rectangles:
+        union[center_y - height // 2:center_y + height // 2 + 1, center_x - width // 2:center_x + width // 2 + 1] = True
+    if not np.array_equal(union, footprint.astype(bool)):
+        return None
+    return tuple(rectangles)
+
+
 class ClaheBoost:
     """
     Takes an image as input and returns a grayscale version of the image
     boosted to improve feature detection and segmentation.
+
+    An instance can be reused as an engine through boost(img). The footprint is built once per shape and radius, the
+    image is kept as uint16/uint8 outside of the CLAHE itself, and the result for the last source array is cached.
     """
-    def __init__(self, img, footprint_shape="disk",
+    def __init__(self, img=None, footprint_shape="disk",
                  footprint_radius=15,
                  kernel_size=96):
-        self.img = check_grayscale(img)
+        self.input_img = img
 
-        if footprint_shape == "square":
-            self.footprint = square(footprint_radius*2)
-        elif footprint_shape == "disk":
-            self.footprint = disk(footprint_radius)
+        self.footprint_shape = footprint_shape
+        self.footprint = _get_footprint(footprint_shape, footprint_radius)
         self.kernel_size = kernel_size
         self.footprint_radius = footprint_radius
         self.boosted_img = None
@@ -29,25 +81,80 @@ class ClaheBoost:
         self.status_clahe = False
         self.status_white_tophat = False
 
+        self._cached_source = None
+        self._cached_result = None
+
+    @property
+    def img(self):
+        return check_grayscale(self.input_img)
+
     def get_boosted_img(self):
-        self._clahe()
-        self._white_tophat()
-        return img_as_ubyte(self.img)
-
-    def _clahe(self):
-        if self.status_clahe is False and self.use_clahe is True:
-            self.img = equalize_adapthist(image=self.img,
-                                          kernel_size=self.kernel_size
-                                          )
+        if self.input_img is None:
+            raise ValueError("No image was given to ClaheBoost. Use boost(img) to boost an image with this instance")
+        self.boosted_img = self.boost(self.input_img)
+        return self.boosted_img
+
+    def boost(self, img):
+        """
+        Boosts the image. The result is cached for the last source array, so boosting the same array again is free.
+        :param img: RGB or grayscale image
+        :return: Read-only uint8 grayscale image
+        """
+        if self._cached_source is not None and self._cached_source() is img:
+            return self._cached_result
+
+        boosted_img = self._get_gray_img(img)
+        if self.use_clahe is True:
+            boosted_img = img_as_ubyte(equalize_adapthist(image=boosted_img,
+                                                          kernel_size=self.kernel_size
+                                                          ))
             self.status_clahe = True
         else:
-            pass
+            boosted_img = img_as_ubyte(boosted_img)
 
-    def _white_tophat(self):
-        if self.status_white_tophat is False and self.use_white_tophat is True:
-            tophat_result = white_tophat(image=self.img,
-                                         footprint=self.footprint)
-            self.img = self.img - tophat_result
+        if self.use_white_tophat is True:
+            # The opening never exceeds the image, so the unsigned subtraction can't wrap around
+            boosted_img = boosted_img - self._white_tophat(boosted_img)
             self.status_white_tophat = True
+
+        boosted_img.setflags(write=False)
+        try:
+            self._cached_source = weakref.ref(img)
+            self._cached_result = boosted_img
+        except TypeError:
+            self._cached_source = self._cached_result = None
+        return boosted_img
+
+    @staticmethod
+    def _get_gray_img(img):
+        """
+        Converts the image to an integer grayscale image. RGB and float images become uint16, since quantizing the
+        grayscale image to 8 bits before the CLAHE visibly changes its result.
+        """
+        img = np.asarray(img)
+        if img.ndim == 3 and img.dtype == np.uint8:
+            gray_img = np.full(img.shape[:2], 1 << 15, dtype=np.uint32)
+            for channel, weight in enumerate(_GRAY_WEIGHTS):
+                gray_img += img[..., channel].astype(np.uint32) * np.uint32(weight)
+            return (gray_img >> 16).astype(np.uint16)
+        elif img.ndim == 3:
+            return img_as_uint(rgb2gray(img))
+        elif img.ndim == 2 and img.dtype in (np.uint8, np.uint16):
+            return img
+        elif img.ndim == 2:
+            return img_as_uint(img)
         else:
-            pass
+            raise ValueError('Image must be grayscale or RGB')
+
+    def _white_tophat(self, gray_img):
+        rectangles = _get_footprint_rectangles(self.footprint_shape, self.footprint_radius)
+        if rectangles is None:
+            return white_tophat(image=gray_img, footprint=self.footprint)
+
+        eroded = minimum_filter(gray_img, size=rectangles[0])
+        for size in rectangles[1:]:
+            np.minimum(eroded, minimum_filter(gray_img, size=size), out=eroded)
+        opened = maximum_filter(eroded, size=rectangles[0])
+        for size in rectangles[1:]:
+            np.maximum(opened, maximum_filter(eroded, size=size), out=opened)
+        return gray_img - opened
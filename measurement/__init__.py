@@ -0,0 +1,16 @@
+from ..util._lazy import attach_lazy_exports
+
+# Exports are imported from their submodule on first access, so importing the package stays cheap
+_LAZY_EXPORTS = {
+    "measure_areashape": "._areashape",
+    "AREASHAPE_FEATURES": "._areashape",
+    "measure_intensity": "._intensity",
+    "INTENSITY_FEATURES": "._intensity",
+    "measure_objects": "._objects",
+    "measure_texture": "._texture",
+    "get_texture_features": "._texture",
+    "HARALICK_FEATURES": "._texture",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+__getattr__, __dir__ = attach_lazy_exports(__name__, _LAZY_EXPORTS)
@@ -0,0 +1,336 @@
+import numpy as np
+import pandas as pd
+from scipy import ndimage as ndi
+from scipy.spatial import ConvexHull
+
+from ._labels import get_label_pixels, get_origins
+
+# Feature order of CellProfiler's MeasureObjectSizeShape
+AREASHAPE_FEATURES = [
+    "AreaShape_Extent",
+    "AreaShape_EulerNumber",
+    "AreaShape_EquivalentDiameter",
+    "AreaShape_MajorAxisLength",
+    "AreaShape_MinorAxisLength",
+    "AreaShape_Center_X",
+    "AreaShape_Center_Y",
+    "AreaShape_BoundingBoxMinimum_X",
+    "AreaShape_BoundingBoxMinimum_Y",
+    "AreaShape_BoundingBoxMaximum_X",
+    "AreaShape_BoundingBoxMaximum_Y",
+    "AreaShape_Area",
+    "AreaShape_Perimeter",
+    "AreaShape_MaximumRadius",
+    "AreaShape_MeanRadius",
+    "AreaShape_MedianRadius",
+    "AreaShape_MinFeretDiameter",
+    "AreaShape_MaxFeretDiameter",
+    "AreaShape_Orientation",
+    "AreaShape_Eccentricity",
+    "AreaShape_FormFactor",
+    "AreaShape_Solidity",
+    "AreaShape_ConvexArea",
+    "AreaShape_Compactness",
+    "AreaShape_BoundingBoxArea",
+]
+
+# skimage's perimeter weights, indexed by the code of a border pixel
+_PERIMETER_WEIGHTS = np.zeros(50, dtype=np.float64)
+_PERIMETER_WEIGHTS[[5, 7, 15, 17, 25, 27]] = 1
+_PERIMETER_WEIGHTS[[21, 33]] = np.sqrt(2)
+_PERIMETER_WEIGHTS[[13, 23]] = (1 + np.sqrt(2)) / 2
+
+# skimage's 8-connectivity Euler number contribution of each 2x2 pixel configuration
+_EULER_COEFS = np.array([0, 0, 0, 0, 0, 0, -1, 0, 1, 0, 0, 0, 0, 0, -1, 0], dtype=np.float64)
+
+_DIAMOND_OFFSETS = np.array([[-0.5, 0], [0.5, 0], [0, -0.5], [0, 0.5]])
+
+
+def measure_areashape(labels: np.ndarray, origins: np.ndarray = None):
+    """
+    Measures the AreaShape features of CellProfiler's MeasureObjectSizeShape for every object of a label image in one
+    pass. The features follow skimage's regionprops and centrosome, like CellProfiler does.
+    :param labels: 2D label image, 0 is unlabeled. An object doesn't have to be connected
+    :param origins: Optional (n_labels, 2) array with the (row, col) each object's coordinates are relative to, e.g. the
+        corner of the well the object belongs to
+    :return: DataFrame with a row per label from 1 to labels.max()
+    """
+    labels = np.asarray(labels)
+    n_labels = int(labels.max()) if labels.size > 0 else 0
+    origins = get_origins(origins, n_labels)
+    label_idx, rows, cols = get_label_pixels(labels)
+    bboxes = _get_bboxes(labels, n_labels)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        area = np.bincount(label_idx, minlength=n_labels + 1).astype(np.float64)
+        bbox_height = bboxes[:, 2] - bboxes[:, 0]
+        bbox_width = bboxes[:, 3] - bboxes[:, 1]
+        bbox_area = (bbox_height * bbox_width).astype(np.float64)
+
+        # The centroid is relative to the origin, while the moments use coordinates within the bounding box
+        center_y = np.bincount(label_idx, weights=rows - origins[label_idx, 0], minlength=n_labels + 1) / area
+        center_x = np.bincount(label_idx, weights=cols - origins[label_idx, 1], minlength=n_labels + 1) / area
+        local_rows = rows - bboxes[label_idx, 0]
+        local_cols = cols - bboxes[label_idx, 1]
+        local_center_y = np.bincount(label_idx, weights=local_rows, minlength=n_labels + 1) / area
+        local_center_x = np.bincount(label_idx, weights=local_cols, minlength=n_labels + 1) / area
+        delta_y = local_rows - local_center_y[label_idx]
+        delta_x = local_cols - local_center_x[label_idx]
+        mu20 = np.bincount(label_idx, weights=delta_y * delta_y, minlength=n_labels + 1)
+        mu02 = np.bincount(label_idx, weights=delta_x * delta_x, minlength=n_labels + 1)
+        mu11 = np.bincount(label_idx, weights=delta_y * delta_x, minlength=n_labels + 1)
+
+        inertia_tensor = np.empty((n_labels + 1, 2, 2))
+        inertia_tensor[:, 0, 0] = mu02 / area
+        inertia_tensor[:, 0, 1] = inertia_tensor[:, 1, 0] = -mu11 / area
+        inertia_tensor[:, 1, 1] = mu20 / area
+        valid = area > 0
+        eigvals = np.zeros((n_labels + 1, 2))
+        eigvals[valid] = np.clip(np.linalg.eigvalsh(inertia_tensor[valid])[:, ::-1], 0, None)
+        major_axis_length = 4 * np.sqrt(eigvals[:, 0])
+        minor_axis_length = 4 * np.sqrt(eigvals[:, 1])
+        eccentricity = np.where(eigvals[:, 0] == 0, 0, np.sqrt(1 - eigvals[:, 1] / eigvals[:, 0]))
+        orientation = _get_orientation(inertia_tensor, label_idx, local_rows, local_cols)
+
+        border = _get_inner_border(labels)
+        perimeter = _get_perimeter(labels, border, n_labels)
+        euler_number = _get_euler_number(labels, n_labels)
+        max_radius, mean_radius, median_radius = _get_radii(labels, n_labels)
+        convex_area, min_feret_diameter, max_feret_diameter = _get_hull_features(labels, border, bboxes, n_labels)
+
+        formfactor = 4.0 * np.pi * area / perimeter ** 2
+        compactness = perimeter ** 2 / np.maximum(4.0 * np.pi * area, 1)
+
+        features = {
+            "AreaShape_Extent": area / bbox_area,
+            "AreaShape_EulerNumber": euler_number,
+            "AreaShape_EquivalentDiameter": np.sqrt(4 * area / np.pi),
+            "AreaShape_MajorAxisLength": major_axis_length,
+            "AreaShape_MinorAxisLength": minor_axis_length,
+            "AreaShape_Center_X": center_x,
+            "AreaShape_Center_Y": center_y,
+            "AreaShape_BoundingBoxMinimum_X": bboxes[:, 1] - origins[:, 1],
+            "AreaShape_BoundingBoxMinimum_Y": bboxes[:, 0] - origins[:, 0],
+            "AreaShape_BoundingBoxMaximum_X": bboxes[:, 3] - origins[:, 1],
+            "AreaShape_BoundingBoxMaximum_Y": bboxes[:, 2] - origins[:, 0],
+            "AreaShape_Area": area,
+            "AreaShape_Perimeter": perimeter,
+            "AreaShape_MaximumRadius": max_radius,
+            "AreaShape_MeanRadius": mean_radius,
+            "AreaShape_MedianRadius": median_radius,
+            "AreaShape_MinFeretDiameter": min_feret_diameter,
+            "AreaShape_MaxFeretDiameter": max_feret_diameter,
+            "AreaShape_Orientation": orientation * (180 / np.pi),
+            "AreaShape_Eccentricity": eccentricity,
+            "AreaShape_FormFactor": formfactor,
+            "AreaShape_Solidity": area / convex_area,
+            "AreaShape_ConvexArea": convex_area,
+            "AreaShape_Compactness": compactness,
+            "AreaShape_BoundingBoxArea": bbox_area,
+        }
+
+    results = pd.DataFrame({feature: np.asarray(features[feature], dtype=np.float64)[1:]
+                            for feature in AREASHAPE_FEATURES},
+                           index=pd.RangeIndex(1, n_labels + 1, name="label"))
+    results.loc[~valid[1:], :] = np.nan
+    return results
+
+
+def _get_bboxes(labels, n_labels):
+    """
+    :return: (n_labels + 1, 4) array of (min_row, min_col, max_row, max_col) with exclusive maximums. Row 0 and
+        labels without pixels are zero.
+    """
+    bboxes = np.zeros((n_labels + 1, 4), dtype=np.intp)
+    for label, slices in enumerate(ndi.find_objects(labels, max_label=n_labels), start=1):
+        if slices is not None:
+            bboxes[label] = slices[0].start, slices[1].start, slices[0].stop, slices[1].stop
+    return bboxes
+
+
+def _get_orientation(inertia_tensor, label_idx, local_rows, local_cols):
+    a = inertia_tensor[:, 0, 0]
+    b = inertia_tensor[:, 0, 1]
+    c = inertia_tensor[:, 1, 1]
+    orientation = 0.5 * np.arctan2(-2 * b, c - a)
+
+    # Symmetric objects take a fixed diagonal orientation, so their moments are compared exactly instead of through
+    # the rounded inertia tensor
+    for label in np.flatnonzero(np.abs(a - c) <= 1e-9 * (a + c)):
+        in_label = label_idx == label
+        rows = local_rows[in_label].astype(np.int64)
+        cols = local_cols[in_label].astype(np.int64)
+        area = len(rows)
+        row_sum, col_sum = int(rows.sum()), int(cols.sum())
+        mu20 = area * int(np.sum(rows * rows)) - row_sum * row_sum
+        mu02 = area * int(np.sum(cols * cols)) - col_sum * col_sum
+        mu11 = area * int(np.sum(rows * cols)) - row_sum * col_sum
+        if mu20 == mu02:
+            orientation[label] = -np.pi / 4 if mu11 > 0 else np.pi / 4
+    return orientation
+
+
+def _shifted(padded, d_row, d_col):
+    """
+    View of a padded image shifted by up to one pixel, aligned with the unpadded image
+    """
+    height, width = padded.shape[0] - 2, padded.shape[1] - 2
+    return padded[1 + d_row:1 + d_row + height, 1 + d_col:1 + d_col + width]
+
+
+def _get_inner_border(labels):
+    """
+    Pixels of an object with a 4-neighbour outside of the object, including outside of the image. These are the
+    pixels skimage's perimeter walks along.
+    """
+    padded = np.pad(labels, 1)
+    interior = labels > 0
+    for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        interior &= _shifted(padded, d_row, d_col) == labels
+    return (labels > 0) & ~interior
+
+
+def _get_perimeter(labels, border, n_labels):
+    padded_labels = np.pad(labels, 1)
+    padded_border = np.pad(border, 1)
+    code = np.ones(labels.shape, dtype=np.uint8)
+    for d_row, d_col, weight in ((-1, 0, 2), (1, 0, 2), (0, -1, 2), (0, 1, 2),
+                                 (-1, -1, 10), (-1, 1, 10), (1, -1, 10), (1, 1, 10)):
+        neighbour = _shifted(padded_border, d_row, d_col) & (_shifted(padded_labels, d_row, d_col) == labels)
+        code += neighbour.astype(np.uint8) * np.uint8(weight)
+    return np.bincount(labels[border], weights=_PERIMETER_WEIGHTS[code[border]], minlength=n_labels + 1)
+
+
+def _get_euler_number(labels, n_labels):
+    """
+    Sums the Euler number contribution of every 2x2 block of pixels for each object found in the block
+    """
+    padded = np.pad(labels, 1)
+    corners = [padded[:-1, :-1], padded[:-1, 1:], padded[1:, :-1], padded[1:, 1:]]
+    weights = [8, 2, 4, 1]
+    euler_number = np.zeros(n_labels + 1)
+    for idx, corner in enumerate(corners):
+        # Each object of a block is counted once, from the first corner it is found in
+        counted = corner > 0
+        for previous in corners[:idx]:
+            counted &= previous != corner
+        if not counted.any():
+            continue
+        block_labels = corner[counted]
+        code = np.zeros(block_labels.shape, dtype=np.intp)
+        for other, weight in zip(corners, weights):
+            code += (other[counted] == block_labels) * weight
+        euler_number += np.bincount(block_labels, weights=_EULER_COEFS[code], minlength=n_labels + 1)
+    return euler_number
+
+
+def _get_radii(labels, n_labels):
+    """
+    Distances to the closest pixel outside of each object, from one distance transform per object bounding box
+    :return: The maximum, mean and median radius of each object
+    """
+    max_radius = np.zeros(n_labels + 1)
+    mean_radius = np.zeros(n_labels + 1)
+    median_radius = np.zeros(n_labels + 1)
+    for label, slices in enumerate(ndi.find_objects(labels, max_label=n_labels), start=1):
+        if slices is None:
+            continue
+        mini_img = np.pad(labels[slices] == label, 1)
+        distances = ndi.distance_transform_edt(mini_img)[mini_img]
+        max_radius[label] = distances.max()
+        mean_radius[label] = distances.mean()
+        median_radius[label] = np.median(distances)
+    return max_radius, mean_radius, median_radius
+
+
+def _get_hull_features(labels, border, bboxes, n_labels):
+    """
+    The convex hull of an object only depends on the first and last pixel of each of its rows, so only those are
+    passed to qhull.
+    :return: The convex area, minimum and maximum Feret diameter of each object
+    """
+    convex_area = np.zeros(n_labels + 1)
+    min_feret_diameter = np.zeros(n_labels + 1)
+    max_feret_diameter = np.zeros(n_labels + 1)
+
+    # The border pixels are in row-major order, which the stable sort keeps within each object
+    border_rows, border_cols = np.nonzero(border)
+    border_labels = labels[border_rows, border_cols]
+    order = np.argsort(border_labels, kind="stable")
+    border_labels = border_labels[order]
+    border_rows = border_rows[order]
+    border_cols = border_cols[order]
+    row_keys = border_labels.astype(np.int64) * labels.shape[0] + border_rows
+    row_ends = np.r_[True, row_keys[1:] != row_keys[:-1]] | np.r_[row_keys[1:] != row_keys[:-1], True]
+    border_labels = border_labels[row_ends]
+    border_rows = border_rows[row_ends]
+    border_cols = border_cols[row_ends]
+    splits = np.cumsum(np.bincount(border_labels, minlength=n_labels + 1))
+    for label in range(1, n_labels + 1):
+        if splits[label] == splits[label - 1]:
+            continue
+        points = np.column_stack([border_rows[splits[label - 1]:splits[label]] - bboxes[label, 0],
+                                  border_cols[splits[label - 1]:splits[label]] - bboxes[label, 1]])
+        height = bboxes[label, 2] - bboxes[label, 0]
+        width = bboxes[label, 3] - bboxes[label, 1]
+        convex_area[label] = _get_convex_area(points, height, width)
+        min_feret_diameter[label], max_feret_diameter[label] = _get_feret_diameters(points)
+    return convex_area, min_feret_diameter, max_feret_diameter
+
+
+def _get_convex_area(points, height, width):
+    """
+    Number of pixels in skimage's convex_hull_image: the pixel centers within the closed hull of the pixel corners.
+    The hull vertices lie on a half-pixel grid, so the rows covered in each column are found with exact integer
+    arithmetic on doubled coordinates.
+    """
+    corners = np.unique((points[:, np.newaxis, :] + _DIAMOND_OFFSETS).reshape(-1, 2), axis=0)
+    hull = ConvexHull(corners)
+    vertices = np.round(hull.points[hull.vertices] * 2).astype(np.int64)
+
+    first_row = np.full(width, height, dtype=np.int64)
+    last_row = np.full(width, -1, dtype=np.int64)
+    for (row_a, col_a), (row_b, col_b) in zip(vertices, np.roll(vertices, 1, axis=0)):
+        if col_a == col_b:
+            # The ends of an edge along a column are covered by the neighbouring edges
+            continue
+        if col_a > col_b:
+            row_a, col_a, row_b, col_b = row_b, col_b, row_a, col_a
+        cols = np.arange(-((-col_a) // 2), col_b // 2 + 1)
+        cols = cols[(cols >= 0) & (cols < width)]
+        # The doubled row where the edge crosses each column is numerator / (col_b - col_a)
+        numerator = row_a * (col_b - col_a) + (row_b - row_a) * (2 * cols - col_a)
+        denominator = 2 * (col_b - col_a)
+        np.minimum.at(first_row, cols, -((-numerator) // denominator))
+        np.maximum.at(last_row, cols, numerator // denominator)
+    first_row = np.maximum(first_row, 0)
+    last_row = np.minimum(last_row, height - 1)
+    return float(np.sum(np.maximum(last_row - first_row + 1, 0)))
+
+
+def _get_feret_diameters(points):
+    """
+    Minimum and maximum caliper width of the convex hull of the pixel centers, as measured by centrosome
+    """
+    points = np.unique(points, axis=0)
+    centered = points - points[0]
+    if len(points) < 3 or not np.any(centered[:, 0] * centered[-1, 1] - centered[:, 1] * centered[-1, 0]):
+        # A single pixel or a line of pixels has no width
+        lengths = np.sum(centered ** 2, axis=1)
+        return 0.0, float(np.sqrt(np.max(lengths)))
+    vertices = points[ConvexHull(points).vertices].astype(np.float64)
+
+    distances = np.sum((vertices[:, np.newaxis, :] - vertices[np.newaxis, :, :]) ** 2, axis=2)
+    max_feret_diameter = np.sqrt(np.max(distances))
+
+    # The minimum width is the smallest of the largest distances from each hull edge to the other vertices
+    l0 = vertices
+    l1 = np.roll(vertices, -1, axis=0)
+    pt = vertices[np.newaxis, :, :]
+    edge_distances = (
+            ((l0[:, 0] - l1[:, 0])[:, np.newaxis] * (l0[:, np.newaxis, 1] - pt[..., 1])
+             - (l0[:, np.newaxis, 0] - pt[..., 0]) * (l0[:, 1] - l1[:, 1])[:, np.newaxis]) ** 2
+            / np.sum((l1 - l0) ** 2, axis=1)[:, np.newaxis]
+    )
+    min_feret_diameter = np.sqrt(np.min(np.max(edge_distances, axis=1)))
+    return float(min_feret_diameter), float(max_feret_diameter)
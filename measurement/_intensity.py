@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+from scipy import ndimage as ndi
+
+from ._labels import get_label_pixels, get_origins
+
+# Feature order of CellProfiler's MeasureObjectIntensity, with the image name left out like the CellProfilerApi does
+INTENSITY_FEATURES = [
+    "Intensity_IntegratedIntensity",
+    "Intensity_MeanIntensity",
+    "Intensity_StdIntensity",
+    "Intensity_MinIntensity",
+    "Intensity_MaxIntensity",
+    "Intensity_IntegratedIntensityEdge",
+    "Intensity_MeanIntensityEdge",
+    "Intensity_StdIntensityEdge",
+    "Intensity_MinIntensityEdge",
+    "Intensity_MaxIntensityEdge",
+    "Intensity_MassDisplacement",
+    "Intensity_LowerQuartileIntensity",
+    "Intensity_MedianIntensity",
+    "Intensity_MADIntensity",
+    "Intensity_UpperQuartileIntensity",
+    "Location_CenterMassIntensity_X",
+    "Location_CenterMassIntensity_Y",
+    "Location_CenterMassIntensity_Z",
+    "Location_MaxIntensity_X",
+    "Location_MaxIntensity_Y",
+    "Location_MaxIntensity_Z",
+]
+
+
+def measure_intensity(labels: np.ndarray, img: np.ndarray, regions: np.ndarray = None, origins: np.ndarray = None):
+    """
+    Measures the Intensity and Location features of CellProfiler's MeasureObjectIntensity for every object of a label
+    image in one pass.
+    :param labels: 2D label image, 0 is unlabeled. An object doesn't have to be connected
+    :param img: Grayscale image with the same shape as labels
+    :param regions: Optional image of region ids, e.g. the well of each pixel. Objects are only compared to pixels of
+        their own region when finding their edges, the same as if each region was measured as a separate image
+    :param origins: Optional (n_labels, 2) array with the (row, col) each object's coordinates are relative to
+    :return: DataFrame with a row per label from 1 to labels.max()
+    """
+    labels = np.asarray(labels)
+    # CellProfiler keeps its images as float32, so the values are rounded the same way before measuring
+    img = np.asarray(img, dtype=np.float32).astype(np.float64)
+    if img.shape != labels.shape:
+        raise ValueError(f"Image shape {img.shape} does not match the label shape {labels.shape}")
+    n_labels = int(labels.max()) if labels.size > 0 else 0
+    origins = get_origins(origins, n_labels)
+    label_idx, rows, cols = get_label_pixels(labels)
+    values = img.ravel()[np.flatnonzero(labels)]
+    mesh_y = (rows - origins[label_idx, 0]).astype(np.float64)
+    mesh_x = (cols - origins[label_idx, 1]).astype(np.float64)
+
+    features = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        count = np.bincount(label_idx, minlength=n_labels + 1).astype(np.float64)
+        integrated_intensity = np.bincount(label_idx, weights=values, minlength=n_labels + 1)
+        mean_intensity = integrated_intensity / count
+        deviation = values - mean_intensity[label_idx]
+        features["Intensity_IntegratedIntensity"] = integrated_intensity
+        features["Intensity_MeanIntensity"] = mean_intensity
+        features["Intensity_StdIntensity"] = np.sqrt(
+                np.bincount(label_idx, weights=deviation * deviation, minlength=n_labels + 1) / count
+        )
+
+        # Sorting the values within each object gives the minimum, maximum and quantiles
+        order = np.lexsort((values, label_idx))
+        sorted_values = values[order]
+        starts = (np.cumsum(count) - count).astype(np.intp)
+        present = count > 0
+        min_intensity = np.zeros(n_labels + 1)
+        max_intensity = np.zeros(n_labels + 1)
+        min_intensity[present] = sorted_values[starts[present]]
+        max_intensity[present] = sorted_values[starts[present] + count[present].astype(np.intp) - 1]
+        features["Intensity_MinIntensity"] = min_intensity
+        features["Intensity_MaxIntensity"] = max_intensity
+
+        features.update(_measure_edge_intensity(labels, img, regions, n_labels))
+
+        cm_x = np.bincount(label_idx, weights=mesh_x, minlength=n_labels + 1) / count
+        cm_y = np.bincount(label_idx, weights=mesh_y, minlength=n_labels + 1) / count
+        cmi_x = np.bincount(label_idx, weights=mesh_x * values, minlength=n_labels + 1) / integrated_intensity
+        cmi_y = np.bincount(label_idx, weights=mesh_y * values, minlength=n_labels + 1) / integrated_intensity
+        features["Intensity_MassDisplacement"] = np.sqrt((cm_x - cmi_x) ** 2 + (cm_y - cmi_y) ** 2)
+
+        median_intensity = _get_quantile(sorted_values, starts, count, 1.0 / 2.0)
+        features["Intensity_LowerQuartileIntensity"] = _get_quantile(sorted_values, starts, count, 1.0 / 4.0)
+        features["Intensity_MedianIntensity"] = median_intensity
+        mad_values = np.abs(values - median_intensity[label_idx])
+        mad_values = mad_values[np.lexsort((mad_values, label_idx))]
+        features["Intensity_MADIntensity"] = _get_quantile(mad_values, starts, count, 1.0 / 2.0)
+        features["Intensity_UpperQuartileIntensity"] = _get_quantile(sorted_values, starts, count, 3.0 / 4.0)
+
+        # The first pixel in row-major order with the maximum value, like scipy's maximum_position
+        max_x = np.zeros(n_labels + 1)
+        max_y = np.zeros(n_labels + 1)
+        at_max = np.flatnonzero(values == max_intensity[label_idx])
+        max_labels, first_max = np.unique(label_idx[at_max], return_index=True)
+        max_x[max_labels] = mesh_x[at_max[first_max]]
+        max_y[max_labels] = mesh_y[at_max[first_max]]
+
+        features["Location_CenterMassIntensity_X"] = cmi_x
+        features["Location_CenterMassIntensity_Y"] = cmi_y
+        features["Location_CenterMassIntensity_Z"] = np.zeros(n_labels + 1)
+        features["Location_MaxIntensity_X"] = max_x
+        features["Location_MaxIntensity_Y"] = max_y
+        features["Location_MaxIntensity_Z"] = np.zeros(n_labels + 1)
+
+    results = pd.DataFrame({feature: features[feature][1:] for feature in INTENSITY_FEATURES},
+                           index=pd.RangeIndex(1, n_labels + 1, name="label"))
+    results.loc[~present[1:], :] = np.nan
+    return results
+
+
+def _get_quantile(sorted_values, starts, count, fraction):
+    """
+    CellProfiler's quantile of each object, interpolated between the two closest sorted values
+    """
+    quantile = np.zeros(len(count))
+    qindex = starts.astype(np.float64) + count * fraction
+    qfraction = qindex - np.floor(qindex)
+    qindex = qindex.astype(np.intp)
+    qmask = qindex < starts + count - 1
+    qi = qindex[qmask]
+    qf = qfraction[qmask]
+    quantile[qmask] = sorted_values[qi] * (1 - qf) + sorted_values[qi + 1] * qf
+    qmask = ~qmask & (count > 0)
+    quantile[qmask] = sorted_values[qindex[qmask]]
+    return quantile
+
+
+def _get_inner_boundaries(labels, regions=None):
+    """
+    Same as skimage's find_boundaries(labels, mode="inner") with its reflected image border. Pixels of another region
+    are treated like pixels outside of the image.
+    """
+    padded_labels = np.pad(labels, 1, mode="edge")
+    padded_regions = None if regions is None else np.pad(regions, 1, mode="edge")
+    height, width = labels.shape
+    boundaries = np.zeros(labels.shape, dtype=bool)
+    for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        neighbour = padded_labels[1 + d_row:1 + d_row + height, 1 + d_col:1 + d_col + width]
+        differs = neighbour != labels
+        if padded_regions is not None:
+            differs &= padded_regions[1 + d_row:1 + d_row + height, 1 + d_col:1 + d_col + width] == regions
+        boundaries |= differs
+    return boundaries & (labels > 0)
+
+
+def _measure_edge_intensity(labels, img, regions, n_labels):
+    edges = _get_inner_boundaries(labels, regions)
+    edge_labels = labels[edges].astype(np.intp)
+    edge_values = img[edges]
+    index = np.arange(1, n_labels + 1)
+
+    edge_count = np.bincount(edge_labels, minlength=n_labels + 1).astype(np.float64)
+    integrated_intensity = np.bincount(edge_labels, weights=edge_values, minlength=n_labels + 1)
+    mean_intensity = integrated_intensity / edge_count
+    deviation = edge_values - mean_intensity[edge_labels]
+    min_intensity = np.zeros(n_labels + 1)
+    max_intensity = np.zeros(n_labels + 1)
+    if len(edge_values) > 0:
+        min_intensity[1:] = ndi.minimum(edge_values, edge_labels, index)
+        max_intensity[1:] = ndi.maximum(edge_values, edge_labels, index)
+    return {
+        "Intensity_IntegratedIntensityEdge": integrated_intensity,
+        "Intensity_MeanIntensityEdge": mean_intensity,
+        "Intensity_StdIntensityEdge": np.sqrt(
+                np.bincount(edge_labels, weights=deviation * deviation, minlength=n_labels + 1) / edge_count
+        ),
+        "Intensity_MinIntensityEdge": min_intensity,
+        "Intensity_MaxIntensityEdge": max_intensity,
+    }
@@ -0,0 +1,24 @@
+import numpy as np
+
+
+def get_label_pixels(labels: np.ndarray):
+    """
+    :return: The label, row and column of every labeled pixel, in row-major order
+    """
+    pixel_idx = np.flatnonzero(labels)
+    label_idx = labels.ravel()[pixel_idx].astype(np.intp)
+    rows, cols = np.divmod(pixel_idx, labels.shape[1])
+    return label_idx, rows, cols
+
+
+def get_origins(origins, n_labels: int):
+    """
+    :return: (n_labels + 1, 2) array of the (row, col) origin of each label, with a zero origin for label 0
+    """
+    padded_origins = np.zeros((n_labels + 1, 2), dtype=np.intp)
+    if origins is not None:
+        origins = np.asarray(origins, dtype=np.intp).reshape(-1, 2)
+        if len(origins) != n_labels:
+            raise ValueError(f"Expected an origin for each of the {n_labels} labels, got {len(origins)}")
+        padded_origins[1:] = origins
+    return padded_origins
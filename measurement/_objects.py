@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+
+from ._areashape import measure_areashape
+from ._intensity import measure_intensity
+
+
+def measure_objects(labels: np.ndarray, img: np.ndarray, regions: np.ndarray = None, origins: np.ndarray = None):
+    """
+    Measures the AreaShape, Intensity and Location features of every object of a label image
+    :param labels: 2D label image, 0 is unlabeled
+    :param img: Grayscale image with the same shape as labels
+    :param regions: Optional image of region ids, see measure_intensity
+    :param origins: Optional (n_labels, 2) array with the (row, col) each object's coordinates are relative to
+    :return: DataFrame with a row per label from 1 to labels.max() and the CellProfiler feature names as columns
+    """
+    return pd.concat([measure_areashape(labels, origins=origins),
+                      measure_intensity(labels, img, regions=regions, origins=origins)], axis=1)
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+
+from ._labels import get_label_pixels
+
+# Feature order of CellProfiler's MeasureTexture, which are mahotas' 13 Haralick features
+HARALICK_FEATURES = [
+    "AngularSecondMoment",
+    "Contrast",
+    "Correlation",
+    "Variance",
+    "InverseDifferenceMoment",
+    "SumAverage",
+    "SumVariance",
+    "SumEntropy",
+    "Entropy",
+    "DifferenceVariance",
+    "DifferenceEntropy",
+    "InfoMeas1",
+    "InfoMeas2",
+]
+
+# The (row, col) step and the angle name of mahotas' four 2D directions, in the order CellProfiler reports them
+TEXTURE_DIRECTIONS = [
+    ((0, 1), 0),
+    ((1, 1), 135),
+    ((1, 0), 90),
+    ((1, -1), 45),
+]
+
+# MeasureTexture numbers each added scale by the count of scales before it plus 3, so the scale the CellProfilerApi
+# asks for ends up measured as scale 3 and 4
+TEXTURE_SCALES = (3, 4)
+
+TEXTURE_GRAY_LEVELS = 256
+
+
+def get_texture_features(scales=TEXTURE_SCALES, gray_levels: int = TEXTURE_GRAY_LEVELS):
+    """
+    :return: Names of the Texture features in the order of CellProfiler's results, e.g.
+        Texture_Contrast_scale(3)_deg(0)_gray(256)
+    """
+    return [f"Texture_{feature}_scale({scale})_deg({degrees})_gray({gray_levels})"
+            for feature in HARALICK_FEATURES
+            for scale in scales
+            for _, degrees in TEXTURE_DIRECTIONS]
+
+
+def measure_texture(labels: np.ndarray, img: np.ndarray, scales=TEXTURE_SCALES,
+                    gray_levels: int = TEXTURE_GRAY_LEVELS):
+    """
+    Measures the Haralick Texture features of CellProfiler's MeasureTexture for every object of a label image in one
+    pass. The image is quantized once, the co-occurrence matrices of all objects, scales and directions are counted
+    together, and the features are computed from the counted matrices as array operations.
+    :param labels: 2D label image, 0 is unlabeled. Pixels of two objects are never paired, so objects that were
+        measured in separate images can share a label image
+    :param img: Grayscale image with values between 0 and 1 and the same shape as labels
+    :param scales: Pixel distances between the paired pixels
+    :param gray_levels: Number of gray levels the image is quantized to, at most 256
+    :return: DataFrame with a row per label from 1 to labels.max(). An object without a pair of nonzero pixels in one
+        of the directions of a scale gets NaN for all features of that scale, like in CellProfiler
+    """
+    labels = np.asarray(labels)
+    img = np.asarray(img)
+    if img.shape != labels.shape:
+        raise ValueError(f"Image shape {img.shape} does not match the label shape {labels.shape}")
+    if not 1 < gray_levels <= 256:
+        raise ValueError(f"gray_levels must be between 2 and 256, got {gray_levels}")
+    scales = list(scales)
+    n_labels = int(labels.max()) if labels.size > 0 else 0
+    pixels = _quantize(img, gray_levels)
+
+    # mahotas sizes the matrices of an object by its largest gray level, which only shows in the DifferenceVariance
+    label_idx, rows, cols = get_label_pixels(labels)
+    n_object_levels = np.zeros(n_labels + 1, dtype=np.intp)
+    np.maximum.at(n_object_levels, label_idx, pixels[rows, cols])
+    n_object_levels += 1
+
+    n_directions = len(TEXTURE_DIRECTIONS)
+    n_groups = n_labels * len(scales) * n_directions
+    group_labels = np.repeat(np.arange(1, n_labels + 1), len(scales) * n_directions)
+    cells = []
+    for scale_num, scale in enumerate(scales):
+        for direction_num, ((d_row, d_col), _) in enumerate(TEXTURE_DIRECTIONS):
+            pair_labels, first, second = _get_pixel_pairs(labels, pixels, d_row * scale, d_col * scale)
+            group = ((pair_labels - 1) * len(scales) + scale_num) * n_directions + direction_num
+            # The matrices are symmetric, so every pair is counted in both orders
+            cells.append((group * gray_levels + first) * gray_levels + second)
+            cells.append((group * gray_levels + second) * gray_levels + first)
+    cells, counts = np.unique(np.concatenate(cells), return_counts=True)
+
+    group, cells = np.divmod(cells, gray_levels * gray_levels)
+    i, j = np.divmod(cells, gray_levels)
+    total = np.bincount(group, weights=counts, minlength=n_groups)
+    features = _get_haralick_features(group, i, j, counts / total[group], n_groups, gray_levels,
+                                      n_object_levels[group_labels])
+
+    # An empty matrix in any direction makes mahotas fail for the whole scale of the object
+    shape = (n_labels, len(scales), n_directions)
+    invalid = np.broadcast_to((total.reshape(shape) == 0).any(axis=2, keepdims=True), shape)
+    columns = {}
+    names = iter(get_texture_features(scales, gray_levels))
+    for feature in HARALICK_FEATURES:
+        values = np.where(invalid, np.nan, features[feature].reshape(shape))
+        for scale_num in range(len(scales)):
+            for direction_num in range(n_directions):
+                columns[next(names)] = values[:, scale_num, direction_num]
+    return pd.DataFrame(columns, index=pd.RangeIndex(1, n_labels + 1, name="label"))
+
+
+def _quantize(img, gray_levels):
+    """
+    Same as skimage's img_as_ubyte of CellProfiler's float32 image, rescaled to the gray levels like MeasureTexture
+    """
+    pixels = np.multiply(np.asarray(img, dtype=np.float32), 255, dtype=np.float32)
+    np.rint(pixels, out=pixels)
+    np.clip(pixels, 0, 255, out=pixels)
+    pixels = pixels.astype(np.uint8)
+    if gray_levels != 256:
+        pixels = (pixels / 255.0 * (gray_levels - 1)).astype(np.uint8)
+    return pixels.astype(np.intp)
+
+
+def _get_pixel_pairs(labels, pixels, d_row, d_col):
+    """
+    :return: The label and both gray levels of every pair of nonzero pixels of the same object that are d_row, d_col
+        apart
+    """
+    height, width = labels.shape
+    row_slice = slice(max(0, -d_row), height - max(0, d_row))
+    col_slice = slice(max(0, -d_col), width - max(0, d_col))
+    shifted_row_slice = slice(row_slice.start + d_row, row_slice.stop + d_row)
+    shifted_col_slice = slice(col_slice.start + d_col, col_slice.stop + d_col)
+    if row_slice.start >= row_slice.stop or col_slice.start >= col_slice.stop:
+        return (np.zeros(0, dtype=np.intp),) * 3
+
+    first_labels = labels[row_slice, col_slice]
+    first = pixels[row_slice, col_slice]
+    second = pixels[shifted_row_slice, shifted_col_slice]
+    # Zero pixels are ignored like with mahotas' ignore_zeros, which CellProfiler uses to skip the background
+    paired = (first_labels > 0) & (first_labels == labels[shifted_row_slice, shifted_col_slice]) \
+        & (first > 0) & (second > 0)
+    return first_labels[paired].astype(np.intp), first[paired], second[paired]
+
+
+def _get_entropy(p):
+    return -np.sum(p * np.log2(np.where(p > 0, p, 1)), axis=-1)
+
+
+def _get_haralick_features(group, i, j, p, n_groups, gray_levels, n_levels):
+    """
+    mahotas' Haralick features of every group from the nonzero cells of its normalized co-occurrence matrix
+    :param group: Group of each cell
+    :param i: Row of each cell
+    :param j: Column of each cell
+    :param p: Probability of each cell
+    :param n_levels: Size of the matrix of each group in mahotas
+    """
+    def group_sum(weights):
+        return np.bincount(group, weights=weights, minlength=n_groups)
+
+    def group_marginal(index, size):
+        return np.bincount(group * size + index, weights=p, minlength=n_groups * size).reshape(n_groups, size)
+
+    k = np.arange(gray_levels, dtype=np.float64)
+    tk = np.arange(2 * gray_levels, dtype=np.float64)
+    px = group_marginal(j, gray_levels)
+    py = group_marginal(i, gray_levels)
+    px_plus_y = group_marginal(i + j, 2 * gray_levels)
+    px_minus_y = group_marginal(np.abs(i - j), gray_levels)
+
+    ux = px @ k
+    uy = py @ k
+    vx = px @ k ** 2 - ux ** 2
+    vy = py @ k ** 2 - uy ** 2
+    sx = np.sqrt(vx)
+    sy = np.sqrt(vy)
+
+    features = {}
+    features["AngularSecondMoment"] = group_sum(p * p)
+    features["Contrast"] = px_minus_y @ k ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = (group_sum(i * j * p) - ux * uy) / sx / sy
+    features["Correlation"] = np.where((sx == 0) | (sy == 0), 1.0, correlation)
+    features["Variance"] = vx
+    features["InverseDifferenceMoment"] = group_sum(p / (1 + (i - j) ** 2))
+    features["SumAverage"] = px_plus_y @ tk
+    features["SumVariance"] = px_plus_y @ tk ** 2 - features["SumAverage"] ** 2
+    features["SumEntropy"] = _get_entropy(px_plus_y)
+    entropy = -group_sum(p * np.log2(p))
+    features["Entropy"] = entropy
+
+    # mahotas takes the variance of P(|x-y|) over the size of the matrix, not over all gray levels
+    in_matrix = k[np.newaxis, :] < n_levels[:, np.newaxis]
+    mean_minus_y = px_minus_y.sum(axis=1) / n_levels
+    features["DifferenceVariance"] = np.sum(np.where(in_matrix, px_minus_y - mean_minus_y[:, np.newaxis], 0) ** 2,
+                                            axis=1) / n_levels
+    features["DifferenceEntropy"] = _get_entropy(px_minus_y)
+
+    hx = _get_entropy(px)
+    hy = _get_entropy(py)
+    with np.errstate(divide="ignore"):
+        hxy1 = -group_sum(p * np.log2(px[group, i] * py[group, j]))
+    # The entropy of the outer product of the marginals is the sum of their entropies
+    hxy2 = hx + hy
+    max_hxy = np.maximum(hx, hy)
+    features["InfoMeas1"] = (entropy - hxy1) / np.where(max_hxy == 0, 1, max_hxy)
+    features["InfoMeas2"] = np.sqrt(np.maximum(0, 1 - np.exp(-2 * (hxy2 - entropy))))
+    return features
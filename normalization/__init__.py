@@ -1 +1,9 @@
-from .plate_normalization import PlateNormalization
+from ..util._lazy import attach_lazy_exports
+
+# Exports are imported from their submodule on first access, so importing the package stays cheap
+_LAZY_EXPORTS = {
+    "PlateNormalization": ".plate_normalization",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+__getattr__, __dir__ = attach_lazy_exports(__name__, _LAZY_EXPORTS)
@@ -2,8 +2,6 @@
 import pandas as pd
 import numpy as np
 import math
-import skimage as ski
-import matplotlib.pyplot as plt
 
 import os
 import logging
@@ -15,6 +13,9 @@ logging.basicConfig(format=f'[%(asctime)s|%(levelname)s|{os.path.basename(__file
 # ----- Pkg Relative Import -----
 
 from ._plate_blobs import PlateBlobs
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
 
 
 # ----- Main Class Definition -----
@@ -27,10 +28,19 @@ class PlateAlignment(PlateBlobs):
         self.input_alignment_vector = None
         self.alignment_vector = None
         self.degree_of_rotation = None
+        self.alignment_confidence = None
 
         # usage check
         self.run_alignment = align
 
+        # How the rotation is estimated from the blobs:
+        #   'row' (default) fits a line through the row with the lowest mean MSE
+        #   'robust' fits a shared slope across all rows and columns. It is opt-in, since it gives slightly different
+        #   rotation angles, and so different measurements, than the 'row' fit existing analyses were run with
+        self.alignment_method = kwargs.get("alignment_method", "row")
+        if self.alignment_method not in ["robust", "row"]:
+            raise ValueError("Invalid alignment_method. Implemented methods are 'robust' or 'row'")
+
         # execution check
         self.status_alignment = False
 
@@ -62,7 +72,16 @@ class PlateAlignment(PlateBlobs):
         # Varied performance across different cases
         #
 
-        m, b = np.polyfit(max_row.x, max_row.y, 1)
+        if self.blobs.blob_search_method == "lattice" and self.blobs.lattice_rotation is not None:
+            # The lattice search fits the row angle over the whole plate
+            m = math.tan(math.radians(self.blobs.lattice_rotation))
+            b = np.mean(max_row.y - m * max_row.x)
+        elif self.alignment_method == "robust":
+            degree_of_rotation, _ = self.blobs.estimate_rotation()
+            m = math.tan(math.radians(degree_of_rotation))
+            b = np.median(max_row.y - m * max_row.x)
+        else:
+            m, b = np.polyfit(max_row.x, max_row.y, 1)
 
         x0 = min(max_row.x)
         y0 = m * x0 + b
@@ -90,15 +109,14 @@ class PlateAlignment(PlateBlobs):
         else:
             self.degree_of_rotation = math.acos(adj / hyp) * (180.0 / math.pi)
 
-        self._set_img(
-                ski.transform.rotate(
-                        self.img,
-                        self.degree_of_rotation,
-                        mode='edge'
-                )
-        )
+        self.alignment_confidence = self.blobs.get_rotation_confidence(self.degree_of_rotation)
+        if self.alignment_confidence < 0.5:
+            log.warning(f"Only {self.alignment_confidence:.0%} of the blobs agree with the plate rotation")
+
+        rotation = self._get_rotation_matrix(self.degree_of_rotation, self.img_shape)
+        self._transform_img(rotation, self.img_shape)
         log.info("Updating blobs after alignment")
-        self._update_blobs()
+        self._update_blobs(transform=rotation)
         self.aligned_blobs = self.blobs
         self.status_alignment = True
 
@@ -115,7 +133,7 @@ class PlateAlignment(PlateBlobs):
             alignFit_ax[1].set_title("Aligned Image")
         return alignFit_fig, alignFit_ax
 
-    def plotAx_alignment(self, ax: plt.Axes, fontsize=24):
+    def plotAx_alignment(self, ax: "plt.Axes", fontsize=24):
         if self.status_alignment is False:
             self.align()
         with plt.ioff():
@@ -10,7 +10,9 @@ log = logging.getLogger(__name__)
 log.addHandler(console_handler)
 console_handler.setFormatter(formatter)
 # ----- Imports -----
+import numpy as np
 import skimage as ski
+from scipy.ndimage import affine_transform
 
 # ----- Pkg Relative Import -----
 from ..detection.blob_finder import BlobFinder
@@ -23,6 +25,7 @@ class PlateBase:
         self.input_img = img
         self.n_rows = n_rows
         self.n_cols = n_cols
+        self._img = self._img_transform = self._img_shape = None
         self._set_img(self.input_img)
 
         self.status_validity = True
@@ -32,6 +35,24 @@ class PlateBase:
 
         log.debug("Initialized Class and Set Image")
 
+    @property
+    def img(self):
+        """
+        Current image of the plate. Transforms queued with _transform_img() are composed and applied with a single
+        resampling the first time the image is read.
+        """
+        if self._img_transform is not None:
+            self._img = self._warp_img(self._img, self._img_transform, self._img_shape)
+            self._img_transform = None
+        return self._img
+
+    @property
+    def img_shape(self):
+        """
+        Shape of the current image, without applying any queued transform
+        """
+        return self._img_shape
+
     @property
     def gray_img(self):
         return ski.color.rgb2gray(self.img)
@@ -40,7 +61,76 @@ class PlateBase:
         pass
 
     def _set_img(self, img):
-        self.img = ski.util.img_as_ubyte(img)
+        self._img = ski.util.img_as_ubyte(img)
+        self._img_transform = None
+        self._img_shape = self._img.shape
+
+    def _transform_img(self, matrix, output_shape):
+        """
+        Queues an affine transform of the current image. Pixels mapped from outside the image take the value of the
+        nearest edge pixel, matching ski.transform.rotate(mode='edge').
+        :param matrix: 3x3 affine matrix mapping (x, y, 1) coordinates of the current image onto the new image
+        :param output_shape: (rows, cols) of the new image
+        """
+        matrix = np.asarray(matrix, dtype=float)
+        if self._img_transform is not None:
+            matrix = matrix @ self._img_transform
+        self._img_transform = matrix
+        self._img_shape = tuple(int(i) for i in output_shape[:2]) + tuple(self._img.shape[2:])
+
+    @staticmethod
+    def _warp_img(img, matrix, output_shape):
+        """
+        Resamples img with bilinear interpolation straight into a new uint8 image of output_shape
+        :param matrix: 3x3 affine matrix mapping (x, y, 1) coordinates of img onto the output image
+        """
+        inverse = np.linalg.inv(matrix)
+        linear, shift = inverse[:2, :2], inverse[:2, 2]
+        if np.allclose(linear, np.eye(2)) and np.allclose(shift, np.round(shift)):
+            # An integer translation is a copy of a window of the image, with the edges repeated outside of it
+            x0, y0 = int(round(shift[0])), int(round(shift[1]))
+            y1, x1 = y0 + output_shape[0], x0 + output_shape[1]
+            window = img[max(y0, 0):min(y1, img.shape[0]), max(x0, 0):min(x1, img.shape[1])]
+            if window.size != 0:
+                pad_width = ((max(-y0, 0), max(y1 - img.shape[0], 0)), (max(-x0, 0), max(x1 - img.shape[1], 0)))
+                pad_width += ((0, 0),) * (img.ndim - 2)
+                return np.pad(window, pad_width, mode='edge')
+
+        # ndimage works in (row, col) order
+        output = np.empty(output_shape, dtype=np.uint8)
+        channels = [Ellipsis] if img.ndim == 2 else [(Ellipsis, i) for i in range(img.shape[2])]
+        for channel in channels:
+            affine_transform(img[channel], linear[::-1, ::-1], offset=shift[::-1],
+                             output_shape=output_shape[:2], output=output[channel],
+                             order=1, mode='nearest')
+        return output
+
+    @staticmethod
+    def _get_rotation_matrix(degree_of_rotation, img_shape):
+        """
+        Affine matrix mapping (x, y, 1) image coordinates to their position after
+        ski.transform.rotate(img, degree_of_rotation), which rotates about the image center.
+        """
+        center_x = img_shape[1] / 2.0 - 0.5
+        center_y = img_shape[0] / 2.0 - 0.5
+        theta = np.deg2rad(-degree_of_rotation)
+        cos, sin = np.cos(theta), np.sin(theta)
+        return np.array([
+            [cos, -sin, center_x - cos * center_x + sin * center_y],
+            [sin, cos, center_y - sin * center_x - cos * center_y],
+            [0.0, 0.0, 1.0]
+        ])
+
+    @staticmethod
+    def _get_translation_matrix(dx, dy):
+        """
+        Affine matrix mapping (x, y, 1) image coordinates to their position after shifting the image by (dx, dy)
+        """
+        return np.array([
+            [1.0, 0.0, dx],
+            [0.0, 1.0, dy],
+            [0.0, 0.0, 1.0]
+        ])
 
     def _set_op(self, op_name, op_img, op_blobs):
         self._invalid_op = op_name
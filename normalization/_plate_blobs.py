@@ -38,6 +38,16 @@ class PlateBlobs(PlateBase):
         self.blobs_filter_threshold_method = kwargs.get("blobs_filter_threshold_method", "triangle")
         self.blobs_tophat_radius = kwargs.get("blobs_tophat_radius", 15)
         self.blobs_border_filter = kwargs.get("blobs_border_filter", 50)
+        self.blobs_pyramid_downsample = kwargs.get("blobs_pyramid_downsample", 1)
+
+        # How blobs are updated after the image is aligned or fitted:
+        #   'detect' searches the new image again
+        #   'transform' carries the blobs through the rotation/crop
+        #   'refine' carries the blobs through the rotation/crop and re-centers them with a small local search
+        self.blobs_update_method = kwargs.get("blobs_update_method", "detect")
+        self.blobs_refine_radius = kwargs.get("blobs_refine_radius", None)
+        if self.blobs_update_method not in ["detect", "transform", "refine"]:
+            raise ValueError("Invalid blobs_update_method. Implemented methods are 'detect', 'transform', or 'refine'")
 
         self.blobs = BlobFinder(
                 n_rows=self.n_rows,
@@ -46,12 +56,13 @@ class PlateBlobs(PlateBase):
                 min_sigma=self.blobs_min_sigma,
                 max_sigma=self.blobs_max_sigma,
                 num_sigma=self.blobs_num_sigma,
-                threshold=self.blobs_threshold,
+                search_threshold=self.blobs_threshold,
                 max_overlap=self.blobs_overlap,
-                min_size=self.blobs_min_size,
+                min_area=self.blobs_min_size,
                 filter_threshold_method=self.blobs_filter_threshold_method,
                 tophat_radius=self.blobs_tophat_radius,
-                border_filter=self.blobs_border_filter
+                border_filter=self.blobs_border_filter,
+                pyramid_downsample=self.blobs_pyramid_downsample
         )
 
         self.status_initial_blobs = False
@@ -65,6 +76,13 @@ class PlateBlobs(PlateBase):
     def gray_img(self):
         return ski.color.rgb2gray(self.img)
 
+    @property
+    def blob_search_img(self):
+        """
+        Image the blob search is run on
+        """
+        return self.gray_img
+
     def run(self):
         # TODO: Integrate autorun
         super().run()
@@ -77,8 +95,19 @@ class PlateBlobs(PlateBase):
         self._invalid_op_img = op_img
         self._invalid_blobs = op_blobs
 
-    def _update_blobs(self):
-        self.blobs.find_blobs(self.img)
+    def _update_blobs(self, transform=None, border_filter=None):
+        """
+        :param transform: 3x3 affine matrix mapping the image the blobs were last found in onto the current image.
+            Unless blobs_update_method is 'detect', the blobs are carried through the transform instead of being
+            searched for again.
+        :param border_filter: Border filter applied to the transformed blobs. Defaults to the blob search border filter.
+        """
+        if transform is None or self.blobs_update_method == "detect":
+            self.blobs.find_blobs(self.blob_search_img)
+        else:
+            self.blobs.transform_blobs(transform, self.img_shape[:2], border_filter=border_filter)
+            if self.blobs_update_method == "refine":
+                self.blobs.refine_blobs(self.blob_search_img, search_radius=self.blobs_refine_radius)
 
     def _plotAx_failed_normalization(self, ax):
         if self._invalid_blobs is not None:
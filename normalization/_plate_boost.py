@@ -16,24 +16,30 @@ class PlateBoost(PlateIO):
         self.boost_footprint_radius = kwargs.get("boost_footprint_radius", 8)
         self.boost_footprint_shape = kwargs.get("boost_footprint_shape", "disk")
         self.boost_kernel_size = kwargs.get("boost_kernel_size", 150)
+        self.clahe_boost = ClaheBoost(footprint_shape=self.boost_footprint_shape,
+                                      footprint_radius=self.boost_footprint_radius,
+                                      kernel_size=self.boost_kernel_size
+                                      )
         super().__init__(
             img, n_rows, n_cols,
-            align, fit
+            align, fit,
+            auto_run=False,
+            **kwargs
         )
         if auto_run:
             self.run()
 
     @property
     def boosted_img(self):
-        return ClaheBoost(img=self.img,
-                          footprint_shape=self.boost_footprint_shape,
-                          footprint_radius=self.boost_footprint_radius,
-                          kernel_size=self.boost_kernel_size
-                          ).get_boosted_img()
+        """
+        Boosted version of the current image. It is computed once per image, so repeated reads are free until the
+        image is aligned or fitted.
+        """
+        return self.clahe_boost.boost(self.img)
 
-    def _update_blobs(self):
+    @property
+    def blob_search_img(self):
         if self._use_boost:
-            img = self.boosted_img
+            return self.boosted_img
         else:
-            img = self.gray_img
-        self.blobs.find_blobs(img)
+            return self.gray_img
@@ -0,0 +1,117 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+# ----- Pkg Relative Import -----
+from ._plate_boost import PlateBoost
+from ..util._cache import hash_img, get_cache_key, get_result_cache
+
+# ----- Main Class Definition -----
+class PlateCache(PlateBoost):
+    """
+    With the cache kwarg (a ResultCache or the path of a cache directory), the outcome of the normalization is kept
+    on disk, keyed on the hash of the input image and every normalization, BlobFinder and ClaheBoost parameter. A
+    cached plate skips the blob searches: the alignment rotation and crop are replayed on the image and the blob table
+    and well grid are restored. Only valid normalizations are cached.
+    """
+
+    def __init__(self, img, n_rows=8, n_cols=12,
+                 align=True, fit=True, use_boost=True,
+                 auto_run=True,
+                 **kwargs
+                 ):
+        self.result_cache = get_result_cache(kwargs.get("cache", None))
+        self.img_hash = hash_img(img) if self.result_cache is not None else None
+        self.status_cached_normalization = False
+        super().__init__(img, n_rows, n_cols,
+                         align, fit, use_boost,
+                         auto_run=auto_run,
+                         **kwargs)
+
+    @property
+    def normalization_key(self):
+        """
+        Cache key of the normalization, or None without a cache
+        """
+        if self.result_cache is None:
+            return None
+        params = {name: value for name, value in vars(self).items() if name.startswith(("blobs_", "boost_"))}
+        params.update({
+            "n_rows": self.n_rows,
+            "n_cols": self.n_cols,
+            "align": self.run_alignment,
+            "fit": self.run_fitting,
+            "border_padding": self.border_padding,
+            "alignment_method": self.alignment_method,
+            "use_boost": self._use_boost,
+        })
+        return get_cache_key("normalization", params, parent_key=self.img_hash)
+
+    def run(self):
+        if self.result_cache is None:
+            super().run()
+            return
+
+        key = self.normalization_key
+        state = self.result_cache.get(key)
+        if state is not None:
+            log.info("Restoring the plate normalization from the cache")
+            self._restore_normalization(state)
+            return
+
+        super().run()
+        if self.status_validity:
+            self.result_cache.put(key, self._get_normalization_state())
+
+    def _get_normalization_state(self):
+        crop_box = tuple(int(value) for value in self.crop_box) if self.status_fitted else None
+        return {
+            "degree_of_rotation": self.degree_of_rotation if self.status_alignment else None,
+            "alignment_confidence": self.alignment_confidence,
+            "input_alignment_vector": self.input_alignment_vector,
+            "alignment_vector": self.alignment_vector,
+            "crop_box": crop_box,
+            "blobs_table": self.blobs._table,
+            "lattice_rotation": self.blobs.lattice_rotation,
+            "lattice_pitch": self.blobs.lattice_pitch,
+            "rows_midpoints": self.rows_midpoints,
+            "cols_midpoints": self.cols_midpoints,
+        }
+
+    def _restore_normalization(self, state):
+        if self.run_fitting:
+            self._pad_input_img()
+
+        if state["degree_of_rotation"] is not None:
+            self.degree_of_rotation = state["degree_of_rotation"]
+            self.alignment_confidence = state["alignment_confidence"]
+            self.input_alignment_vector = state["input_alignment_vector"]
+            self.alignment_vector = state["alignment_vector"]
+            self._transform_img(self._get_rotation_matrix(self.degree_of_rotation, self.img_shape), self.img_shape)
+            if self.run_fitting and self.blobs_update_method != "transform":
+                # The blob search after the alignment resamples the rotated image before it is cropped. Doing the same
+                # keeps the restored image identical to the normalized one
+                _ = self.img
+            self.status_alignment = True
+
+        if state["crop_box"] is not None:
+            bound_L, bound_T, width, height = state["crop_box"]
+            self._transform_img(self._get_translation_matrix(-bound_L, -bound_T), (height, width))
+            self.crop_box = (bound_L, bound_T, width, height)
+            self.status_fitted = True
+
+        self.blobs._table = state["blobs_table"]
+        self.blobs.lattice_rotation = state["lattice_rotation"]
+        self.blobs.lattice_pitch = state["lattice_pitch"]
+        self.status_initial_blobs = True
+        self.unaligned_blobs = self.aligned_blobs = self.blobs
+
+        self.rows_midpoints = state["rows_midpoints"]
+        self.cols_midpoints = state["cols_midpoints"]
+        self.status_midpoints = True
+        self.status_cached_normalization = True
@@ -1,7 +1,6 @@
 # ----- Imports -----
 import numpy as np
 import math
-import matplotlib.pyplot as plt
 
 import os
 import logging
@@ -12,6 +11,9 @@ logging.basicConfig(format=f'[%(asctime)s|%(levelname)s|{os.path.basename(__file
 # ----- Pkg Relative Import -----
 from ._plate_align import PlateAlignment
 from ..util.plotting import plot_blobs
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
 
 
 # ----- Main Class Definition -----
@@ -26,7 +28,7 @@ class PlateFit(PlateAlignment):
                  **kwargs
                  ):
 
-        self.padded_img = self.cropping_rect = None
+        self.padded_img = self.crop_box = None
         self.border_padding = border_padding
         self.run_fitting = fit
 
@@ -50,19 +52,8 @@ class PlateFit(PlateAlignment):
             self._invalid_blobs = self.blobs
 
     def _pad_input_img(self):
-        self.padded_img = []
-        for color_channel in range(3):
-            tmp_img = self.img[:, :, color_channel]
-            self.padded_img.append(
-                    np.expand_dims(
-                            np.pad(
-                                    array=tmp_img,
-                                    pad_width=self.border_padding,
-                                    mode='edge'
-                            ), axis=2
-                    )
-            )
-        self.padded_img = np.concatenate(arrays=self.padded_img, axis=2)
+        pad_width = ((self.border_padding, self.border_padding),) * 2 + ((0, 0),) * (self.img.ndim - 2)
+        self.padded_img = np.pad(self.img, pad_width, mode='edge')
         self.input_img = self.padded_img
         self._set_img(self.padded_img)
 
@@ -74,16 +65,28 @@ class PlateFit(PlateAlignment):
         bound_R = math.ceil(self.blobs.cols[-1].x_plus.max() + self.border_padding)
         bound_T = math.floor(self.blobs.rows[0].y_minus.min() - self.border_padding)
         bound_B = math.ceil(self.blobs.rows[-1].y_plus.max() + self.border_padding)
-        self._set_img(self.img[bound_T:bound_B, bound_L:bound_R])
-        with plt.ioff():
-            self.cropping_rect = plt.Rectangle((bound_L, bound_T),
-                                               bound_R - bound_L,
-                                               bound_B - bound_T,
-                                               fill=False, edgecolor='white')
+        # Same window a slice of the image would give. The crop is composed with the alignment rotation, so the
+        # aligned image is only resampled once
+        bound_L, bound_T = max(bound_L, 0), max(bound_T, 0)
+        bound_R, bound_B = min(bound_R, self.img_shape[1]), min(bound_B, self.img_shape[0])
+        self._transform_img(self._get_translation_matrix(-bound_L, -bound_T), (bound_B - bound_T, bound_R - bound_L))
+        self.crop_box = (bound_L, bound_T, bound_R - bound_L, bound_B - bound_T)
         log.info("Updating blobs after fitting")
-        self._update_blobs()
+        # Blobs were inside the border filter before the crop, so they only need to stay inside the cropped image
+        self._update_blobs(transform=self._get_translation_matrix(-bound_L, -bound_T), border_filter=0)
         self.status_fitted = True
 
+    @property
+    def cropping_rect(self):
+        """
+        Outline of the crop on the padded image, or None if the plate wasn't fitted
+        """
+        if self.crop_box is None:
+            return None
+        bound_L, bound_T, width, height = self.crop_box
+        with plt.ioff():
+            return plt.Rectangle((bound_L, bound_T), width, height, fill=False, edgecolor='white')
+
     def plot_fitting(self):
         if self.status_alignment is False:
             self.align()
@@ -102,7 +105,7 @@ class PlateFit(PlateAlignment):
             alignFit_ax[1].grid(False)
         return alignFit_fig, alignFit_ax
 
-    def plotAx_fitting(self, ax: plt.Axes, fontsize=24):
+    def plotAx_fitting(self, ax: "plt.Axes", fontsize=24):
         if self.status_alignment is False:
             self.align()
         if self.status_fitted is False:
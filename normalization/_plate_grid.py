@@ -1,6 +1,5 @@
 # ----- Imports -----
 import numpy as np
-import matplotlib.pyplot as plt
 from typing import List
 
 import os
@@ -12,6 +11,28 @@ logging.basicConfig(format=f'[%(asctime)s|%(levelname)s|{os.path.basename(__file
 # ----- Pkg Relative Import -----
 from ._plate_fit import PlateFit
 from ..util.plotting import plot_plate_rows
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
+
+
+def get_well_bounds(rows_midpoints, cols_midpoints, img_shape, n_rows, n_cols):
+    """
+    Bounds of each well of a plate image split at the midpoints between its rows and columns of blobs
+    :return: List of (y_start, y_end, x_start, x_end) tuples, row by row
+    """
+    y_start = np.insert(rows_midpoints, 0, 0).round().astype(int)
+    x_start = np.insert(cols_midpoints, 0, 0).round().astype(int)
+    y_end = np.append(rows_midpoints, img_shape[0] - 1).round().astype(int)
+    x_end = np.append(cols_midpoints, img_shape[1] - 1).round().astype(int)
+
+    well_bounds = []
+    for row_idx in range(n_rows):
+        for col_idx in range(n_cols):
+            well_bounds.append(
+                    (y_start[row_idx], y_end[row_idx], x_start[col_idx], x_end[col_idx])
+            )
+    return well_bounds
 
 
 # ----- Main Class Definition -----
@@ -33,7 +54,7 @@ class PlateGrid(PlateFit):
 
         super().__init__(
                 img=img,
-                border_padding=kwargs.get("border_padding", 50),
+                border_padding=kwargs.pop("border_padding", 50),
                 n_rows=n_rows,
                 n_cols=n_cols,
                 align=align,
@@ -77,25 +98,22 @@ class PlateGrid(PlateFit):
         self.cols_midpoints = ((cols_xMinus[1:] - cols_xPlus[:-1]) / 2) + cols_xPlus[:-1]
         self.status_midpoints = True
 
-    def get_well_imgs(self):
+    def get_well_bounds(self):
+        """
+        Returns the bounds of each well in the plate image, row by row
+        :return: List of (y_start, y_end, x_start, x_end) tuples
+        """
         if self.status_midpoints is False:
             self.find_midpoints()
+        return get_well_bounds(self.rows_midpoints, self.cols_midpoints, self.img_shape, self.n_rows, self.n_cols)
+
+    def get_well_imgs(self):
         log.info(f"Getting well images from plate")
         well_imgs = []
-
-        y_start = np.insert(self.rows_midpoints, 0, 0).round().astype(int)
-        x_start = np.insert(self.cols_midpoints, 0, 0).round().astype(int)
-        y_end = np.append(self.rows_midpoints, self.img.shape[0] - 1).round().astype(int)
-        x_end = np.append(self.cols_midpoints, self.img.shape[1] - 1).round().astype(int)
-
-        for row_idx in range(self.n_rows):
-            for col_idx in range(self.n_cols):
-                well_imgs.append(
-                        self.img[
-                        y_start[row_idx]:y_end[row_idx],
-                        x_start[col_idx]:x_end[col_idx]
-                        ]
-                )
+        for y_start, y_end, x_start, x_end in self.get_well_bounds():
+            well_imgs.append(
+                    self.img[y_start:y_end, x_start:x_end]
+            )
         return well_imgs
 
     def plot_well_grid(self, figsize=(12, 8)):
@@ -106,7 +124,7 @@ class PlateGrid(PlateFit):
             ax = self.plotAx_well_grid(ax)
         return fig, ax
 
-    def plotAx_well_grid(self, ax: plt.Axes, fontsize=24):
+    def plotAx_well_grid(self, ax: "plt.Axes", fontsize=24):
         if self.status_midpoints is False:
             self.find_midpoints()
         with plt.ioff():
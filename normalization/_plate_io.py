@@ -1,7 +1,4 @@
 # ----- Imports -----
-import matplotlib.pyplot as plt
-
-import skimage.io as io
 from skimage.util import img_as_ubyte
 
 import logging
@@ -15,6 +12,11 @@ console_handler.setFormatter(formatter)
 
 # ----- Pkg Relative Import -----
 from ._plate_grid import PlateGrid
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
+# skimage.io loads matplotlib for its plugins, so it is only imported to save images
+io = LazyModule("skimage.io")
 
 
 # ----- Main Class Definition -----
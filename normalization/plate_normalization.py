@@ -1,5 +1,5 @@
-from ._plate_boost import PlateBoost
+from ._plate_cache import PlateCache
 
 
-class PlateNormalization(PlateBoost):
+class PlateNormalization(PlateCache):
     pass
@@ -1,3 +1,13 @@
-from .colony_profile import ColonyProfile
-from .plate_profile import PlateProfile
-from .plate_series import PlateSeries
+from ..util._lazy import attach_lazy_exports
+
+# Exports are imported from their submodule on first access, so importing the package stays cheap
+_LAZY_EXPORTS = {
+    "ColonyProfile": ".colony_profile",
+    "PlateProfile": ".plate_profile",
+    "PlateCheckpoint": "._plate_checkpoint",
+    "ResultsDataset": "._results_dataset",
+    "PlateSeries": ".plate_series",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+__getattr__, __dir__ = attach_lazy_exports(__name__, _LAZY_EXPORTS)
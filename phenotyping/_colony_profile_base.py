@@ -12,9 +12,12 @@ log = logging.getLogger(__name__)
 log.addHandler(console_handler)
 console_handler.setFormatter(formatter)
 
-import matplotlib.pyplot as plt
 from skimage.color import rgb2gray
 
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
+
 
 class ColonyProfileBase:
     def __init__(self, img: np.ndarray, sample_name: str,
@@ -14,24 +14,61 @@ from copy import deepcopy
 import pandas as pd
 import numpy as np
 
-from ..cellprofiler_api import CellProfilerApi
 from ._colony_profile_measure import ColonyProfileMeasure
+from ._well_measurement import measure_wells, format_well_measurements, add_background_name, MEASUREMENT_BACKENDS, \
+    BATCHED_MEASUREMENT_BACKENDS
 
 ##############################################################################
-cp_connection = CellProfilerApi()
+_cp_connection = None
+
+
+def get_cp_connection():
+    """
+    :return: The CellProfilerApi shared by the profiles of this process. It is created on first use, so CellProfiler
+        is only imported and started by processes that measure with it
+    """
+    global _cp_connection
+    if _cp_connection is None:
+        from ..cellprofiler_api import CellProfilerApi
+        _cp_connection = CellProfilerApi()
+    return _cp_connection
+
+
+def measure_batched_wells(well_imgs, colony_masks, backend: str = "numpy", scope_name: str = "plate"):
+    """
+    Measures many wells in one pass with a batched measurement backend
+    :param backend: "numpy" for measure_wells, or "cellprofiler_plate" for a single CellProfiler run over all wells
+    :param scope_name: Name of the CellProfiler workspace scope the wells are measured in
+    :return: List with a (colony, background) tuple of Series per well, or None for a well without a colony
+    """
+    if backend == "cellprofiler_plate":
+        cp_connection = get_cp_connection()
+        with cp_connection.workspace_scope(scope_name):
+            return cp_connection.measure_wells(well_imgs, colony_masks)
+    return measure_wells(well_imgs, colony_masks)
 
 
 class ColonyProfileCellProfilerIntegration(ColonyProfileMeasure):
     """
     Due to how the API works, this class should be the 2nd to last endpoint for the ColonyProfile Class
+
+    The backend selects how the AreaShape, Intensity, Location and Texture features are measured: "cellprofiler"
+    (default) runs the CellProfiler modules, while "numpy" measures them natively from a label image of the well.
+    "cellprofiler_plate" runs the CellProfiler modules on a plate image, which measures all wells of a plate at once
+    when their measurements are set with set_well_measurements.
     """
 
     def __init__(self, img: np.ndarray, sample_name: str,
                  auto_run: bool = True,
                  use_boosted_mask: bool = True,
                  boost_kernel_size: bool = None,
-                 boost_footprint_radius: bool = 5):
+                 boost_footprint_radius: bool = 5,
+                 backend: str = "cellprofiler"):
+        if backend not in MEASUREMENT_BACKENDS:
+            raise ValueError(f"Invalid measurement backend {backend}. Must be one of {MEASUREMENT_BACKENDS}")
+        self.backend = backend
         self._cp_results = None
+        self._well_measurements = None
         super().__init__(
                 img=img,
                 sample_name=sample_name,
@@ -49,60 +86,110 @@ class ColonyProfileCellProfilerIntegration(ColonyProfileMeasure):
                      threshold_method="otsu", use_boosted=True,
                      filter_property="distance_from_center", filter_type="min"
                      ):
-        self.find_colony(threshold_method=threshold_method, use_boosted=use_boosted,
-                         filter_property=filter_property, filter_type=filter_type)
+        if self.colony_mask is None:
+            self.find_colony(threshold_method=threshold_method, use_boosted=use_boosted,
+                             filter_property=filter_property, filter_type=filter_type)
         self.measure_colony()
         self.run_cp_analysis()
+        self.status_analysis = True
+
+    def set_well_measurements(self, measurements: tuple):
+        """
+        Sets the measurements of the well computed outside of this profile, e.g. for all wells of a plate at once by
+        measure_batched_wells, so that a batched backend doesn't need to measure this well again.
+        :param measurements: (colony, background) tuple of Series from measure_batched_wells
+        """
+        self._well_measurements = measurements
 
     def run_cp_analysis(self):
         if self.status_validity:
-            # TODO: FINISH THIS FUNCTION
-            object_measurements = []
-            bg_measurements = []
-            cp_connection.add_img(self.gray_img, self.sample_name)
-
-            cp_connection.add_object(self.colony_mask, self.colony_name, self.sample_name)
-            object_measurements.append(cp_connection.measure_areashape(self.colony_name))
-            object_measurements.append(cp_connection.measure_intensity(
-                    object_name=self.colony_name,
-                    image_name=self.sample_name
-            ))
-            object_measurements.append(cp_connection.measure_texture(
-                    object_name=self.colony_name,
-                    image_name=self.sample_name
-            ))
-
-            cp_connection.add_object(self.background_mask, self.background_name, self.sample_name)
-            bg_measurements.append(cp_connection.measure_areashape(self.background_name))
-            bg_measurements.append(cp_connection.measure_intensity(
-                    object_name=self.background_name,
-                    image_name=self.sample_name
-            ))
-
-            bg_series = pd.concat(bg_measurements,axis=0)
-            bg_series = bg_series.rename(columns={
-                f"{self.background_name}": f"{self.colony_name}",
-            })
-
-            def add_bg_name(name):
-                split = name.split("_")
-                split[1] = f"Background{split[1]}"
-                return "_".join(split)
-
-            bg_series.index=bg_series.index.map(lambda x: add_bg_name(x))
-
-            cp_connection.pipeline.end_run()
-            validity = pd.DataFrame({
-                f"{self.colony_name}": self.status_validity,
-            }, index=["status_valid_analysis"]
-            ).astype(int)
-            self._cp_results = pd.concat([validity, *object_measurements, bg_series], axis=0)
+            if self.backend in BATCHED_MEASUREMENT_BACKENDS:
+                self._run_batched_analysis()
+            else:
+                with get_cp_connection().workspace_scope(self.sample_name):
+                    self._run_cellprofiler_analysis()
         else:
             log.info(f"Did not analyze {self.sample_name} because of invalid status")
 
+    def _run_batched_analysis(self):
+        if self._well_measurements is None:
+            self._well_measurements = measure_batched_wells([self.input_img], [self.colony_mask], self.backend,
+                                                            scope_name=self.sample_name)[0]
+        if self._well_measurements is None:
+            log.warning(f"Could not measure {self.sample_name}")
+            self.status_validity = False
+            return
+        colony_measurements, bg_measurements = format_well_measurements(self.colony_name,
+                                                                        *self._well_measurements)
+
+        validity = pd.DataFrame({
+            f"{self.colony_name}": self.status_validity,
+        }, index=["status_valid_analysis"]
+        ).astype(int)
+        self._cp_results = pd.concat([validity, colony_measurements, bg_measurements], axis=0)
+
+    def _run_cellprofiler_analysis(self):
+        # TODO: FINISH THIS FUNCTION
+        cp_connection = get_cp_connection()
+        object_measurements = []
+        bg_measurements = []
+        cp_connection.add_img(self.gray_img, self.sample_name)
+
+        cp_connection.add_object(self.colony_mask, self.colony_name, self.sample_name)
+        object_measurements.append(cp_connection.measure_areashape(self.colony_name))
+        object_measurements.append(cp_connection.measure_intensity(
+                object_name=self.colony_name,
+                image_name=self.sample_name
+        ))
+        object_measurements.append(cp_connection.measure_texture(
+                object_name=self.colony_name,
+                image_name=self.sample_name
+        ))
+
+        cp_connection.add_object(self.background_mask, self.background_name, self.sample_name)
+        bg_measurements.append(cp_connection.measure_areashape(self.background_name))
+        bg_measurements.append(cp_connection.measure_intensity(
+                object_name=self.background_name,
+                image_name=self.sample_name
+        ))
+
+        bg_series = pd.concat(bg_measurements,axis=0)
+        bg_series = bg_series.rename(columns={
+            f"{self.background_name}": f"{self.colony_name}",
+        })
+
+        bg_series.index=bg_series.index.map(lambda x: add_background_name(x))
+
+        cp_connection.pipeline.end_run()
+        validity = pd.DataFrame({
+            f"{self.colony_name}": self.status_validity,
+        }, index=["status_valid_analysis"]
+        ).astype(int)
+        self._cp_results = pd.concat([validity, *object_measurements, bg_series], axis=0)
+
 
 class CellProfilerApiConnection:
-    _cp_api_connection = cp_connection
+    @property
+    def _cp_api_connection(self):
+        return get_cp_connection()
+
+    @property
+    def scope_report(self):
+        """
+        :return: ScopeReport with the peak RSS of the last workspace scope, or None before the first scope
+        """
+        if _cp_connection is None:
+            return None
+        return _cp_connection.scope_report
 
     def refresh(self):
-        self._cp_api_connection.refresh()
+        # A process that hasn't measured with CellProfiler yet gets a new workspace on first use anyway
+        if _cp_connection is not None:
+            _cp_connection.refresh()
+
+    def workspace_scope(self, name: str):
+        """
+        :return: Context manager that releases the CellProfiler workspace when it exits, see
+            CellProfilerApiBase.workspace_scope
+        """
+        return self._cp_api_connection.workspace_scope(name)
@@ -37,9 +37,11 @@ class ColonyProfileMeasureBase(ColonyProfilePlotObject):
                      threshold_method="otsu", use_boosted=True,
                      filter_property="distance_from_center", filter_type="min"
                      ):
-        self.find_colony(threshold_method=threshold_method, use_boosted=use_boosted,
-                         filter_property=filter_property, filter_type=filter_type)
+        if self.colony_mask is None:
+            self.find_colony(threshold_method=threshold_method, use_boosted=use_boosted,
+                             filter_property=filter_property, filter_type=filter_type)
         self.measure_colony()
+        self.status_analysis = True
 
     @property
     def _results(self):
@@ -31,6 +31,8 @@ class ColonyProfileObject(ColonyProfileBase):
         self.use_boost = use_boosted_mask
         self.boost_kernel_size = boost_kernel_size
         self.boost_footprint_radius = boost_footprint_radius
+        self.clahe_boost = ClaheBoost(kernel_size=self.boost_kernel_size,
+                                      footprint_radius=self.boost_footprint_radius)
 
         # Inititialize Params
         self.thresh = None
@@ -47,12 +49,11 @@ class ColonyProfileObject(ColonyProfileBase):
     @property
     def boosted_img(self):
         """
-        ClaheBoost parameters are optimized for an image of a single well
+        ClaheBoost parameters are optimized for an image of a single well. The boosted image is computed once per
+        input image.
         :return:
         """
-        return ClaheBoost(self.gray_img,
-                          kernel_size=self.boost_kernel_size,
-                          footprint_radius=self.boost_footprint_radius).get_boosted_img()
+        return self.clahe_boost.boost(self.input_img)
 
     @property
     def background_mask(self):
@@ -96,6 +97,23 @@ class ColonyProfileObject(ColonyProfileBase):
                 log.warning(f"Failed to find colony for {self.sample_name}")
                 self.status_validity = False
 
+    def set_colony_segmentation(self, segmentation: dict):
+        """
+        Sets a colony segmentation computed outside of this profile, e.g. by ColonySegmentation for a whole plate,
+        so that find_colony doesn't need to run again for this well.
+        :param segmentation: A segmentation from ColonySegmentation, or None if no colony was found
+        """
+        if segmentation is None:
+            log.warning(f"Failed to find colony for {self.sample_name}")
+            self.status_validity = False
+        else:
+            self.thresh = segmentation["thresh"]
+            self.segmentation = segmentation["segmentation"]
+            self.labeled_segmentation = segmentation["labeled_segmentation"]
+            self.segment_properties = segmentation["segment_properties"]
+            self.colony_mask = segmentation["colony_mask"]
+            self.status_object = True
+
     def _find_colony(self, threshold_method="otsu", use_boosted=True,
                      filter_property="distance_from_center", filter_type="min",
                      **kwargs
@@ -1,8 +1,10 @@
-import matplotlib.pyplot as plt
 import numpy.ma as ma
 import numpy as np
 
 from ._colony_profile_object import ColonyProfileObject
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
 
 
 class ColonyProfilePlotObject(ColonyProfileObject):
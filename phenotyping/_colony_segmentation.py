@@ -0,0 +1,287 @@
+import logging
+
+formatter = logging.Formatter(
+        fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+        datefmt='%m/%d/%Y %I:%M:%S'
+)
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import numpy as np
+import pandas as pd
+from typing import List
+from scipy import ndimage as ndi
+from scipy.ndimage import binary_fill_holes
+from skimage.filters import threshold_triangle
+from skimage.morphology import white_tophat, disk
+
+from ..detection import ClaheBoost
+
+
+class ColonySegmentation:
+    """
+    Segments the colonies of every well of a plate in one pass, giving the same colony masks as running
+    ColonyProfileObject.find_colony on each well image.
+
+    The stages that depend on the whole well image (CLAHE, boost tophat) still run per well, but the grayscale
+    conversion runs once on the plate, the Otsu thresholds come from a single histogram of all wells, the
+    labeling and region properties run on one stacked tensor of the wells, and the hole filling and particle
+    filtering use distance transforms instead of the large-footprint morphology.
+    """
+
+    def __init__(self, boost_kernel_size=None, boost_footprint_radius=5,
+                 threshold_method="otsu", use_boosted=True,
+                 hole_radius=10, particle_radius=None,
+                 filter_property="distance_from_center", filter_type="min"
+                 ):
+        if threshold_method not in ["otsu", "triangle"]:
+            raise ValueError("Unknown threshold method for finding objects")
+        if filter_type not in ["min", "max"]:
+            raise ValueError("Invalid filter_type. Currently implemented filter types are 'min' or 'max'")
+
+        self.clahe_boost = ClaheBoost(kernel_size=boost_kernel_size, footprint_radius=boost_footprint_radius)
+        self.threshold_method = threshold_method
+        self.use_boosted = use_boosted
+        self.hole_radius = hole_radius
+        self.particle_radius = particle_radius
+        self.filter_property = filter_property
+        self.filter_type = filter_type
+
+    @property
+    def params(self):
+        """
+        Every setting the segmentation depends on, e.g. to key cached segmentations
+        """
+        return {
+            "boost_kernel_size": self.clahe_boost.kernel_size,
+            "boost_footprint_radius": self.clahe_boost.footprint_radius,
+            "boost_footprint_shape": self.clahe_boost.footprint_shape,
+            "threshold_method": self.threshold_method,
+            "use_boosted": self.use_boosted,
+            "hole_radius": self.hole_radius,
+            "particle_radius": self.particle_radius,
+            "filter_property": self.filter_property,
+            "filter_type": self.filter_type,
+        }
+
+    def segment_plate(self, plate_img: np.ndarray, well_bounds: List[tuple]):
+        """
+        Segments the colonies of a plate image split by the well grid
+        :param plate_img: RGB or grayscale plate image
+        :param well_bounds: List of (y_start, y_end, x_start, x_end) tuples from PlateGrid.get_well_bounds()
+        :return: List with the segmentation of each well, or None where no colony could be found
+        """
+        if self.use_boosted:
+            # The grayscale conversion is per pixel, so it can run once on the whole plate
+            gray_img = self.clahe_boost._get_gray_img(plate_img)
+        else:
+            gray_img = _get_float_gray_img(plate_img)
+        return self._segment([gray_img[y_start:y_end, x_start:x_end]
+                              for y_start, y_end, x_start, x_end in well_bounds])
+
+    def segment(self, well_imgs: List[np.ndarray]):
+        """
+        Segments the colonies of a list of well images
+        :return: List with the segmentation of each well, or None where no colony could be found
+        """
+        if self.use_boosted:
+            gray_imgs = [self.clahe_boost._get_gray_img(well_img) for well_img in well_imgs]
+        else:
+            gray_imgs = [_get_float_gray_img(well_img) for well_img in well_imgs]
+        return self._segment(gray_imgs)
+
+    def _segment(self, gray_imgs):
+        if self.use_boosted:
+            imgs = [self.clahe_boost.boost(gray_img) for gray_img in gray_imgs]
+        else:
+            imgs = gray_imgs
+
+        if self.threshold_method == "otsu" and all(img.dtype == np.uint8 for img in imgs):
+            threshes = _batch_threshold_otsu(imgs)
+        elif self.threshold_method == "otsu":
+            from skimage.filters import threshold_otsu
+            threshes = [threshold_otsu(img) for img in imgs]
+        else:
+            threshes = [threshold_triangle(img) for img in imgs]
+
+        segmentations = []
+        for img, thresh in zip(imgs, threshes):
+            segmentation = _fill_holes(img > thresh, self.hole_radius)
+            particle_radius = self.particle_radius
+            if particle_radius is None:
+                particle_radius = np.round(max(segmentation.shape) / 20)
+            segmentations.append(_binary_opening(segmentation, particle_radius))
+
+        labeled_segmentations, segment_properties = _batch_label(segmentations)
+
+        results = []
+        for idx, (labeled_segmentation, properties) in enumerate(zip(labeled_segmentations, segment_properties)):
+            if len(properties) == 0:
+                results.append(None)
+                continue
+            if self.filter_type == "min":
+                colony_label = properties[f"{self.filter_property}"].idxmin()
+            else:
+                colony_label = properties[f"{self.filter_property}"].idxmax()
+            results.append({
+                "thresh": threshes[idx],
+                "segmentation": segmentations[idx],
+                "labeled_segmentation": labeled_segmentation,
+                "segment_properties": properties,
+                "colony_mask": labeled_segmentation == colony_label,
+            })
+        return results
+
+
+def _get_float_gray_img(img):
+    from skimage.color import rgb2gray
+    if img.ndim == 3:
+        return rgb2gray(img)
+    return img
+
+
+def _batch_threshold_otsu(imgs: List[np.ndarray]):
+    """
+    Otsu thresholds of many uint8 images from a single stacked histogram. Every step matches skimage's
+    threshold_otsu on integer images, so the thresholds are identical.
+    """
+    n_imgs = len(imgs)
+    if n_imgs == 0:
+        return []
+    img_idx = np.repeat(np.arange(n_imgs), [img.size for img in imgs])
+    values = np.concatenate([img.ravel() for img in imgs]).astype(np.intp)
+    counts = np.bincount(img_idx * 256 + values, minlength=n_imgs * 256).reshape(n_imgs, 256)
+
+    present = counts > 0
+    img_min = np.argmax(present, axis=1)
+    img_max = 255 - np.argmax(present[:, ::-1], axis=1)
+
+    counts = counts.astype(np.float32)
+    bin_centers = np.arange(256, dtype=np.intp)
+    # Bins outside of an image's range are zero, so they don't change the cumulative sums within the range
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight1 = np.cumsum(counts, axis=1)
+        weight2 = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1]
+        mean1 = np.cumsum(counts * bin_centers, axis=1) / weight1
+        mean2 = (np.cumsum((counts * bin_centers)[:, ::-1], axis=1) / weight2[:, ::-1])[:, ::-1]
+        variance12 = weight1[:, :-1] * weight2[:, 1:] * (mean1[:, :-1] - mean2[:, 1:]) ** 2
+
+    in_range = (bin_centers[:-1] >= img_min[:, None]) & (bin_centers[:-1] < img_max[:, None])
+    variance12 = np.where(in_range, variance12, -np.inf)
+    threshes = np.argmax(variance12, axis=1)
+
+    # Images with a single intensity are thresholded at that intensity
+    single_value = img_min == img_max
+    threshes[single_value] = img_min[single_value]
+    return [np.uint8(thresh) if single else np.intp(thresh)
+            for thresh, single in zip(threshes, single_value)]
+
+
+def _fill_holes(segmentation, hole_radius):
+    """
+    Same result as binary_fill_holes(segmentation, structure=disk(hole_radius)). Background components are grown
+    from the image border with one distance transform per step instead of one dilation per pixel of distance.
+    """
+    if hole_radius < 2:
+        return binary_fill_holes(input=segmentation, structure=disk(hole_radius))
+
+    background = ~segmentation
+    components, n_components = ndi.label(background, structure=np.ones((3, 3)))
+    if n_components == 0:
+        return segmentation.copy()
+
+    # Everything outside of the image is already reached
+    reached = np.zeros(n_components + 1, dtype=bool)
+    seeds = np.ones((segmentation.shape[0] + 2, segmentation.shape[1] + 2), dtype=bool)
+    seeds[1:-1, 1:-1] = False
+    while True:
+        distance = ndi.distance_transform_edt(~seeds)[1:-1, 1:-1]
+        touched = np.unique(components[(distance <= hole_radius) & background])
+        touched = touched[~reached[touched]]
+        if len(touched) == 0:
+            break
+        reached[touched] = True
+        seeds[1:-1, 1:-1] = reached[components]
+    # The foreground has label 0, which is never reached
+    return ~reached[components]
+
+
+def _binary_opening(segmentation, radius):
+    """
+    Same result as segmentation & ~white_tophat(segmentation, disk(radius)), including skimage's reflected image
+    border, computed with two distance transforms. The distance test only reproduces disk() for whole radii, so other
+    radii, e.g. a particle_radius of 4.5, use white_tophat itself.
+    """
+    pad = int(np.floor(radius))
+    if pad < 1 or pad != radius:
+        return segmentation & ~white_tophat(segmentation, footprint=disk(radius))
+
+    def erode(mask):
+        padded = np.pad(mask, pad, mode="symmetric")
+        if padded.all():
+            return mask.copy()
+        return ndi.distance_transform_edt(padded)[pad:-pad, pad:-pad] > radius
+
+    def dilate(mask):
+        padded = np.pad(mask, pad, mode="symmetric")
+        if not padded.any():
+            return mask.copy()
+        return ndi.distance_transform_edt(~padded)[pad:-pad, pad:-pad] <= radius
+
+    return dilate(erode(segmentation))
+
+
+def _batch_label(segmentations: List[np.ndarray]):
+    """
+    Labels the objects of many binary images at once by stacking them into one zero-padded tensor.
+    :return: The labeled images, numbered from 1 per image like skimage's label, and their region properties
+    """
+    n_imgs = len(segmentations)
+    if n_imgs == 0:
+        return [], []
+    height = max(segmentation.shape[0] for segmentation in segmentations)
+    width = max(segmentation.shape[1] for segmentation in segmentations)
+    stack = np.zeros((n_imgs, height, width), dtype=bool)
+    for idx, segmentation in enumerate(segmentations):
+        stack[idx, :segmentation.shape[0], :segmentation.shape[1]] = segmentation
+
+    # 8-connectivity within each image and no connectivity between them
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = True
+    labels, n_labels = ndi.label(stack, structure=structure)
+
+    # Region properties from the labeled pixels only
+    pixel_idx = np.flatnonzero(labels)
+    label_idx = labels.ravel()[pixel_idx]
+    pixel_img, pixel_idx = np.divmod(pixel_idx, height * width)
+    pixel_row, pixel_col = np.divmod(pixel_idx, width)
+    area = np.bincount(label_idx, minlength=n_labels + 1)
+    row_sum = np.bincount(label_idx, weights=pixel_row, minlength=n_labels + 1)
+    col_sum = np.bincount(label_idx, weights=pixel_col, minlength=n_labels + 1)
+    img_of_label = np.full(n_labels + 1, -1, dtype=np.intp)
+    img_of_label[label_idx] = pixel_img
+
+    labeled_segmentations = []
+    segment_properties = []
+    for idx, segmentation in enumerate(segmentations):
+        img_labels = np.flatnonzero(img_of_label[1:] == idx) + 1
+        offset = img_labels[0] - 1 if len(img_labels) > 0 else 0
+        labeled_segmentation = labels[idx, :segmentation.shape[0], :segmentation.shape[1]].copy()
+        labeled_segmentation[labeled_segmentation > 0] -= offset
+        labeled_segmentations.append(labeled_segmentation)
+
+        properties = pd.DataFrame({
+            "label": img_labels - offset,
+            "area": area[img_labels].astype(np.float64),
+            "centroid-0": row_sum[img_labels] / area[img_labels],
+            "centroid-1": col_sum[img_labels] / area[img_labels],
+        }).set_index("label")
+        center_row = segmentation.shape[0] / 2
+        center_col = segmentation.shape[1] / 2
+        properties["distance_from_center"] = np.sqrt(
+                (properties["centroid-0"] - center_row) ** 2 + (properties["centroid-1"] - center_col) ** 2
+        )
+        segment_properties.append(properties)
+    return labeled_segmentations, segment_properties
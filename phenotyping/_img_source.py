@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+
+# ----- Pkg Relative Import -----
+from ..util._cache import hash_img, hash_file
+from ..util._lazy import LazyModule
+
+# skimage.io loads matplotlib for its plugins, so it is only imported to read images
+io = LazyModule("skimage.io")
+
+
+def is_img_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def load_img(source):
+    """
+    Decodes the image of a plate
+    :param source: An image array, the path of an image file, or a callable taking no arguments that returns the image
+    :return: The image as np.ndarray
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if is_img_path(source):
+        return io.imread(os.fspath(source))
+    if callable(source):
+        return source()
+    raise TypeError(f"Invalid image source of type {type(source).__name__}. Must be an array, a path or a callable")
+
+
+def get_source_path(source):
+    """
+    :return: Path of the image source, or None if it isn't a file
+    """
+    return os.fspath(source) if is_img_path(source) else None
+
+
+def hash_source(source, img: np.ndarray = None):
+    """
+    Hash identifying the image of a source. Files are hashed by their bytes, so they don't have to be decoded.
+    :param img: The decoded image of the source, if it was already loaded
+    """
+    if is_img_path(source):
+        return hash_file(os.fspath(source))
+    return hash_img(load_img(source) if img is None else img)
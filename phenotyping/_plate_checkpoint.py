@@ -0,0 +1,253 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import json
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# ----- Pkg Relative Import -----
+from ._plate_profile_base import _get_metadata, STATUS_VALIDITY_LABEL
+from ._plate_profile_results import PlateProfileResults
+from ..normalization._plate_grid import get_well_bounds
+
+# ----- Global Constants -----
+CHECKPOINT_FORMAT_VERSION = 1
+
+# The state file is written last, so a plate directory without one is an unfinished checkpoint
+STATE_FNAME = "state.json"
+IMG_FNAME = "img.npy"
+BLOBS_FNAME = "blobs.pkl"
+MEASUREMENTS_FNAME = "measurements.npy"
+MASKS_FNAME = "masks.npz"
+
+
+def encode_rle(mask: np.ndarray):
+    """
+    Run-length encodes a boolean mask in row-major order
+    :return: uint32 array with the lengths of the runs, alternating between False and True and starting with False
+    """
+    flat = np.asarray(mask, dtype=bool).ravel()
+    change_idx = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    boundaries = np.concatenate([[0], change_idx, [flat.size]])
+    runs = np.diff(boundaries)
+    if flat.size != 0 and flat[0]:
+        runs = np.concatenate([[0], runs])
+    return runs.astype(np.uint32)
+
+
+def decode_rle(runs: np.ndarray, shape):
+    """
+    :param runs: Run lengths from encode_rle()
+    :return: Boolean mask of the given shape
+    """
+    values = np.arange(len(runs)) % 2 == 1
+    return np.repeat(values, runs).reshape(shape)
+
+
+def is_checkpointed(dirpath: str):
+    """
+    :return: Whether dirpath holds a finished plate checkpoint
+    """
+    return os.path.exists(os.path.join(dirpath, STATE_FNAME))
+
+
+def _to_list(array):
+    # Also turns numpy scalars into python numbers, which json can write
+    return None if array is None else np.asarray(array).tolist()
+
+
+def save_plate(plate, dirpath: str, save_img: bool = True, img_hash: str = None):
+    """
+    Saves the analysis state of a plate to a directory: the normalized image, the blob table and well grid, the colony
+    mask of each well as run lengths, the measurement matrix and the validity flags. Plates profiled in a worker
+    process only have their results, so only the results are saved for them.
+    :param plate: An analyzed PlateProfile, PlateProfileResults or PlateCheckpoint
+    :param save_img: Whether to save the normalized image, which is the largest part of the checkpoint
+    :param img_hash: Hash of the input image, see util._cache.hash_img(). Used to check that a checkpoint belongs to
+        the image a resumed batch is given
+    """
+    os.makedirs(dirpath, exist_ok=True)
+    state_path = os.path.join(dirpath, STATE_FNAME)
+    # An overwritten checkpoint is unfinished until its new state is written
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+    measurement_results = plate.measurement_results
+    np.save(os.path.join(dirpath, MEASUREMENTS_FNAME), measurement_results.to_numpy(dtype=np.float64))
+
+    has_img = save_img and hasattr(plate, "img") and plate.img is not None
+    if has_img:
+        np.save(os.path.join(dirpath, IMG_FNAME), np.ascontiguousarray(plate.img))
+
+    blobs_table = getattr(plate, "blobs_table", None)
+    if blobs_table is None and hasattr(plate, "blobs"):
+        blobs_table = plate.blobs.table
+    if blobs_table is not None:
+        blobs_table.to_pickle(os.path.join(dirpath, BLOBS_FNAME))
+
+    colony_masks = _get_colony_masks(plate)
+    if colony_masks is not None:
+        _save_masks(os.path.join(dirpath, MASKS_FNAME), colony_masks)
+
+    state = {
+        "format_version": CHECKPOINT_FORMAT_VERSION,
+        "sample_name": plate.sample_name,
+        "sampling_day": None if pd.isna(plate.sampling_day) else _to_list(plate.sampling_day),
+        "n_rows": getattr(plate, "n_rows", None),
+        "n_cols": getattr(plate, "n_cols", None),
+        "img_hash": img_hash,
+        "status_validity": bool(getattr(plate, "status_validity", True)),
+        "degree_of_rotation": _to_list(getattr(plate, "degree_of_rotation", None)),
+        "rows_midpoints": _to_list(getattr(plate, "rows_midpoints", None)),
+        "cols_midpoints": _to_list(getattr(plate, "cols_midpoints", None)),
+        "img_shape": list(plate.img.shape) if has_img else None,
+        "features": measurement_results.index.tolist(),
+        "wells": measurement_results.columns.tolist(),
+        "has_img": has_img,
+        "has_blobs": blobs_table is not None,
+        "has_masks": colony_masks is not None,
+    }
+    with open(state_path, "w") as state_file:
+        json.dump(state, state_file)
+    log.info(f"Saved the checkpoint of {plate.sample_name} to {dirpath}")
+
+
+def _get_colony_masks(plate):
+    if isinstance(plate, PlateCheckpoint):
+        return plate.colony_masks
+    wells = getattr(plate, "wells", None)
+    if not wells:
+        return None
+    return [getattr(well, "colony_mask", None) for well in wells]
+
+
+def _save_masks(filepath, colony_masks: List[np.ndarray]):
+    runs = []
+    shapes = np.zeros((len(colony_masks), 2), dtype=np.int64)
+    has_mask = np.zeros(len(colony_masks), dtype=bool)
+    for idx, colony_mask in enumerate(colony_masks):
+        if colony_mask is None:
+            runs.append(np.zeros(0, dtype=np.uint32))
+            continue
+        runs.append(encode_rle(colony_mask))
+        shapes[idx] = colony_mask.shape
+        has_mask[idx] = True
+    offsets = np.cumsum([0] + [len(well_runs) for well_runs in runs])
+    np.savez_compressed(filepath, runs=np.concatenate(runs) if runs else np.zeros(0, dtype=np.uint32),
+                        offsets=offsets, shapes=shapes, has_mask=has_mask)
+
+
+# ----- Main Class Definition -----
+class PlateCheckpoint(PlateProfileResults):
+    """
+    Plate loaded from a checkpoint written by save_plate(). Only the state file is read when the checkpoint is loaded;
+    the measurement matrix, blob table and colony masks are read on first use, and the normalized image is memory
+    mapped, so results can be re-exported without reading the images.
+    """
+
+    def __init__(self, dirpath: str, state: dict):
+        self.dirpath = dirpath
+        self.state = state
+        self.sample_name = state["sample_name"]
+        self.sampling_day = np.nan if state["sampling_day"] is None else state["sampling_day"]
+        self.n_rows = state["n_rows"]
+        self.n_cols = state["n_cols"]
+        self.img_hash = state["img_hash"]
+        self.status_validity = state["status_validity"]
+        self.degree_of_rotation = state["degree_of_rotation"]
+        self.rows_midpoints = None if state["rows_midpoints"] is None else np.array(state["rows_midpoints"])
+        self.cols_midpoints = None if state["cols_midpoints"] is None else np.array(state["cols_midpoints"])
+
+        self._img = self._measurement_results = self._blobs_table = self._colony_masks = None
+        self._results_table = None
+
+    @classmethod
+    def load(cls, dirpath: str):
+        """
+        :return: PlateCheckpoint of the plate saved in dirpath
+        """
+        with open(os.path.join(dirpath, STATE_FNAME), "r") as state_file:
+            state = json.load(state_file)
+        if state["format_version"] != CHECKPOINT_FORMAT_VERSION:
+            raise ValueError(f"Checkpoint {dirpath} has format version {state['format_version']}, "
+                             f"expected {CHECKPOINT_FORMAT_VERSION}")
+        return cls(dirpath, state)
+
+    def save_checkpoint(self, dirpath: str, save_img: bool = True, img_hash: str = None):
+        save_plate(self, dirpath, save_img=save_img, img_hash=self.img_hash if img_hash is None else img_hash)
+
+    def __getattr__(self, item):
+        if item.startswith("plot_") or item == "wells":
+            raise AttributeError(f"'{item}' is not available on a plate loaded from a checkpoint. Use its img, "
+                                 f"colony_masks and get_well_imgs() instead")
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'")
+
+    @property
+    def measurement_results(self):
+        if self._measurement_results is None:
+            self._measurement_results = pd.DataFrame(np.load(os.path.join(self.dirpath, MEASUREMENTS_FNAME)),
+                                                     index=self.state["features"], columns=self.state["wells"])
+        return self._measurement_results
+
+    @property
+    def _results(self):
+        return pd.concat([_get_metadata(self.measurement_results.columns, self.sampling_day, self.sample_name),
+                          self.measurement_results], axis=0)
+
+    @property
+    def well_validity(self):
+        """
+        :return: Whether the analysis of each well is valid, in plate order
+        """
+        return self.measurement_results.loc[STATUS_VALIDITY_LABEL].astype(bool).to_numpy()
+
+    @property
+    def img(self):
+        if not self.state["has_img"]:
+            return None
+        if self._img is None:
+            self._img = np.load(os.path.join(self.dirpath, IMG_FNAME), mmap_mode="r")
+        return self._img
+
+    @property
+    def blobs_table(self):
+        if not self.state["has_blobs"]:
+            return None
+        if self._blobs_table is None:
+            self._blobs_table = pd.read_pickle(os.path.join(self.dirpath, BLOBS_FNAME))
+        return self._blobs_table
+
+    @property
+    def colony_masks(self):
+        """
+        :return: Colony mask of each well, with None where no colony was found, or None if the masks weren't saved
+        """
+        if not self.state["has_masks"]:
+            return None
+        if self._colony_masks is None:
+            with np.load(os.path.join(self.dirpath, MASKS_FNAME)) as masks:
+                runs, offsets, shapes, has_mask = masks["runs"], masks["offsets"], masks["shapes"], masks["has_mask"]
+            self._colony_masks = [
+                decode_rle(runs[offsets[idx]:offsets[idx + 1]], tuple(shapes[idx])) if has_mask[idx] else None
+                for idx in range(len(has_mask))
+            ]
+        return self._colony_masks
+
+    def get_well_bounds(self):
+        if self.rows_midpoints is None or self.state["img_shape"] is None:
+            raise AttributeError(f"The checkpoint of {self.sample_name} has no well grid")
+        return get_well_bounds(self.rows_midpoints, self.cols_midpoints, self.state["img_shape"],
+                               self.n_rows, self.n_cols)
+
+    def get_well_imgs(self):
+        return [np.asarray(self.img[y_start:y_end, x_start:x_end])
+                for y_start, y_end, x_start, x_end in self.get_well_bounds()]
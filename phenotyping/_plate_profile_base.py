@@ -9,21 +9,20 @@ log = logging.getLogger(__name__)
 log.addHandler(console_handler)
 console_handler.setFormatter(formatter)
 
+import os
 import pandas as pd
 import numpy as np
 from typing import List
+from concurrent.futures.process import BrokenProcessPool
 
 from ..normalization.plate_normalization import PlateNormalization
-from .colony_profile import ColonyProfile, CellProfilerApiConnection
-
-METADATA_LABELS = [
-    (STATUS_VALIDITY_LABEL := "status_valid_analysis"),
-    (ORIGIN_PLATE_ID_LABEL := "origin_plate_id")
-]
-
-NUMERIC_METADATA_LABELS = [
-    (SAMPLING_DAY_LABEL := "sampling_day"),
-]
+from .colony_profile import CellProfilerApiConnection
+from ._well_profiling import share_img, profile_well, profile_wells, measure_segmented_wells, get_well_executor, \
+    discard_well_executor, is_worker_process, SEGMENTATION_METHODS
+from ._well_measurement import MEASUREMENT_BACKENDS, BATCHED_MEASUREMENT_BACKENDS
+from ._colony_segmentation import ColonySegmentation
+from ._results_table import ResultsTable, STATUS_VALIDITY_LABEL, ORIGIN_PLATE_ID_LABEL, SAMPLING_DAY_LABEL
+from ..util._cache import get_cache_key
 
 PHENOMICS_MEASUREMENTS = [
     "Intensity_IntegratedColorIntensityRed",
@@ -33,14 +32,46 @@ PHENOMICS_MEASUREMENTS = [
     "ImgWidth"
 ]
 
-BASIC_CP_API_MEASUREMENT_LABELS = [
-    "AreaShape",
-    "Intensity",
-    "Texture"
-]
+
+def _get_metadata(col_idx, sampling_day, sample_name):
+    """
+    :return: Metadata rows of a plate results table, with the sampling day and origin plate of every colony
+    """
+    day = pd.DataFrame({
+        f"{SAMPLING_DAY_LABEL}": np.full(shape=len(col_idx), fill_value=sampling_day)
+    }, index=col_idx).transpose()
+    origin_plate_id = pd.DataFrame({
+        f"{ORIGIN_PLATE_ID_LABEL}": np.full(shape=len(col_idx), fill_value=sample_name)
+    }, index=col_idx).transpose()
+    return pd.concat([day, origin_plate_id], axis=0)
+
 
 # ----- Main Class Definition -----
 class PlateProfileBase(PlateNormalization):
+    """
+    Well profiling can be spread over worker processes with the well_n_jobs kwarg (1 by default, -1 or None for every
+    core). The plate image is placed in shared memory once and each worker profiles chunks of well_chunksize wells.
+    Wells profiled by workers only return their results, so the well plots are only available with well_n_jobs=1. The
+    well workers are shared by every plate of the process, and plates profiled inside a worker process, e.g. by a
+    PlateSeries with n_jobs > 1, profile their wells serially instead of starting workers of their own.
+
+    The segmentation_method kwarg selects how the colonies are segmented: "well" (default) runs find_colony within
+    each ColonyProfile, while "plate" segments all wells at once with ColonySegmentation, giving the same colony masks.
+
+    The measurement_backend kwarg selects how the wells are measured: "cellprofiler" (default), "numpy" or
+    "cellprofiler_plate", see ColonyProfile. With the "numpy" or "cellprofiler_plate" backend and the "plate"
+    segmentation method, the AreaShape, Intensity, Location and Texture features of every well are measured together
+    in a single pass.
+
+    With the cache kwarg, see PlateNormalization, the colony segmentations of the "plate" segmentation method and the
+    measurement results are cached as well. Each is keyed on the key of the stage before it, so changing the
+    measurement backend reuses the cached normalization and segmentation. Plates restored from the cache only have
+    their results, so the well plots are not available for them.
+
+    The measurements are kept in a ResultsTable, a float32 wells x features matrix that get_results() returns
+    read-only views of. measurement_results is a read-only view of the same matrix with the features row-wise.
+    Copy them to edit them.
+    """
     # TODO: Change plate to be an image instead and have plate be generated from the image
     def __init__(self, img: np.ndarray, sample_name: str,
                  sampling_day: int = np.nan,
@@ -53,13 +84,25 @@ class PlateProfileBase(PlateNormalization):
         self.__sample_name = sample_name
         self.wells = []
         self.measurement_results = None
+        self._results_table = None
         self.sampling_day = sampling_day
 
         self.cp_connnection = CellProfilerApiConnection()
+        self.well_n_jobs = kwargs.get("well_n_jobs", 1)
+        self.well_chunksize = kwargs.get("well_chunksize", None)
+        self.segmentation_method = kwargs.get("segmentation_method", "well")
+        if self.segmentation_method not in SEGMENTATION_METHODS:
+            raise ValueError(f"Invalid segmentation method {self.segmentation_method}. "
+                             f"Must be one of {SEGMENTATION_METHODS}")
+        self.measurement_backend = kwargs.get("measurement_backend", "cellprofiler")
+        if self.measurement_backend not in MEASUREMENT_BACKENDS:
+            raise ValueError(f"Invalid measurement backend {self.measurement_backend}. "
+                             f"Must be one of {MEASUREMENT_BACKENDS}")
         self.status_well_analysis = False
 
+        # The plate is always normalized on construction, auto_analyze only decides whether the wells are profiled
         super().__init__(img=img, n_rows=n_rows, n_cols=n_cols,
-                         align=align, fit=fit, use_boost=use_boost, auto_run=auto_analyze,
+                         align=align, fit=fit, use_boost=use_boost, auto_run=True,
                          **kwargs)
 
         if auto_analyze:
@@ -77,58 +120,162 @@ class PlateProfileBase(PlateNormalization):
         """
         return self.get_results()
 
+    @property
+    def segmentation_key(self):
+        """
+        Cache key of the colony segmentations, or None without a cache
+        """
+        if self.result_cache is None:
+            return None
+        # The "well" method segments with the defaults of ColonyProfile, which ColonySegmentation matches
+        params = {"segmentation_method": self.segmentation_method, **ColonySegmentation().params}
+        return get_cache_key("segmentation", params, parent_key=self.normalization_key)
+
+    @property
+    def measurement_key(self):
+        """
+        Cache key of the measurement results, or None without a cache
+        """
+        if self.result_cache is None:
+            return None
+        # The results are labeled with the well names, so they depend on the sample name
+        params = {"sample_name": self.sample_name, "measurement_backend": self.measurement_backend}
+        return get_cache_key("measurement", params, parent_key=self.segmentation_key)
+
     def generate_well_profiles(self):
         if self.status_well_analysis is False:
-            well_imgs = self.get_well_imgs()
-            self.cp_connnection.refresh()
-
-            self.measurement_results = []
-            for idx, well_img in enumerate(well_imgs):
-                log.debug(f"Starting well analysis for {self.sample_name}_well({idx:03d})")
-                tmp_well_name = f"{self.sample_name}_well({idx:03d})"
-                well_profile = ColonyProfile(
-                        well_img, tmp_well_name, auto_run=True
-                )
-                self.measurement_results.append(well_profile.get_results())
-                self.wells.append(well_profile)
-            self.measurement_results = pd.concat(self.measurement_results, axis=1)
-            self.measurement_results = self.measurement_results.loc[:, ~self.measurement_results.columns.duplicated()]
+            measurement_key = self.measurement_key
+            cached_results = None if measurement_key is None else self.result_cache.get(measurement_key)
+            if cached_results is not None:
+                log.info(f"Restoring the well profiles of {self.sample_name} from the cache")
+                self.measurement_results = cached_results
+                self._results_table = None
+            else:
+                if self._n_well_workers > 1:
+                    well_results = self._profile_wells_parallel()
+                else:
+                    well_results = self._profile_wells_serial()
+                self._results_table = ResultsTable.from_well_results(well_results, self.sample_name, self.sampling_day)
+                self.measurement_results = self._results_table.measurement_results
+                if measurement_key is not None:
+                    self.result_cache.put(measurement_key, self.measurement_results)
 
             self.status_well_analysis = True
             log.info("Finished generating well profiles")
         else:
             log.info("Status well analysis already generated")
 
-    def get_results(self, numeric_only=False, include_adv: bool = False):
+    def _get_well_name(self, well_idx):
+        return f"{self.sample_name}_well({well_idx:03d})"
+
+    @property
+    def _n_well_workers(self):
+        if is_worker_process():
+            return 1
+        if self.well_n_jobs is None or self.well_n_jobs < 0:
+            return os.cpu_count() or 1
+        return self.well_n_jobs
+
+    def _profile_wells_serial(self):
+        well_imgs = self.get_well_imgs()
+        self.cp_connnection.refresh()
+
+        segmentations = [None] * len(well_imgs)
+        measurements = [None] * len(well_imgs)
+        if self.segmentation_method == "plate":
+            log.info(f"Segmenting the colonies of {self.sample_name}")
+            segmentations = self._segment_plate()
+            if self.measurement_backend in BATCHED_MEASUREMENT_BACKENDS:
+                log.info(f"Measuring the colonies of {self.sample_name}")
+                measurements = measure_segmented_wells(well_imgs, segmentations, self.measurement_backend)
+
+        well_results = []
+        for idx, well_img in enumerate(well_imgs):
+            log.debug(f"Starting well analysis for {self._get_well_name(idx)}")
+            well_profile = profile_well(
+                    well_img, self._get_well_name(idx),
+                    segmentation_method=self.segmentation_method, segmentation=segmentations[idx],
+                    measurement_backend=self.measurement_backend, measurements=measurements[idx]
+            )
+            well_results.append(well_profile.get_results())
+            self.wells.append(well_profile)
+        return well_results
+
+    def _segment_plate(self):
+        segmentation_key = self.segmentation_key
+        if segmentation_key is None:
+            return ColonySegmentation().segment_plate(self.img, self.get_well_bounds())
+
+        segmentations = self.result_cache.get(segmentation_key)
+        if segmentations is None:
+            segmentations = ColonySegmentation().segment_plate(self.img, self.get_well_bounds())
+            self.result_cache.put(segmentation_key, segmentations)
+        return segmentations
+
+    def _profile_wells_parallel(self):
+        wells = [(self._get_well_name(idx), bounds) for idx, bounds in enumerate(self.get_well_bounds())]
+        n_workers = min(self._n_well_workers, len(wells))
+        chunksize = self.well_chunksize
+        if chunksize is None:
+            # A few chunks per worker keeps the workers busy when some wells take longer than others
+            chunksize = max(1, int(np.ceil(len(wells) / (n_workers * 4))))
+        chunks = [wells[idx:idx + chunksize] for idx in range(0, len(wells), chunksize)]
+
+        log.info(f"Starting well analysis for {self.sample_name} with {n_workers} workers")
+        img = self.img
+        shm = share_img(img)
+        try:
+            # map returns the chunks in submission order, which keeps the wells in plate order
+            chunk_results = get_well_executor(n_workers).map(profile_wells,
+                                                             [shm.name] * len(chunks),
+                                                             [img.shape] * len(chunks),
+                                                             [img.dtype] * len(chunks),
+                                                             chunks,
+                                                             [self.segmentation_method] * len(chunks),
+                                                             [self.measurement_backend] * len(chunks))
+            well_results = [result for chunk in chunk_results for result in chunk]
+        except BrokenProcessPool:
+            discard_well_executor(n_workers)
+            raise
+        finally:
+            shm.close()
+            shm.unlink()
+        return well_results
+
+    @property
+    def results_table(self):
         """
-        Returns the results of the CellProfiler Analysis from the API. The results have the measurements row-wise,
-        and the plate colonies column-wise.
-        :param include_adv:
-        :return:
+        ResultsTable of the measurements. Plates restored from the cache build it from their measurement_results
         """
         if self.status_well_analysis is False:
             self.generate_well_profiles()
+        if self._results_table is None:
+            self._results_table = ResultsTable.from_measurement_results(self.measurement_results,
+                                                                        self.sample_name, self.sampling_day)
+        return self._results_table
 
+    def get_results(self, numeric_only=False, include_adv: bool = False):
+        """
+        Returns the results of the CellProfiler Analysis from the API.
+        :param include_adv: Whether to return the full results table, with the measurements row-wise and the plate
+            colonies column-wise
+        :return: Table with the plate colonies row-wise, the metadata columns and the basic CellProfiler measurements
+        """
         if include_adv:
             return self._results
-        else:
-            measurement_labels = NUMERIC_METADATA_LABELS
-            if numeric_only is False:
-                measurement_labels = METADATA_LABELS + measurement_labels
-
-            measurement_table = self._results.loc[measurement_labels, :]
-
-            basic_table = []
-            for metric in BASIC_CP_API_MEASUREMENT_LABELS:
-                basic_table.append(
-                        self._results.loc[self._results.index.to_series().str.contains(metric), :]
-                )
+        return self.results_table.get_frame(numeric_only=numeric_only,
+                                            origin_plate_id=self.sample_name, sampling_day=self.sampling_day)
 
-            results = pd.concat([measurement_table, *basic_table], axis=0).transpose()
-            if numeric_only is False:
-                results.loc[:, f"{STATUS_VALIDITY_LABEL}"] = results.loc[:, f"{STATUS_VALIDITY_LABEL}"].astype(bool)
-
-            return results
+    def save_checkpoint(self, dirpath: str, save_img: bool = True, img_hash: str = None):
+        """
+        Saves the normalized image, blob table, well grid, colony masks and measurements of the plate to a directory,
+        which PlateCheckpoint.load() reads back without recomputing anything
+        :param save_img: Whether to save the normalized image, which is the largest part of the checkpoint
+        """
+        from ._plate_checkpoint import save_plate
+        if self.status_well_analysis is False:
+            self.generate_well_profiles()
+        save_plate(self, dirpath, save_img=save_img, img_hash=img_hash)
 
     def add_sampling_day(self, sampling_day: int):
         self.sampling_day = sampling_day
@@ -142,24 +289,7 @@ class PlateProfileBase(PlateNormalization):
 
     @property
     def _metadata(self):
-        metadata = []
-        col_idx = self.measurement_results.columns
-
-        day = np.full(shape=len(col_idx),
-                      fill_value=self.sampling_day)
-        day = pd.DataFrame({
-            f"{SAMPLING_DAY_LABEL}": day
-        }, index=col_idx).transpose()
-        metadata.append(day)
-
-        origin_plate_id = np.full(shape=len(col_idx),
-                                  fill_value=self.sample_name)
-        origin_plate_id = pd.DataFrame({
-            f"{ORIGIN_PLATE_ID_LABEL}": origin_plate_id
-        }, index=col_idx).transpose()
-        metadata.append(origin_plate_id)
-
-        return pd.concat(metadata, axis=0)
+        return _get_metadata(self.measurement_results.columns, self.sampling_day, self.sample_name)
 
     @property
     def _results(self):
@@ -1,7 +1,9 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
 from ._plate_profile_base import PlateProfileBase
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
 
 import logging
 
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from ._results_table import ResultsTable, STATUS_VALIDITY_LABEL
+
+
+class PlateProfileResults:
+    """
+    Compact stand-in for a PlateProfile that only keeps its measurement results. Worker processes return these
+    instead of whole PlateProfile objects, so the images, masks and well profiles never have to be pickled back to
+    the parent process. Plotting is not available on these results.
+    """
+
+    def __init__(self, sample_name: str, sampling_day, results: pd.DataFrame,
+                 measurement_results: pd.DataFrame = None):
+        self.sample_name = sample_name
+        self.sampling_day = sampling_day
+        self._results = results
+        self.measurement_results = measurement_results
+        self._results_table = None
+
+    @classmethod
+    def from_plate(cls, plate):
+        """
+        :param plate: An analyzed PlateProfile
+        :return: PlateProfileResults holding the results of the plate
+        """
+        return cls(sample_name=plate.sample_name,
+                   sampling_day=plate.sampling_day,
+                   results=plate.get_results(include_adv=True),
+                   measurement_results=plate.measurement_results)
+
+    @property
+    def results(self):
+        return self.get_results()
+
+    @property
+    def results_table(self):
+        if self._results_table is None:
+            self._results_table = ResultsTable.from_measurement_results(self.measurement_results,
+                                                                        self.sample_name, self.sampling_day)
+        return self._results_table
+
+    def get_results(self, numeric_only=False, include_adv: bool = False):
+        if include_adv:
+            return self._results
+        return self.results_table.get_frame(numeric_only=numeric_only,
+                                            origin_plate_id=self.sample_name, sampling_day=self.sampling_day)
+
+    def save_checkpoint(self, dirpath: str, save_img: bool = True, img_hash: str = None):
+        """
+        Saves the results to a checkpoint directory, see PlateCheckpoint
+        """
+        from ._plate_checkpoint import save_plate
+        save_plate(self, dirpath, save_img=save_img, img_hash=img_hash)
+
+    def get_valid_count(self):
+        return self.measurement_results.loc[:, [f"{STATUS_VALIDITY_LABEL}"]].value_counts()
+
+    def __getattr__(self, item):
+        # Only reached for attributes a PlateProfile has but the results don't, e.g. the plotting methods
+        if item.startswith("plot_") or item in ("img", "wells", "get_well_imgs"):
+            raise AttributeError(
+                    f"'{item}' is not available on plate results computed in a worker process. "
+                    f"Run the series with n_jobs=1 to keep the full PlateProfile objects"
+            )
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{item}'")
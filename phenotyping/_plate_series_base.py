@@ -1,34 +1,164 @@
 import pandas as pd
-from typing import List
+from typing import List, Union, Callable
 import numpy as np
+import os
+import json
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 
 from .plate_profile import PlateProfile
+from ._plate_profile_results import PlateProfileResults
+from ._plate_checkpoint import PlateCheckpoint, is_checkpointed
+from .colony_profile import CellProfilerApiConnection
+from ._img_source import load_img, hash_source, get_source_path, is_img_path
+from ._results_table import ResultsTable
+from ._results_dataset import ResultsDataset
+from ..util._cache import ResultCache
 
 import logging
 
 log = logging.getLogger(__file__)
 logging.basicConfig(format=f'[%(asctime)s|%(levelname)s|%(name)s] %(message)s')
 
+EXECUTORS = ["process", "serial"]
+SERIES_MANIFEST_FNAME = "series.json"
+
+
+def _get_manifest_kwargs(profile_kwargs):
+    """
+    :return: The PlateProfile kwargs that can be written to a manifest. A ResultCache is written as its directory
+    """
+    manifest_kwargs = {}
+    for key, value in (profile_kwargs or {}).items():
+        if isinstance(value, ResultCache):
+            value = value.dirpath
+        try:
+            json.dumps(value)
+        except TypeError:
+            log.warning(f"Leaving the PlateProfile kwarg {key} out of the series manifest, it can't be written as json")
+            continue
+        manifest_kwargs[key] = value
+    return manifest_kwargs
+
+
+def save_series_manifest(dirpath, sample_name, day_index, n_rows=8, n_cols=12, align=True, fit=True,
+                         profile_kwargs=None):
+    """
+    Writes the manifest PlateSeries.load() reads to find the plate checkpoints of a series in dirpath
+    :param profile_kwargs: PlateProfile kwargs of the plates, see PlateSeriesBase
+    """
+    os.makedirs(dirpath, exist_ok=True)
+    manifest = {
+        "sample_name": sample_name,
+        "day_index": np.asarray(list(day_index)).tolist(),
+        "n_rows": n_rows,
+        "n_cols": n_cols,
+        "align": align,
+        "fit": fit,
+        "profile_kwargs": _get_manifest_kwargs(profile_kwargs),
+    }
+    with open(os.path.join(dirpath, SERIES_MANIFEST_FNAME), "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+
+
+def _is_picklable(img_source):
+    """
+    :return: Whether the image source can be sent to a worker process. Lambdas and closures can't be pickled
+    """
+    if not callable(img_source):
+        return True
+    try:
+        pickle.dumps(img_source)
+    except Exception:
+        return False
+    return True
+
+
+def _init_profile_worker():
+    # Each worker process gets its own CellProfiler workspace instead of the one inherited from the parent
+    CellProfilerApiConnection().refresh()
+
+
+def _profile_plate(img_source, sample_name, sampling_day, n_rows, n_cols, align, fit, checkpoint_dirpath=None,
+                   profile_kwargs=None):
+    # Image files are decoded by the worker, so the parent process never holds the images
+    img = load_img(img_source)
+    plate = PlateProfile(
+            img=img,
+            sample_name=sample_name,
+            sampling_day=sampling_day,
+            n_rows=n_rows, n_cols=n_cols,
+            align=align, fit=fit,
+            auto_analyze=True,
+            **(profile_kwargs or {})
+    )
+    if checkpoint_dirpath is not None:
+        # The worker still has the whole plate, so the checkpoint keeps the image and masks the results don't
+        plate.save_checkpoint(checkpoint_dirpath, img_hash=hash_source(img_source, img))
+    return PlateProfileResults.from_plate(plate)
+
 
 class PlateSeriesBase:
+    """
+    :param n_jobs: Number of worker processes used to profile the plates. 1 profiles the plates one after another in
+        this process, and -1 or None uses every core. Plates profiled by workers are kept as PlateProfileResults, so
+        the plotting and saving of segmentations is only available with n_jobs=1
+    :param executor: "process" to fan the plates out to a process pool, or "serial" to always profile in this process
+    :param checkpoint_dirpath: Directory every plate is checkpointed to as soon as it is profiled, see
+        PlateCheckpoint. Plates already checkpointed there for the same image are loaded instead of profiled again, so
+        an interrupted batch resumes from the last finished plate
+    :param keep_plates: Whether to keep the whole PlateProfile of each plate, with its images, masks and well profiles.
+        Otherwise each plate is reduced to its PlateProfileResults, or to its lazily loaded PlateCheckpoint when
+        checkpointing, as soon as it is profiled. Defaults to keeping the plates only when imgs are arrays
+    :param profile_kwargs: Other PlateProfile kwargs of every plate, e.g. measurement_backend, segmentation_method,
+        cache or well_n_jobs
+    :param results_dirpath: Directory of a ResultsDataset the results of every plate are appended to as soon as the
+        plate is profiled or loaded from its checkpoint
+
+    The imgs can be image arrays, image file paths, or callables that return the image. Paths and callables are only
+    decoded when their plate is profiled, so together with keep_plates=False only one plate image is in memory at a
+    time. With several workers, callables that can't be pickled, like lambdas, are profiled in this process while the
+    workers profile the other plates. The plates that could not be analyzed are recorded in invalid_imgs by their
+    path, or by their index in imgs when they weren't given as a path.
+
+    The results of the plates are gathered into one ResultsTable, so get_plate_results() is a read-only view of its
+    matrix and results a copy of it, instead of being concatenated from the plates on every access. The table only
+    appends the rows of plates added since it was built, e.g. by add_day(), and the results frame is kept until a
+    plate is added.
+    """
 
-    def __init__(self, imgs: List[np.ndarray], sample_name, day_index=None,
-                 n_rows=8, n_cols=12, align=True, fit=True, auto_analyze=True
+    def __init__(self, imgs: List[Union[np.ndarray, str, Callable]], sample_name, day_index=None,
+                 n_rows=8, n_cols=12, align=True, fit=True, auto_analyze=True,
+                 n_jobs: int = 1, executor: str = "process", checkpoint_dirpath: str = None,
+                 keep_plates: bool = None, results_dirpath: str = None, profile_kwargs: dict = None
                  ):
-        self.img_set = imgs
+        if executor not in EXECUTORS:
+            raise ValueError(f"Invalid executor {executor}. Must be one of {EXECUTORS}")
+
+        self.img_set = list(imgs)
         self.sample_name = sample_name
         self.n_rows = n_rows
         self.n_cols = n_cols
         self.align = align
         self.fit = fit
+        self.n_jobs = n_jobs
+        self.executor = executor
+        self.checkpoint_dirpath = checkpoint_dirpath
+        if keep_plates is None:
+            keep_plates = all(isinstance(img, np.ndarray) for img in self.img_set)
+        self.keep_plates = keep_plates
+        self.profile_kwargs = dict(profile_kwargs or {})
+        self.results_dataset = None if results_dirpath is None else ResultsDataset(results_dirpath)
 
         self.plates = []
         self.invalid_imgs = []
+        self._results_table = None
+        self._results = None
 
         self.status_analysis = False
 
         if day_index is None:
-            self.day_index = range(1, len(imgs) + 1)
+            self.day_index = range(1, len(self.img_set) + 1)
         else:
             self.day_index = day_index
 
@@ -36,41 +166,223 @@ class PlateSeriesBase:
 
     @property
     def results(self):
+        """
+        Results of every plate indexed by (colony_name, sampling_day). The frame is kept until a plate is added, and
+        every access returns a copy of it, so editing the results doesn't change the kept frame
+        """
+        results_table = self.results_table
+        if self._results is None:
+            self._results = results_table.get_frame(day_index=True)
+        return self._results.copy()
+
+    @property
+    def results_table(self):
+        """
+        ResultsTable with the rows of every plate, named without their day prefix
+        """
         if self.status_analysis is False: self.run_analysis()
+        if self._results_table is None or self._results_table.n_plates != len(self.plates):
+            self._update_results_table()
+        return self._results_table
+
+    def _update_results_table(self):
+        """
+        Appends the rows of the plates added since the results table was built
+        """
+        table = self._results_table
+        n_appended = 0 if table is None else table.n_plates
+        plate_tables = [plate.results_table for plate in self.plates[n_appended:]]
+        schema = None if table is None else table.schema
+        for plate_table in plate_tables:
+            schema = plate_table.schema if schema is None else schema.union(plate_table.schema)
+        if schema is None:
+            raise ValueError(f"No plate of {self.sample_name} could be analyzed")
 
-        results = []
-        for idx in range(len(self.plates)):
-            _tmp = self.get_plate_results(idx)
-            _tmp.index.name = "colony_name"
-            results.append(_tmp.reset_index(drop=False))
+        if table is None or schema is not table.schema:
+            # The table is built again with every plate when the new plates have features it doesn't
+            plate_tables = [plate.results_table for plate in self.plates[:n_appended]] + plate_tables
+            n_appended = 0
+            # Room for every image of the series, so the plates of later days are appended in place
+            capacity = max(sum(plate_table.n_rows for plate_table in plate_tables),
+                           self.n_rows * self.n_cols * len(self.img_set))
+            table = ResultsTable(schema, capacity=capacity)
 
-        results = pd.concat(results, axis=0, ignore_index=True)
-        results = results.set_index(["colony_name", "sampling_day"])
-        return results
+        for plate, plate_table in zip(self.plates[n_appended:], plate_tables):
+            table.append(plate_table.get_values(schema),
+                         [self._remove_day_from_name(name) for name in plate_table.colony_names],
+                         plate.sample_name, plate.sampling_day)
+        self._results_table = table
+        self._results = None
+
+    @property
+    def _n_workers(self):
+        if self.n_jobs is None or self.n_jobs < 0:
+            return os.cpu_count() or 1
+        return min(self.n_jobs, len(self.img_set))
 
     def run_analysis(self):
-        for idx, img in enumerate(self.img_set):
-            try:
-                log.info(f"Starting plate profiling for plate {idx}")
-                cp_api_naming = self._add_day_to_name(day=self.day_index[idx], name=self.sample_name)
-                plate = PlateProfile(
-                        img=img,
-                        sample_name=f"{cp_api_naming}",
-                        sampling_day=self.day_index[idx],
-                        n_rows=self.n_rows, n_cols=self.n_cols,
-                        align=self.align, fit=self.fit,
-                        auto_analyze=True
-                )
-                self.plates.append(plate)
-            except:
-                log.warning(f"Could not analyze plate {idx}: {self.sample_name}", exc_info=True)
-                self.invalid_imgs.append(img)
+        if self.checkpoint_dirpath is not None:
+            self._save_manifest(self.checkpoint_dirpath)
+        if self.executor == "process" and self._n_workers > 1:
+            self._run_analysis_parallel()
+        else:
+            self._run_analysis_serial()
         self.status_analysis = True
 
+    def _run_analysis_serial(self):
+        for idx, img_source in enumerate(self.img_set):
+            self._add_plate(idx, img_source)
+
+    def _add_plate(self, idx, img_source):
+        """
+        Profiles the plate of img_set[idx] in this process, or loads it from its checkpoint, and adds it to the plates
+        :return: Whether the plate was added
+        """
+        checkpoint = self._load_checkpoint(idx, img_source)
+        if checkpoint is not None:
+            self._append_results(checkpoint)
+            self.plates.append(checkpoint)
+            return True
+        img = plate = None
+        try:
+            log.info(f"Starting plate profiling for plate {idx}")
+            img = load_img(img_source)
+            cp_api_naming = self._add_day_to_name(day=self.day_index[idx], name=self.sample_name)
+            plate = PlateProfile(
+                    img=img,
+                    sample_name=f"{cp_api_naming}",
+                    sampling_day=self.day_index[idx],
+                    n_rows=self.n_rows, n_cols=self.n_cols,
+                    align=self.align, fit=self.fit,
+                    auto_analyze=True,
+                    **self.profile_kwargs
+            )
+            if self.checkpoint_dirpath is not None:
+                plate.save_checkpoint(self._get_checkpoint_dirpath(idx), img_hash=hash_source(img_source, img))
+            self._append_results(plate)
+            self.plates.append(plate if self.keep_plates else self._reduce_plate(idx, plate))
+            return True
+        except:
+            log.warning(f"Could not analyze plate {idx}: {self.sample_name}", exc_info=True)
+            self.invalid_imgs.append(self._get_invalid_ref(idx, img_source))
+            return False
+        finally:
+            # Released before the next plate is decoded, so two plates are never held at once
+            del img, plate
+
+    def add_day(self, img: Union[np.ndarray, str, Callable], day):
+        """
+        Profiles the plate of a new day and appends its rows to the results, without analyzing the other plates again
+        :param img: Image array, image file path or callable returning the image of the plate, as in imgs
+        :param day: Sampling day of the plate
+        :return: Whether the plate could be analyzed
+        """
+        if self.status_analysis is False: self.run_analysis()
+        self.img_set.append(img)
+        self.day_index = list(self.day_index) + [day]
+        if self.checkpoint_dirpath is not None:
+            self._save_manifest(self.checkpoint_dirpath)
+
+        if not self._add_plate(len(self.img_set) - 1, img):
+            return False
+        if self._results_table is not None:
+            self._update_results_table()
+        return True
+
+    def _run_analysis_parallel(self):
+        log.info(f"Starting plate profiling for {len(self.img_set)} plates with {self._n_workers} workers")
+        with ProcessPoolExecutor(max_workers=self._n_workers, initializer=_init_profile_worker) as executor:
+            futures = []
+            for idx, img_source in enumerate(self.img_set):
+                checkpoint = self._load_checkpoint(idx, img_source)
+                if checkpoint is not None:
+                    futures.append(checkpoint)
+                    continue
+                if not _is_picklable(img_source):
+                    log.info(f"Plate {idx} can't be sent to a worker, its image source can't be pickled. "
+                             f"Profiling it in this process")
+                    futures.append(None)
+                    continue
+                checkpoint_dirpath = None if self.checkpoint_dirpath is None else self._get_checkpoint_dirpath(idx)
+                futures.append(executor.submit(_profile_plate, img_source,
+                                               self._add_day_to_name(day=self.day_index[idx], name=self.sample_name),
+                                               self.day_index[idx],
+                                               self.n_rows, self.n_cols, self.align, self.fit,
+                                               checkpoint_dirpath, self.profile_kwargs))
+
+            # Futures are collected in submission order, so the plates stay in day order
+            for idx, (img_source, future) in enumerate(zip(self.img_set, futures)):
+                if isinstance(future, PlateCheckpoint):
+                    self._append_results(future)
+                    self.plates.append(future)
+                    continue
+                if future is None:
+                    self._add_plate(idx, img_source)
+                    continue
+                try:
+                    plate = future.result()
+                except:
+                    log.warning(f"Could not analyze plate {idx}: {self.sample_name}", exc_info=True)
+                    self.invalid_imgs.append(self._get_invalid_ref(idx, img_source))
+                    continue
+                self._append_results(plate)
+                self.plates.append(plate)
+
     def get_results(self):
-        return self.results.copy()
+        return self.results
+
+    def _get_checkpoint_dirpath(self, plate_idx):
+        return os.path.join(self.checkpoint_dirpath,
+                            self._add_day_to_name(day=self.day_index[plate_idx], name=self.sample_name))
+
+    def _append_results(self, plate, results_dataset: ResultsDataset = None):
+        """
+        Appends the results of a plate to the results dataset of the series, with the colonies named without their day
+        """
+        results_dataset = self.results_dataset if results_dataset is None else results_dataset
+        if results_dataset is None:
+            return
+        results_dataset.append(plate, series=self.sample_name,
+                               colony_names=[self._remove_day_from_name(name)
+                                             for name in plate.results_table.colony_names])
+
+    def _reduce_plate(self, plate_idx, plate):
+        """
+        :return: The compact stand-in kept for a profiled plate when keep_plates is False
+        """
+        if self.checkpoint_dirpath is not None:
+            return PlateCheckpoint.load(self._get_checkpoint_dirpath(plate_idx))
+        return PlateProfileResults.from_plate(plate)
+
+    @staticmethod
+    def _get_invalid_ref(plate_idx, img_source):
+        img_path = get_source_path(img_source)
+        return plate_idx if img_path is None else img_path
+
+    def _load_checkpoint(self, plate_idx, img_source):
+        """
+        :return: PlateCheckpoint of the plate from the checkpoint directory, or None if the plate has to be profiled
+        """
+        if self.checkpoint_dirpath is None or not is_checkpointed(self._get_checkpoint_dirpath(plate_idx)):
+            return None
+        checkpoint = PlateCheckpoint.load(self._get_checkpoint_dirpath(plate_idx))
+        # Callables are not decoded only to check their checkpoint
+        check_hash = isinstance(img_source, np.ndarray) or is_img_path(img_source)
+        if check_hash and checkpoint.img_hash is not None and checkpoint.img_hash != hash_source(img_source):
+            log.warning(f"Checkpoint of plate {plate_idx} is of a different image, profiling the plate again")
+            return None
+        log.info(f"Loaded plate {plate_idx} from its checkpoint")
+        return checkpoint
+
+    def _save_manifest(self, dirpath):
+        save_series_manifest(dirpath, self.sample_name, self.day_index,
+                             n_rows=self.n_rows, n_cols=self.n_cols, align=self.align, fit=self.fit,
+                             profile_kwargs=self.profile_kwargs)
 
     def get_plate_results(self, plate_idx, numeric_only=False, include_adv=False):
+        if not include_adv:
+            return self.results_table.get_frame(plate_idx, numeric_only=numeric_only)
+
         tmp = self.plates[plate_idx].get_results(
                 numeric_only=numeric_only,
                 include_adv=include_adv
@@ -18,36 +18,62 @@ from ._plate_series_base import PlateSeriesBase
 # TODO: Add module logging
 
 class PlateSeriesChangeOverTime(PlateSeriesBase):
+    """
+    The change between each pair of consecutive plates is computed once and kept, so add_day() only computes the change
+    of the new plate against the plate before it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._plate_deltas = []
+        self._change_over_time = None
+        super().__init__(*args, **kwargs)
+
+    def add_day(self, img, day):
+        added = super().add_day(img, day)
+        if added:
+            self._update_plate_deltas()
+        return added
+
     def get_change_over_time(self):
         if len(self.plates) > 1:
-            deltaMetric = []
-            for idx in range(len(self.plates) - 1):
-                data_zero = self.get_plate_results(
-                        plate_idx=idx,
-                        numeric_only=True
-                )
-
-                data_one = self.get_plate_results(
-                        plate_idx=(idx + 1),
-                        numeric_only=True
-                )
-
-                tmp = data_one - data_zero
-                tmp.columns = tmp.columns.map(lambda x: f"d({x})/dt")
-
-                reference_plates = ("day("
-                                    + data_one.loc[:, "sampling_day"].apply(lambda x: f"{x:.0f}")
-                                    + ") - day("
-                                    + data_zero.loc[:, "sampling_day"].apply(lambda x: f"{x:.0f}")
-                                    + ")")
-                tmp.insert(0, "reference_plates", reference_plates)
-
-                tmp.index.name = "colony_name"
-                tmp = tmp.reset_index(drop=False)
-                tmp = tmp.set_index(["colony_name", "reference_plates"])
-                deltaMetric.append(tmp)
-            deltaMetric = pd.concat(deltaMetric, axis=0)
-            return deltaMetric.sort_index()
+            self._update_plate_deltas()
+            if self._change_over_time is None:
+                self._change_over_time = pd.concat(self._plate_deltas, axis=0).sort_index()
+            return self._change_over_time.copy()
+
+    def _update_plate_deltas(self):
+        """
+        Computes the changes of the plates added since the changes were last computed
+        """
+        for idx in range(len(self._plate_deltas), len(self.plates) - 1):
+            self._plate_deltas.append(self._get_plate_delta(idx))
+            self._change_over_time = None
+
+    def _get_plate_delta(self, idx):
+        data_zero = self.get_plate_results(
+                plate_idx=idx,
+                numeric_only=True
+        )
+
+        data_one = self.get_plate_results(
+                plate_idx=(idx + 1),
+                numeric_only=True
+        )
+
+        tmp = data_one - data_zero
+        tmp.columns = tmp.columns.map(lambda x: f"d({x})/dt")
+
+        reference_plates = ("day("
+                            + data_one.loc[:, "sampling_day"].apply(lambda x: f"{x:.0f}")
+                            + ") - day("
+                            + data_zero.loc[:, "sampling_day"].apply(lambda x: f"{x:.0f}")
+                            + ")")
+        tmp.insert(0, "reference_plates", reference_plates)
+
+        tmp.index.name = "colony_name"
+        tmp = tmp.reset_index(drop=False)
+        tmp = tmp.set_index(["colony_name", "reference_plates"])
+        return tmp
 
     def get_avg_change_over_time(self):
         if len(self.plates) > 1:
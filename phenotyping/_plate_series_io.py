@@ -1,13 +1,70 @@
-import matplotlib.pyplot as plt
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
 import sys
+import os
+import json
 
 from ._plate_series_plotting import PlateSeriesPlotting
+from ._plate_series_base import SERIES_MANIFEST_FNAME
+from ._results_dataset import ResultsDataset
+from ..util._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
 
 class PlateSeriesIO(PlateSeriesPlotting):
     def save_results2csv(self, filepath):
         assert filepath.endswith(".csv")
         self.results.to_csv(filepath, header=False)
 
+    def save_results2parquet(self, dirpath):
+        """
+        Appends the results of every plate to the ResultsDataset in dirpath, which ResultsDataset(dirpath).read() loads
+        back with their dtypes, for selected plates and features
+        """
+        if self.status_analysis is False: self.run_analysis()
+        results_dataset = ResultsDataset(dirpath)
+        for plate in self.plates:
+            self._append_results(plate, results_dataset)
+
+    def save_checkpoint(self, dirpath, save_img=True):
+        """
+        Saves every plate of the series to its own checkpoint in dirpath, see PlateCheckpoint
+        :param save_img: Whether to save the normalized plate images, which are the largest part of the checkpoints
+        """
+        if self.status_analysis is False: self.run_analysis()
+        self._save_manifest(dirpath)
+        for plate in self.plates:
+            plate.save_checkpoint(os.path.join(dirpath, plate.sample_name), save_img=save_img)
+
+    @classmethod
+    def load(cls, dirpath):
+        """
+        Loads a series from a directory written by save_checkpoint() or by a series run with checkpoint_dirpath. The
+        plates are loaded lazily, and plates without a finished checkpoint are left out
+        """
+        with open(os.path.join(dirpath, SERIES_MANIFEST_FNAME), "r") as manifest_file:
+            manifest = json.load(manifest_file)
+        series = cls([None] * len(manifest["day_index"]), manifest["sample_name"], day_index=manifest["day_index"],
+                     n_rows=manifest["n_rows"], n_cols=manifest["n_cols"],
+                     align=manifest["align"], fit=manifest["fit"],
+                     auto_analyze=False, checkpoint_dirpath=dirpath,
+                     profile_kwargs=manifest.get("profile_kwargs"))
+        for idx in range(len(series.img_set)):
+            checkpoint = series._load_checkpoint(idx, None)
+            if checkpoint is None:
+                log.warning(f"No finished checkpoint for plate {idx}: {series.sample_name}")
+            else:
+                series.plates.append(checkpoint)
+        series.status_analysis = True
+        return series
+
     def save_analysis_segmentation(self, dirpath, figsize=(16, 24)):
         for plate in self.plates:
             fig, ax = plate.plot_analysis_segmentation(
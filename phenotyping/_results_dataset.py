@@ -0,0 +1,176 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import os
+import tempfile
+from typing import List
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+# ----- Pkg Relative Import -----
+from ._results_table import STATUS_VALIDITY_LABEL, ORIGIN_PLATE_ID_LABEL, SAMPLING_DAY_LABEL
+from ..util._lazy import LazyModule
+
+# pyarrow is only needed to write and read results datasets
+pa = LazyModule("pyarrow")
+pq = LazyModule("pyarrow.parquet")
+ds = LazyModule("pyarrow.dataset")
+
+# ----- Global Constants -----
+SERIES_LABEL = "series"
+COLONY_NAME_LABEL = "colony_name"
+# Partition directories, outermost first: <series>/<sampling_day>/<origin_plate_id>
+PARTITION_LABELS = [SERIES_LABEL, SAMPLING_DAY_LABEL, ORIGIN_PLATE_ID_LABEL]
+PLATE_FNAME = "results.parquet"
+# Hive name of the partition of a missing value, e.g. the sampling day of a plate that has none
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _get_partition_segment(label, value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        value = NULL_PARTITION
+    elif label == SAMPLING_DAY_LABEL:
+        value = f"{float(value):g}"
+    # Partition values are uri encoded, so plate names with a "/" or "=" stay one segment
+    return f"{label}={quote(str(value), safe='()')}"
+
+
+def _get_features(schema):
+    return [name for name in schema.names
+            if name not in PARTITION_LABELS and name not in (COLONY_NAME_LABEL, STATUS_VALIDITY_LABEL)]
+
+
+# ----- Main Class Definition -----
+class ResultsDataset:
+    """
+    Append-only Parquet dataset of plate results, with one file per plate under hive partitions
+    series=<series>/sampling_day=<day>/origin_plate_id=<plate>/. Each plate is written as soon as it is appended, with
+    the colony names, the validity flag and every measured feature as float32, so the dataset is complete up to the last
+    finished plate. Appending a plate again replaces its file.
+
+    read() only opens the files of the selected plates and only decodes the selected feature columns.
+    """
+
+    def __init__(self, dirpath: str):
+        self.dirpath = dirpath
+
+    @property
+    def partitioning(self):
+        return ds.HivePartitioning(pa.schema([
+            (SERIES_LABEL, pa.string()),
+            (SAMPLING_DAY_LABEL, pa.float64()),
+            (ORIGIN_PLATE_ID_LABEL, pa.string()),
+        ]))
+
+    def get_plate_dirpath(self, series: str, sampling_day, origin_plate_id: str):
+        segments = [_get_partition_segment(label, value) for label, value in
+                    zip(PARTITION_LABELS, [series, sampling_day, origin_plate_id])]
+        return os.path.join(self.dirpath, *segments)
+
+    def append(self, plate, series: str = None, colony_names: List[str] = None):
+        """
+        Writes the results of a plate to the dataset
+        :param plate: An analyzed PlateProfile, PlateProfileResults or PlateCheckpoint
+        :param series: Series the plate belongs to. Defaults to the name of the plate
+        :param colony_names: Names of the colonies, e.g. without the day prefix of the plate name. Defaults to the well
+            names of the plate
+        :return: Path of the written file
+        """
+        results_table = plate.results_table
+        series = plate.sample_name if series is None else series
+        if colony_names is None:
+            colony_names = results_table.colony_names
+        schema = results_table.schema
+        matrix = results_table.matrix
+
+        columns = {
+            COLONY_NAME_LABEL: pa.array(list(colony_names), type=pa.string()),
+            STATUS_VALIDITY_LABEL: pa.array(matrix[:, schema.validity_idx].astype(bool)),
+        }
+        for idx, feature in enumerate(schema.features):
+            if idx != schema.validity_idx:
+                columns[feature] = pa.array(matrix[:, idx])
+        table = pa.table(columns)
+
+        plate_dirpath = self.get_plate_dirpath(series, plate.sampling_day, plate.sample_name)
+        os.makedirs(plate_dirpath, exist_ok=True)
+        filepath = os.path.join(plate_dirpath, PLATE_FNAME)
+        # Written next to its final path and then renamed, so readers never see a partial file. The dot prefix keeps
+        # the temporary file out of get_dataset()
+        fd, tmp_filepath = tempfile.mkstemp(dir=plate_dirpath, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp_filepath)
+            os.replace(tmp_filepath, filepath)
+        except:
+            os.remove(tmp_filepath)
+            raise
+        log.info(f"Appended the results of {plate.sample_name} to {self.dirpath}")
+        return filepath
+
+    def get_dataset(self):
+        """
+        :return: pyarrow Dataset of every plate file, with the features of every file. Plates that lack a feature
+            read it as missing values
+        """
+        dataset = ds.dataset(self.dirpath, format="parquet", partitioning=self.partitioning,
+                             exclude_invalid_files=False, ignore_prefixes=[".", "_"])
+        # The discovered schema is the one of the first file, so the features only later plates have are added to it
+        schema = pa.unify_schemas([dataset.schema] + [fragment.physical_schema
+                                                      for fragment in dataset.get_fragments()])
+        return ds.dataset(self.dirpath, schema=schema, format="parquet", partitioning=self.partitioning,
+                          exclude_invalid_files=False, ignore_prefixes=[".", "_"])
+
+    @property
+    def features(self):
+        """
+        :return: Feature columns of the dataset, over the schemas of every file
+        """
+        return _get_features(self.get_dataset().schema)
+
+    def get_plates(self):
+        """
+        :return: Table of the (series, sampling_day, origin_plate_id) of every plate, read from the directory names
+        """
+        dataset = self.get_dataset()
+        partitions = [ds.get_partition_keys(fragment.partition_expression) for fragment in dataset.get_fragments()]
+        return pd.DataFrame(partitions, columns=PARTITION_LABELS)
+
+    def read(self, features: List[str] = None, plates: List[str] = None, series: List[str] = None,
+             sampling_days: list = None) -> pd.DataFrame:
+        """
+        Loads the results of the selected plates
+        :param features: Feature columns to load, or None for every feature
+        :param plates: origin_plate_ids of the plates to load, or None for every plate
+        :param series: Series to load the plates of, or None for every series
+        :param sampling_days: Sampling days to load the plates of, or None for every day
+        :return: Table indexed by (colony_name, sampling_day), with the series, origin_plate_id and validity columns and
+            then the features, ordered by series, day and plate
+        """
+        dataset = self.get_dataset()
+        row_filter = None
+        for label, values in zip(PARTITION_LABELS, [series, sampling_days, plates]):
+            if values is None:
+                continue
+            values = pa.array([float(value) for value in values] if label == SAMPLING_DAY_LABEL else list(values))
+            expression = ds.field(label).isin(values)
+            row_filter = expression if row_filter is None else row_filter & expression
+
+        columns = [COLONY_NAME_LABEL, *PARTITION_LABELS, STATUS_VALIDITY_LABEL]
+        columns += _get_features(dataset.schema) if features is None else list(features)
+        table = dataset.to_table(columns=columns, filter=row_filter)
+        table = table.sort_by([(SERIES_LABEL, "ascending"), (SAMPLING_DAY_LABEL, "ascending"),
+                               (ORIGIN_PLATE_ID_LABEL, "ascending")])
+
+        results = table.to_pandas()
+        for label in (SERIES_LABEL, ORIGIN_PLATE_ID_LABEL):
+            results[label] = results[label].astype("category")
+        return results.set_index([COLONY_NAME_LABEL, SAMPLING_DAY_LABEL])
@@ -0,0 +1,260 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# ----- Global Constants -----
+METADATA_LABELS = [
+    (STATUS_VALIDITY_LABEL := "status_valid_analysis"),
+    (ORIGIN_PLATE_ID_LABEL := "origin_plate_id")
+]
+
+NUMERIC_METADATA_LABELS = [
+    (SAMPLING_DAY_LABEL := "sampling_day"),
+]
+
+BASIC_CP_API_MEASUREMENT_LABELS = [
+    "AreaShape",
+    "Intensity",
+    "Texture"
+]
+
+RESULTS_DTYPE = np.float32
+
+# Schemas are resolved once per set of feature labels and shared by every table with those features
+_schemas = {}
+
+
+def _read_only(values: np.ndarray):
+    """
+    :return: Read-only view of an array, so the frames and arrays a table hands out can't write to it
+    """
+    values = values.view()
+    values.flags.writeable = False
+    return values
+
+
+class FeatureSchema:
+    """
+    Column order of a ResultsTable. The basic measurements come first, grouped in the order of
+    BASIC_CP_API_MEASUREMENT_LABELS, so the formatted results are a slice of the table's matrix. The other features,
+    including the validity flag, follow in their measured order.
+    """
+
+    def __init__(self, features):
+        features = list(dict.fromkeys(features))
+        basic_features = []
+        for metric in BASIC_CP_API_MEASUREMENT_LABELS:
+            basic_features += [feature for feature in features if metric in feature and feature not in basic_features]
+        basic_set = set(basic_features)
+
+        self.features = pd.Index(basic_features + [feature for feature in features if feature not in basic_set])
+        self.n_basic = len(basic_features)
+        self.validity_idx = self.features.get_loc(STATUS_VALIDITY_LABEL) \
+            if STATUS_VALIDITY_LABEL in self.features else None
+
+    @classmethod
+    def resolve(cls, features):
+        """
+        :return: The shared schema of the feature labels
+        """
+        key = tuple(features)
+        schema = _schemas.get(key)
+        if schema is None:
+            schema = _schemas[key] = cls(key)
+        return schema
+
+    def __len__(self):
+        return len(self.features)
+
+    def union(self, other):
+        """
+        :return: Schema with the features of both schemas
+        """
+        if other is self:
+            return self
+        return FeatureSchema.resolve(list(self.features) + [feature for feature in other.features
+                                                             if feature not in self.features])
+
+
+# ----- Main Class Definition -----
+class ResultsTable:
+    """
+    Results of one or more plates as a preallocated wells x features float32 matrix in the column order of a
+    FeatureSchema, with the colony name, origin plate and sampling day of every row. Plates are appended as row
+    blocks, and the frames returned by get_frame() and measurement_results are views of the matrix, so formatting the
+    results doesn't copy, filter or transpose them. The views are read-only, as the matrix is shared by every frame
+    of the table. Assigning to a frame raises a ValueError, and its copy() can be edited.
+    :param capacity: Number of rows to allocate up front. The matrix doubles when appending goes past it
+    """
+
+    def __init__(self, schema: FeatureSchema, capacity: int = 0):
+        self.schema = schema
+        self.n_rows = 0
+        self.plate_ids = []
+        self.sampling_days = []
+        self.plate_slices = []
+
+        self._matrix = np.empty((capacity, len(schema)), dtype=RESULTS_DTYPE)
+        self._colony_names = np.empty(capacity, dtype=object)
+        self._row_plates = np.empty(capacity, dtype=np.int32)
+
+    @classmethod
+    def from_well_results(cls, well_results: List[pd.DataFrame], origin_plate_id: str, sampling_day):
+        """
+        :param well_results: Results of each well with the features row-wise, see ColonyProfile.get_results(). Wells
+            with a name that was already given are left out
+        :return: ResultsTable of a plate
+        """
+        features = list(well_results[0].index) if well_results else []
+        known_features = set(features)
+        for result in well_results[1:]:
+            if result.index.equals(well_results[0].index):
+                continue
+            features += [feature for feature in result.index if feature not in known_features]
+            known_features.update(result.index)
+        schema = FeatureSchema.resolve(features)
+
+        colony_names = []
+        known_names = set()
+        matrix = np.full((len(well_results), len(schema)), np.nan, dtype=RESULTS_DTYPE)
+        first_positions = None
+        for result in well_results:
+            name = result.columns[0] if isinstance(result, pd.DataFrame) else result.name
+            if name in known_names:
+                continue
+            known_names.add(name)
+
+            if first_positions is not None and result.index.equals(well_results[0].index):
+                positions = first_positions
+            else:
+                positions = schema.features.get_indexer(result.index)
+                if first_positions is None:
+                    first_positions = positions
+            matrix[len(colony_names), positions] = result.to_numpy(dtype=RESULTS_DTYPE).reshape(-1)
+            colony_names.append(name)
+
+        table = cls(schema, capacity=len(colony_names))
+        table.append(matrix[:len(colony_names)], colony_names, origin_plate_id, sampling_day)
+        return table
+
+    @classmethod
+    def from_measurement_results(cls, measurement_results: pd.DataFrame, origin_plate_id: str, sampling_day):
+        """
+        :param measurement_results: Measurement results of a plate with the features row-wise and the wells column-wise
+        :return: ResultsTable of the plate
+        """
+        schema = FeatureSchema.resolve(measurement_results.index)
+        positions = measurement_results.index.get_indexer(schema.features)
+        values = measurement_results.to_numpy(dtype=RESULTS_DTYPE)[positions].T
+
+        table = cls(schema, capacity=len(measurement_results.columns))
+        table.append(values, measurement_results.columns, origin_plate_id, sampling_day)
+        return table
+
+    @property
+    def n_plates(self):
+        return len(self.plate_slices)
+
+    @property
+    def matrix(self):
+        """
+        :return: Read-only view of the filled rows of the matrix
+        """
+        return _read_only(self._matrix[:self.n_rows])
+
+    @property
+    def colony_names(self):
+        return _read_only(self._colony_names[:self.n_rows])
+
+    @property
+    def measurement_results(self):
+        """
+        :return: Read-only view of the matrix with the features row-wise and the colonies column-wise, as PlateProfile has it
+        """
+        return pd.DataFrame(self.matrix.T, index=self.schema.features, columns=pd.Index(self.colony_names),
+                            copy=False)
+
+    def get_values(self, schema: FeatureSchema):
+        """
+        :return: The matrix in the column order of another schema, with NaN for the features this table doesn't have.
+            A read-only view of the matrix when the schema is the table's
+        """
+        if schema is self.schema:
+            return self.matrix
+        values = np.full((self.n_rows, len(schema)), np.nan, dtype=RESULTS_DTYPE)
+        positions = schema.features.get_indexer(self.schema.features)
+        values[:, positions[positions >= 0]] = self.matrix[:, positions >= 0]
+        return values
+
+    def append(self, values: np.ndarray, colony_names, origin_plate_id: str, sampling_day):
+        """
+        Copies the rows of a plate into the table
+        :param values: wells x features matrix in the column order of the table's schema
+        :return: Index of the plate in the table
+        """
+        n_new = len(values)
+        self._reserve(self.n_rows + n_new)
+        rows = slice(self.n_rows, self.n_rows + n_new)
+        self._matrix[rows] = values
+        self._colony_names[rows] = list(colony_names)
+        self._row_plates[rows] = self.n_plates
+
+        self.plate_ids.append(origin_plate_id)
+        self.sampling_days.append(sampling_day)
+        self.plate_slices.append((rows.start, rows.stop))
+        self.n_rows += n_new
+        return self.n_plates - 1
+
+    def _reserve(self, n_rows):
+        capacity = len(self._matrix)
+        if n_rows <= capacity:
+            return
+        capacity = max(n_rows, 2 * capacity)
+        # Frames handed out before keep viewing the old matrix, whose rows are never written again
+        matrix = np.empty((capacity, len(self.schema)), dtype=RESULTS_DTYPE)
+        matrix[:self.n_rows] = self._matrix[:self.n_rows]
+        colony_names = np.empty(capacity, dtype=object)
+        colony_names[:self.n_rows] = self._colony_names[:self.n_rows]
+        row_plates = np.empty(capacity, dtype=np.int32)
+        row_plates[:self.n_rows] = self._row_plates[:self.n_rows]
+        self._matrix, self._colony_names, self._row_plates = matrix, colony_names, row_plates
+
+    def get_frame(self, plate_idx: int = None, numeric_only=False, day_index=False,
+                  origin_plate_id: str = None, sampling_day=None):
+        """
+        :param plate_idx: Plate to return the rows of, or None for every plate
+        :param numeric_only: Whether to leave out the validity and origin plate columns
+        :param day_index: Whether to index the rows by (colony_name, sampling_day) instead of the colony name
+        :param origin_plate_id: Origin plate of the rows instead of the one they were appended with
+        :param sampling_day: Sampling day of the rows instead of the one they were appended with
+        :return: Table with the colonies row-wise, the metadata columns and then the basic measurements, whose values
+            are a read-only view of the matrix
+        """
+        start, stop = (0, self.n_rows) if plate_idx is None else self.plate_slices[plate_idx]
+        row_plates = self._row_plates[start:stop]
+        if sampling_day is None:
+            sampling_day = np.asarray(self.sampling_days)[row_plates]
+        else:
+            sampling_day = np.full(stop - start, sampling_day)
+
+        colony_names = pd.Index(self._colony_names[start:stop])
+        if day_index:
+            index = pd.MultiIndex.from_arrays([colony_names, sampling_day], names=["colony_name", SAMPLING_DAY_LABEL])
+        else:
+            index = colony_names
+
+        frame = pd.DataFrame(_read_only(self._matrix[start:stop, :self.schema.n_basic]), index=index,
+                             columns=self.schema.features[:self.schema.n_basic], copy=False)
+        if not day_index:
+            frame.insert(0, SAMPLING_DAY_LABEL, sampling_day)
+        if numeric_only is False:
+            if origin_plate_id is None:
+                categories = pd.unique(np.asarray(self.plate_ids, dtype=object))
+                codes = pd.Index(categories).get_indexer(self.plate_ids)[row_plates]
+                origin = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                origin = pd.Categorical(np.full(stop - start, origin_plate_id, dtype=object))
+            frame.insert(0, ORIGIN_PLATE_ID_LABEL, origin)
+            frame.insert(0, STATUS_VALIDITY_LABEL, self._matrix[start:stop, self.schema.validity_idx].astype(bool))
+        return frame
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from typing import List
+
+from ..measurement import measure_objects, measure_texture
+from ._colony_segmentation import _get_float_gray_img
+
+MEASUREMENT_BACKENDS = ["cellprofiler", "numpy", "cellprofiler_plate"]
+
+# Backends that measure many wells in one pass and hand each ColonyProfile its measurements
+BATCHED_MEASUREMENT_BACKENDS = ["numpy", "cellprofiler_plate"]
+
+METRIC_LABEL = "Metric"
+
+
+def measure_wells(well_imgs: List[np.ndarray], colony_masks: List[np.ndarray]):
+    """
+    Measures the AreaShape, Intensity and Location features of the colony and background, and the Texture features of
+    the colony, of many wells in one pass. The wells are laid side by side in a single label image, with each well as
+    its own region so that no feature crosses from one well into the next.
+    :param well_imgs: RGB or grayscale well images
+    :param colony_masks: Colony mask of each well, or None for a well without a colony
+    :return: List with a (colony, background) tuple of Series per well, or None for a well without a colony
+    """
+    valid_idxs = [idx for idx, colony_mask in enumerate(colony_masks) if colony_mask is not None]
+    results = [None] * len(well_imgs)
+    if len(valid_idxs) == 0:
+        return results
+
+    height = max(well_imgs[idx].shape[0] for idx in valid_idxs)
+    width = sum(well_imgs[idx].shape[1] for idx in valid_idxs)
+    labels = np.zeros((height, width), dtype=np.int32)
+    colony_labels = np.zeros((height, width), dtype=np.int32)
+    regions = np.zeros((height, width), dtype=np.int32)
+    gray_img = np.zeros((height, width), dtype=np.float64)
+    origins = np.zeros((2 * len(valid_idxs), 2), dtype=np.intp)
+
+    x_start = 0
+    for well_num, idx in enumerate(valid_idxs):
+        well_height, well_width = colony_masks[idx].shape
+        x_end = x_start + well_width
+        # The colony is labeled 2n + 1 and the background 2n + 2
+        labels[:well_height, x_start:x_end] = np.where(colony_masks[idx], 2 * well_num + 1, 2 * well_num + 2)
+        colony_labels[:well_height, x_start:x_end] = np.where(colony_masks[idx], well_num + 1, 0)
+        regions[:well_height, x_start:x_end] = well_num + 1
+        gray_img[:well_height, x_start:x_end] = _get_float_gray_img(well_imgs[idx])
+        origins[2 * well_num:2 * well_num + 2, 1] = x_start
+        x_start = x_end
+
+    measurements = measure_objects(labels, gray_img, regions=regions, origins=origins)
+    texture = measure_texture(colony_labels, gray_img)
+    measurements.columns.name = texture.columns.name = METRIC_LABEL
+    for well_num, idx in enumerate(valid_idxs):
+        results[idx] = (pd.concat([measurements.loc[2 * well_num + 1], texture.loc[well_num + 1]]),
+                        measurements.loc[2 * well_num + 2])
+    return results
+
+
+def add_background_name(name: str):
+    """
+    :return: Name of a measurement of the background, e.g. AreaShape_BackgroundArea for AreaShape_Area
+    """
+    split = name.split("_")
+    split[1] = f"Background{split[1]}"
+    return "_".join(split)
+
+
+def format_well_measurements(colony_name: str, colony: pd.Series, background: pd.Series):
+    """
+    :return: The colony and background measurements as a single column table, in the layout of the CellProfiler
+        results of a ColonyProfile
+    """
+    colony = colony.rename(colony_name).to_frame()
+    background = background.rename(colony_name).to_frame()
+    background.index = background.index.map(add_background_name)
+    colony.index.name = background.index.name = METRIC_LABEL
+    return colony, background
@@ -0,0 +1,124 @@
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List
+
+from .colony_profile import ColonyProfile, CellProfilerApiConnection
+from ._colony_profile_cell_profiler_integration import measure_batched_wells
+from ._colony_segmentation import ColonySegmentation
+from ._well_measurement import BATCHED_MEASUREMENT_BACKENDS
+
+SEGMENTATION_METHODS = ["well", "plate"]
+
+# Well pools by number of workers. They are kept for the life of the process, so every plate of a series reuses the
+# same warm workers
+_well_executors = {}
+
+
+def _init_well_worker():
+    # Each worker process gets its own CellProfiler workspace instead of the one inherited from the parent
+    CellProfilerApiConnection().refresh()
+
+
+def is_worker_process():
+    """
+    :return: Whether this process was started by multiprocessing, e.g. as a plate worker of a series or a batch
+    """
+    return multiprocessing.parent_process() is not None
+
+
+def get_well_executor(n_workers: int):
+    """
+    :return: The shared ProcessPoolExecutor of n_workers well workers, started on first use
+    """
+    executor = _well_executors.get(n_workers)
+    if executor is None:
+        executor = _well_executors[n_workers] = ProcessPoolExecutor(max_workers=n_workers,
+                                                                    initializer=_init_well_worker)
+    return executor
+
+
+def discard_well_executor(n_workers: int):
+    """
+    Shuts down the shared pool of n_workers well workers, e.g. after it broke, so the next plate starts a new one
+    """
+    executor = _well_executors.pop(n_workers, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def share_img(img: np.ndarray):
+    """
+    Copies an image into a new shared memory block
+    :return: The SharedMemory block. The caller is responsible for closing and unlinking it
+    """
+    img = np.ascontiguousarray(img)
+    shm = SharedMemory(create=True, size=max(img.nbytes, 1))
+    np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[...] = img
+    return shm
+
+
+def profile_well(well_img: np.ndarray, well_name: str, segmentation_method="well", segmentation=None,
+                 measurement_backend="cellprofiler", measurements=None):
+    """
+    :param segmentation_method: "well" to segment the colony within the ColonyProfile, or "plate" to use the given
+        segmentation from ColonySegmentation
+    :param segmentation: Segmentation of the well, only used with the "plate" segmentation method
+    :param measurement_backend: Measurement backend of the ColonyProfile, see MEASUREMENT_BACKENDS
+    :param measurements: Measurements of the well from measure_segmented_wells, only used with a batched backend
+    :return: The analyzed ColonyProfile of the well
+    """
+    if segmentation_method == "well":
+        return ColonyProfile(well_img, well_name, auto_run=True, backend=measurement_backend)
+
+    well_profile = ColonyProfile(well_img, well_name, auto_run=False, backend=measurement_backend)
+    well_profile.set_colony_segmentation(segmentation)
+    if measurements is not None:
+        well_profile.set_well_measurements(measurements)
+    well_profile.run_analysis()
+    return well_profile
+
+
+def measure_segmented_wells(well_imgs: List[np.ndarray], segmentations: List[dict], measurement_backend="numpy"):
+    """
+    Measures all segmented wells in one pass for a batched measurement backend
+    :return: List with the measurements of each well, or None where no colony was found
+    """
+    return measure_batched_wells(well_imgs, [None if segmentation is None else segmentation["colony_mask"]
+                                             for segmentation in segmentations], measurement_backend)
+
+
+def profile_wells(shm_name: str, img_shape, img_dtype, wells: List[tuple], segmentation_method="well",
+                  measurement_backend="cellprofiler"):
+    """
+    Worker function that profiles a chunk of wells from a plate image held in shared memory
+    :param shm_name: Name of the shared memory block holding the plate image
+    :param wells: List of (well_name, (y_start, y_end, x_start, x_end)) tuples
+    :return: List of the well results, in the same order as the wells
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        plate_img = np.ndarray(img_shape, dtype=img_dtype, buffer=shm.buf)
+        # Copy the crops so no view into the shared block outlives it
+        well_imgs = [plate_img[y_start:y_end, x_start:x_end].copy()
+                     for _, (y_start, y_end, x_start, x_end) in wells]
+        del plate_img
+    finally:
+        shm.close()
+
+    segmentations = [None] * len(wells)
+    measurements = [None] * len(wells)
+    if segmentation_method == "plate":
+        segmentations = ColonySegmentation().segment(well_imgs)
+        if measurement_backend in BATCHED_MEASUREMENT_BACKENDS:
+            measurements = measure_segmented_wells(well_imgs, segmentations, measurement_backend)
+
+    results = []
+    for (well_name, _), well_img, segmentation, well_measurements in zip(wells, well_imgs, segmentations,
+                                                                         measurements):
+        well_profile = profile_well(well_img, well_name,
+                                    segmentation_method=segmentation_method, segmentation=segmentation,
+                                    measurement_backend=measurement_backend, measurements=well_measurements)
+        results.append(well_profile.get_results())
+    return results
@@ -1,2 +1,20 @@
-from .plotting import *
-from .image_analysis import *
+from ._lazy import attach_lazy_exports
+
+# Exports are imported from their submodule on first access, so importing the package stays cheap
+_LAZY_EXPORTS = {
+    "plot_blobs": ".plotting",
+    "plotAx_blobs": ".plotting",
+    "plot_blobs_by_label": ".plotting",
+    "plot_plate_rows": ".plotting",
+    "plot_plate_cols": ".plotting",
+    "plotAx_find_blobs": ".plotting",
+    "check_grayscale": ".image_analysis",
+    "plotAx_histogram": ".image_analysis",
+    "plot_histogram": ".image_analysis",
+    "compare_hist": ".image_analysis",
+    "view_img_info": ".image_analysis",
+    "ResultCache": "._cache",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+__getattr__, __dir__ = attach_lazy_exports(__name__, _LAZY_EXPORTS)
@@ -0,0 +1,198 @@
+import logging
+
+formatter = logging.Formatter(fmt=f'[%(asctime)s|%(name)s] %(levelname)s - %(message)s',
+                              datefmt='%m/%d/%Y %I:%M:%S')
+console_handler = logging.StreamHandler()
+log = logging.getLogger(__name__)
+log.addHandler(console_handler)
+console_handler.setFormatter(formatter)
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+# ----- Global Constants -----
+DEFAULT_CACHE_DIRPATH = os.path.join(os.path.expanduser("~"), ".phenomics", "cache")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+CACHE_ENTRY_EXT = ".pkl"
+
+# Part of every key. Bump it when a stage changes its output, so entries of the old code are never read again
+CACHE_FORMAT_VERSION = 1
+
+
+def hash_img(img: np.ndarray):
+    """
+    :return: Hex digest of the pixels, shape and dtype of an image
+    """
+    img = np.ascontiguousarray(img)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{img.shape}|{img.dtype.str}|".encode())
+    digest.update(memoryview(img).cast("B"))
+    return digest.hexdigest()
+
+
+def hash_file(filepath: str, chunksize: int = 1024 ** 2):
+    """
+    :return: Hex digest of the bytes of a file
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(chunksize), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_key(stage: str, params: dict, parent_key: str = None):
+    """
+    Key of a stage result. A stage is keyed on its own parameters and on the key of the stage it is computed from,
+    so changing a parameter only misses the stages at and after the one that uses it.
+    :param stage: Name of the stage, e.g. "normalization"
+    :param params: Every parameter the result of the stage depends on. Values must be json serializable or have a
+        stable repr
+    :param parent_key: Key of the upstream stage, or the hash of the input image for the first stage
+    :return: Hex digest
+    """
+    payload = json.dumps({
+        "version": CACHE_FORMAT_VERSION,
+        "stage": stage,
+        "parent": parent_key,
+        "params": params,
+    }, sort_keys=True, default=repr)
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+def get_result_cache(cache):
+    """
+    :param cache: A ResultCache, the path of a cache directory, or None to disable caching
+    :return: ResultCache or None
+    """
+    if cache is None or isinstance(cache, ResultCache):
+        return cache
+    return ResultCache(cache)
+
+
+# ----- Main Class Definition -----
+class ResultCache:
+    """
+    On-disk cache of pickled results, one file per key. When a new entry takes the directory over max_bytes, the least
+    recently used entries are removed first. Reading an entry touches its file, so the modification times order the
+    entries by their last use.
+
+    Entries are written to a temporary file and moved into place, so several processes can share one directory.
+    :param dirpath: Directory of the cache, created if it doesn't exist
+    :param max_bytes: Size limit of the cache directory
+    """
+
+    def __init__(self, dirpath: str = DEFAULT_CACHE_DIRPATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.dirpath = os.path.abspath(os.path.expanduser(dirpath))
+        self.max_bytes = max_bytes
+        os.makedirs(self.dirpath, exist_ok=True)
+
+        self.n_hits = 0
+        self.n_misses = 0
+
+    def __contains__(self, key):
+        return os.path.exists(self._get_entry_path(key))
+
+    def __getstate__(self):
+        # Worker processes start with their own hit counts
+        return {"dirpath": self.dirpath, "max_bytes": self.max_bytes, "n_hits": 0, "n_misses": 0}
+
+    def __repr__(self):
+        return f"ResultCache({self.dirpath!r}, max_bytes={self.max_bytes})"
+
+    def get(self, key: str, default=None):
+        """
+        :return: The cached result of key, or default when it isn't cached
+        """
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, "rb") as entry_file:
+                result = pickle.load(entry_file)
+        except FileNotFoundError:
+            self.n_misses += 1
+            return default
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            log.warning(f"Removing unreadable cache entry {entry_path}", exc_info=True)
+            self._remove(entry_path)
+            self.n_misses += 1
+            return default
+
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+        self.n_hits += 1
+        return result
+
+    def put(self, key: str, result):
+        """
+        Stores a result and evicts the least recently used entries beyond max_bytes
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.dirpath, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                pickle.dump(result, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._get_entry_path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict(keep=key)
+
+    def evict(self, keep: str = None):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes
+        :param keep: Key that is never removed, e.g. the entry that was just written
+        """
+        entries = self._get_entries()
+        n_bytes = sum(size for _, _, size in entries)
+        keep_path = None if keep is None else self._get_entry_path(keep)
+        for entry_path, _, size in sorted(entries, key=lambda entry: entry[1]):
+            if n_bytes <= self.max_bytes:
+                break
+            if entry_path == keep_path:
+                continue
+            self._remove(entry_path)
+            n_bytes -= size
+
+    def clear(self):
+        for entry_path, _, _ in self._get_entries():
+            self._remove(entry_path)
+
+    @property
+    def n_bytes(self):
+        return sum(size for _, _, size in self._get_entries())
+
+    def __len__(self):
+        return len(self._get_entries())
+
+    def _get_entry_path(self, key):
+        return os.path.join(self.dirpath, f"{key}{CACHE_ENTRY_EXT}")
+
+    def _get_entries(self):
+        """
+        :return: List of (path, mtime, size) of the entries
+        """
+        entries = []
+        with os.scandir(self.dirpath) as dir_entries:
+            for dir_entry in dir_entries:
+                if not dir_entry.name.endswith(CACHE_ENTRY_EXT):
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:
+                    # Removed by another process
+                    continue
+                entries.append((dir_entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
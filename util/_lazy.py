@@ -0,0 +1,40 @@
+import importlib
+import sys
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on the first access to one of its attributes, so that heavy
+    dependencies like matplotlib load when they are first used instead of when the package is imported
+    """
+
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+
+    def __getattr__(self, name):
+        return getattr(importlib.import_module(self._module_name), name)
+
+    def __repr__(self):
+        return f"<lazy module {self._module_name!r}>"
+
+
+def attach_lazy_exports(package_name: str, exports: dict):
+    """
+    Module level __getattr__ and __dir__ (PEP 562) for a package that imports each export from its submodule on first
+    access instead of in the package __init__
+    :param package_name: __name__ of the package
+    :param exports: Relative name of the submodule that defines each export, e.g. {"BlobFinder": ".blob_finder"}
+    :return: (__getattr__, __dir__) of the package
+    """
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package_name), name)
+        # Later accesses find the export in the package namespace without calling __getattr__
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package_name])) | set(exports))
+
+    return __getattr__, __dir__
@@ -1,7 +1,10 @@
-from seaborn import histplot
 from skimage.color import rgb2gray
 import numpy as np
-import matplotlib.pyplot as plt
+
+from ._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
+seaborn = LazyModule("seaborn")
 
 def check_grayscale(img:np.ndarray):
     if len(img.shape) == 3:
@@ -16,13 +19,13 @@ def plotAx_histogram(
         ax, grayscale_img, bins=256, stat="count"
 ):
     with plt.ioff():
-        histplot(grayscale_img.ravel(), ax=ax, stat=stat, bins=bins)
+        seaborn.histplot(grayscale_img.ravel(), ax=ax, stat=stat, bins=bins)
 
 
 def plot_histogram(grayscale_img):
     with plt.ioff():
         fig, ax = plt.subplots()
-        histplot(grayscale_img.ravel(), ax=ax)
+        seaborn.histplot(grayscale_img.ravel(), ax=ax)
     return fig, ax
 
 
@@ -30,22 +33,22 @@ def compare_hist(img_one, img_two, figsize=(12, 8)):
     with plt.ioff():
         if len(img_one.shape) == 2:
             fig, axes = plt.subplots(ncols=2, figsize=figsize)
-            histplot(img_one.ravel(), bins=256, ax=axes[0])
-            histplot(img_two.ravel(), bins=256, ax=axes[1])
+            seaborn.histplot(img_one.ravel(), bins=256, ax=axes[0])
+            seaborn.histplot(img_two.ravel(), bins=256, ax=axes[1])
         else:
             fig, axes = plt.subplots(ncols=2, nrows=3, figsize=figsize)
             ax = axes.ravel()
-            histplot(img_one[:, :, 0], bins=256, ax=ax[0])
+            seaborn.histplot(img_one[:, :, 0], bins=256, ax=ax[0])
             ax[0].set_title("Red 1")
-            histplot(img_two[:, :, 0], bins=256, ax=ax[1])
+            seaborn.histplot(img_two[:, :, 0], bins=256, ax=ax[1])
             ax[1].set_title("Red 2")
-            histplot(img_one[:, :, 1], bins=256, ax=ax[2])
+            seaborn.histplot(img_one[:, :, 1], bins=256, ax=ax[2])
             ax[2].set_title("Green 1")
-            histplot(img_two[:, :, 1], bins=256, ax=ax[3])
+            seaborn.histplot(img_two[:, :, 1], bins=256, ax=ax[3])
             ax[3].set_title("Green 2")
-            histplot(img_one[:, :, 2], bins=256, ax=ax[4])
+            seaborn.histplot(img_one[:, :, 2], bins=256, ax=ax[4])
             ax[4].set_title("Blue 1")
-            histplot(img_two[:, :, 2], bins=256, ax=ax[5])
+            seaborn.histplot(img_two[:, :, 2], bins=256, ax=ax[5])
             ax[5].set_title("Blue 2")
 
     return fig, axes
@@ -58,7 +61,7 @@ def view_img_info(img, stat="count", bins=256, sharey=False, sharex=False, figsi
             axes[0].imshow(img)
             axes[0].grid(False)
             axes[0].set_title("Image")
-            histplot(img.ravel(),
+            seaborn.histplot(img.ravel(),
                      stat=stat, bins=bins, ax=axes[1])
     else:
         with plt.ioff():
@@ -71,7 +74,7 @@ def view_img_info(img, stat="count", bins=256, sharey=False, sharex=False, figsi
             ylims = []
             xlims = []
             for idx, _ax in enumerate(ax[1:]):
-                histplot(img[:, :, idx].ravel(),
+                seaborn.histplot(img[:, :, idx].ravel(),
                          stat=stat, bins=bins, ax=_ax)
                 _ax.set_title(f"{channel[idx]}")
                 ylims.append(_ax.get_ylim()[1])
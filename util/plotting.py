@@ -1,6 +1,7 @@
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-from ..detection.blob_finder import BlobFinder
+from ._lazy import LazyModule
+
+plt = LazyModule("matplotlib.pyplot")
+mcolors = LazyModule("matplotlib.colors")
 
 
 def plot_blobs(img, blobs, ax=None, set_axis=False, grayscale=False):
@@ -29,7 +30,7 @@ def plot_blobs(img, blobs, ax=None, set_axis=False, grayscale=False):
             return (blobs_ax)
 
 
-def plotAx_blobs(img, blobs, ax: plt.Axes, grayscale=False):
+def plotAx_blobs(img, blobs, ax: "plt.Axes", grayscale=False):
     with plt.ioff():
         if grayscale is True:
             ax.imshow(img, cmap='gray')
@@ -135,5 +136,7 @@ def plot_plate_cols(img, blobs_class, ax=None, set_axis=False, grayscale=False):
 
 
 def plotAx_find_blobs(ax, img):
+    # Imported here to avoid a circular import between util and detection
+    from ..detection.blob_finder import BlobFinder
     blobs = BlobFinder(img)
     plot_plate_rows(img=img, blobs_class=blobs, ax=ax)